@@ -0,0 +1,338 @@
+import os
+import sys
+import json
+import gzip
+import time
+import random
+import argparse
+import datetime
+import contextlib
+import subprocess
+import tempfile
+
+import script
+
+# Synthetic OSWatcher archives and a benchmark of the analyzers on them.
+#
+#   python benchmark.py --days 1,3,7 --json results.json
+#   python benchmark.py --days 1,3,7 --baseline results.json
+
+SUBDIRS = {"oswtop": "top", "oswvmstat": "vmstat", "oswmeminfo": "meminfo", "oswiostat": "iostat",
+           "oswmpstat": "mpstat", "oswps": "ps", "oswnetstat": "netstat"}
+COMMANDS = ["ora_pmon_ORCL", "ora_dbw0_ORCL", "ora_lgwr_ORCL", "ora_ckpt_ORCL", "ora_smon_ORCL",
+            "oracleORCL", "ocssd.bin", "crsd.bin", "java", "sshd", "kworker/u8:2", "jbd2/dm-0-8", "rsyslogd"]
+USERS = ["oracle", "grid", "root"]
+
+class Workload:
+    # Random walks of load and memory with rising, falling and noisy phases,
+    # so the trend detectors and alerts have something to find.
+    def __init__(self, rnd, cores):
+        self.rnd = rnd
+        self.cores = cores
+        self.load = cores / 4
+        self.mem = 60.0
+        self.step = 0
+        self.segments = [0, 0, 0]  # netstat received, sent, retransmitted
+
+    def advance(self):
+        phase = (self.step // 8) % 4
+        self.step += 1
+        if phase == 0:
+            delta = self.rnd.uniform(0.1, 1.5)
+        elif phase == 1:
+            delta = -self.rnd.uniform(0.1, 1.5)
+        else:
+            delta = self.rnd.uniform(-2, 2)
+        self.load = max(0.1, min(self.load + delta * self.cores / 16, self.cores * 2.5))
+        self.mem = max(30.0, min(self.mem + delta, 98.0))
+
+def write_top(f, rnd, when, work, processes):
+    load = work.load
+    f.write(f"top - {when:%H:%M:%S} up 10 days,  3:02,  2 users,  load average: "
+            f"{load:.2f}, {load * 0.9:.2f}, {load * 0.8:.2f}\n")
+    f.write(f"Tasks: {processes + 250} total,   1 running, {processes + 249} sleeping,   0 stopped,   0 zombie\n"
+            "Cpu(s):  5.2%us,  1.0%sy,  0.0%ni, 93.5%id,  0.2%wa,  0.0%hi,  0.1%si,  0.0%st\n"
+            "Mem:  65838092k total, 60000000k used,  5838092k free,   500000k buffers\n"
+            "Swap: 16777212k total,        0k used, 16777212k free, 40000000k cached\n\n"
+            "  PID USER      PR  NI  VIRT  RES  SHR S %CPU %MEM    TIME+  COMMAND\n")
+    busy = min(1.0, load / work.cores)
+    for p in range(processes):
+        state = "S"
+        if rnd.random() < 0.3 * busy:
+            state = rnd.choice("RRRD")
+        f.write(f"{1000 + p:5d} {USERS[p % 3]:<8}  20   0 10.2g 2.1g 2.0g {state} "
+                f"{rnd.uniform(0, 99 * busy):4.1f} {rnd.uniform(0, 9):4.1f}   1:23.45 {COMMANDS[p % len(COMMANDS)]}\n")
+
+def write_vmstat(f, rnd, when, work):
+    f.write("procs -----------memory---------- ---swap-- -----io---- --system-- -----cpu-----\n"
+            " r  b   swpd   free   buff  cache   si   so    bi    bo   in   cs us sy id wa st\n")
+    for _ in range(3):
+        f.write(f"{int(rnd.uniform(0, work.load * 1.4)):2d} {rnd.randint(0, 5):2d}      0 5838092 500000 40000000"
+                f"    0    0     1     5    2    3  5  1 94  0  0\n")
+
+def write_meminfo(f, rnd, when, work):
+    total = 65838092
+    free = total - int(total * work.mem / 100)
+    f.write(f"MemTotal:       {total} kB\n"
+            f"MemFree:        {free // 4} kB\n"
+            f"MemAvailable:   {free} kB\n"
+            f"Buffers:        {free // 4} kB\n"
+            f"Cached:         {free - 2 * (free // 4)} kB\n"
+            "SwapCached:            0 kB\n"
+            f"Active:         {total // 3} kB\n"
+            f"Inactive:       {total // 5} kB\n"
+            "SwapTotal:      16777212 kB\n"
+            "SwapFree:       16777212 kB\n"
+            f"Dirty:          {rnd.randint(0, 5000)} kB\n"
+            "HugePages_Total:       0\n"
+            "HugePages_Free:        0\n")
+
+def write_iostat(f, rnd, more, when, work, devices, reports=3):
+    # iostat -xk 1 3: several reports per zzz block. The first one draws from
+    # rnd as it always has; the others come from their own generator.
+    for report in range(reports):
+        draw = rnd if report == 0 else more
+        f.write("avg-cpu:  %user   %nice %system %iowait  %steal   %idle\n"
+                f"           5.20    0.00    1.00   {draw.uniform(0, 30):5.2f}    0.00   63.60\n\n"
+                "Device:         rrqm/s   wrqm/s     r/s     w/s    rkB/s    wkB/s avgrq-sz avgqu-sz"
+                "   await r_await w_await  svctm  %util\n")
+        for d in range(devices):
+            name = f"sd{chr(97 + d % 26)}{d // 26 or ''}"
+            f.write(f"{name:<16} 0.00     1.00    2.00    5.00 {draw.uniform(0, 90000):8.2f} "
+                    f"{draw.uniform(0, 90000):8.2f}    37.71     0.01 {draw.uniform(0, 40):7.2f}    1.00    1.70   "
+                    f"0.50 {draw.uniform(0, 100):6.2f}\n")
+        f.write("\n")
+
+def write_mpstat(f, rnd, when, work):
+    # mpstat -P ALL 1 2. In the rising phase one core is pinned by softirqs
+    # while the rest follow the load, the imbalance the mpstat report finds.
+    columns = "CPU    %usr   %nice    %sys %iowait    %irq   %soft  %steal  %guest  %gnice   %idle"
+    busy = min(95.0, work.load / work.cores * 100)
+    hot = (work.step // 8) % 4 == 0
+    f.write(f"Linux 4.18.0-372.el8.x86_64 (benchhost) \t{when:%m/%d/%Y} \t_x86_64_\t({work.cores} CPU)\n")
+    for second in range(3):
+        stamp = f"{when + datetime.timedelta(seconds=second):%I:%M:%S %p}"
+        if second == 2:
+            stamp = "Average:   "
+        f.write(f"\n{stamp}  {columns}\n")
+        rows = []
+        for cpu in range(work.cores):
+            if hot and cpu == 3:
+                usr, sys_, soft = 2.0, 20.0, 77.0
+            else:
+                usr = min(95.0, busy * rnd.uniform(0.5, 1.5))
+                sys_, soft = usr / 5, rnd.uniform(0, 1)
+            wait = rnd.uniform(0, 2)
+            rows.append((str(cpu), usr, sys_, wait, soft, max(0.0, 100 - usr - sys_ - wait - soft)))
+        rows.insert(0, ("all", *(sum(row[i] for row in rows) / len(rows) for i in range(1, 6))))
+        for cpu, usr, sys_, wait, soft, idle in rows:
+            f.write(f"{stamp}  {cpu:>3} {usr:7.2f}    0.00 {sys_:7.2f} {wait:7.2f}    0.00 {soft:7.2f}"
+                    f"    0.00    0.00    0.00 {idle:7.2f}\n")
+
+def write_ps(f, rnd, when, work, processes):
+    # Every seventh process leaks 50 MB an hour at a 30 s interval.
+    f.write("USER       PID  PPID PRI %CPU %MEM    VSZ   RSS WCHAN                            S  STARTED     TIME COMMAND\n")
+    for p in range(processes):
+        rss = 50000 + p * 1000 + (work.step * 400 if p % 7 == 0 else rnd.randint(0, 500))
+        started = "Jan 10" if p % 2 else "00:00:05"
+        f.write(f"{USERS[p % 3]:<8} {1000 + p:5d}     1  19 {rnd.uniform(0, 5):4.1f}  0.1 {rss * 3:7d} {rss:6d} "
+                f"{'-':<32} S {started:>8} 00:01:{p % 60:02d} {COMMANDS[p % len(COMMANDS)]} -p {p}\n")
+
+def write_netstat(f, rnd, when, work):
+    # Cumulative netstat -s counters; the noisy phase retransmits 2%.
+    sent = rnd.randint(20000, 40000)
+    rate = 0.02 if (work.step // 8) % 4 == 2 else 0.001
+    segments = work.segments
+    segments[0] += sent + rnd.randint(0, 5000)
+    segments[1] += sent
+    segments[2] += int(sent * rate * rnd.uniform(0.5, 1.5))
+    f.write("Tcp:\n"
+            "    12345 active connection openings\n"
+            f"    {segments[0]} segments received\n"
+            f"    {segments[1]} segments sent out\n"
+            f"    {segments[2]} segments retransmitted\n"
+            "    0 bad segments received\n"
+            "    567 resets sent\n"
+            "Udp:\n"
+            "    100000 packets received\n")
+
+def generate_archive(root, days=1, interval=30, processes=40, devices=6, gzip_ratio=0.0, host="benchhost",
+                     cores=16, iostat_reports=3, seed=1):
+    # Hourly files in the real OSWatcher layout; gzip_ratio of the hours are
+    # written as .dat.gz, spread evenly over the archive.
+    rnd = random.Random(seed)
+    extra = random.Random(seed + 1)  # mpstat, ps and netstat, so the other sources stay as they were
+    iostat_extra = random.Random(seed + 2)  # iostat reports after a block's first
+    work = Workload(rnd, cores)
+    start = datetime.datetime(2024, 1, 15, 0, 0, 5)
+    for subdir in SUBDIRS:
+        os.makedirs(os.path.join(root, subdir), exist_ok=True)
+
+    for hour in range(days * 24):
+        hour_start = start + datetime.timedelta(hours=hour)
+        compressed = int((hour + 1) * gzip_ratio) > int(hour * gzip_ratio)
+        files = {}
+        with contextlib.ExitStack() as stack:
+            for subdir, tag in SUBDIRS.items():
+                path = os.path.join(root, subdir, f"{host}_{tag}_{hour_start:%y.%m.%d.%H}00.dat")
+                if compressed:
+                    files[subdir] = stack.enter_context(gzip.open(path + ".gz", "wt", compresslevel=6))
+                else:
+                    files[subdir] = stack.enter_context(open(path, "w"))
+                files[subdir].write(f"Linux OSWbb v8.1.2 {host}\nSNAP_INTERVAL {interval}\nCPU_CORES {cores // 2}\n"
+                                    f"VCPUS {cores}\nOSWBB_ARCHIVE_DEST /opt/oracle.ahf/data/{host}/oswbb/archive\n")
+            for snapshot in range(3600 // interval):
+                when = hour_start + datetime.timedelta(seconds=snapshot * interval)
+                work.advance()
+                header = f"zzz ***{when:%a %b %d %H:%M:%S} UTC {when:%Y}\n"
+                for f in files.values():
+                    f.write(header)
+                write_top(files["oswtop"], rnd, when, work, processes)
+                write_vmstat(files["oswvmstat"], rnd, when, work)
+                write_meminfo(files["oswmeminfo"], rnd, when, work)
+                write_iostat(files["oswiostat"], rnd, iostat_extra, when, work, devices, iostat_reports)
+                write_mpstat(files["oswmpstat"], extra, when, work)
+                write_ps(files["oswps"], extra, when, work, processes)
+                write_netstat(files["oswnetstat"], extra, when, work)
+
+# name: (source subdirectory, call). Reports go to /dev/null.
+ANALYZERS = {
+    "cpu": ("oswtop", lambda d, cores, jobs: script.process_oswtop_files(d, cores, 0.75 * cores, jobs)),
+    "memory": ("oswmeminfo", lambda d, cores, jobs: script.process_oswmeminfo_files(d, jobs)),
+    "vmstat": ("oswvmstat", lambda d, cores, jobs: script.process_oswvmstat_files(d, cores, jobs)),
+    "dstate": ("oswtop", lambda d, cores, jobs: script.analyze_oswtop_data(d, jobs)),
+    "iostat": ("oswiostat", lambda d, cores, jobs: script.analyze_iostat_files(d, jobs)),
+    "mpstat": ("oswmpstat", lambda d, cores, jobs: script.analyze_mpstat_files(d, jobs)),
+    "ps": ("oswps", lambda d, cores, jobs: script.analyze_ps_files(d, jobs)),
+    "netstat": ("oswnetstat", lambda d, cores, jobs: script.analyze_netstat_files(d, jobs)),
+}
+
+def peak_rss_mb():
+    import resource
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS; pool workers
+    # count as children.
+    unit = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * unit / (1024 * 1024)
+
+def run_one(name, archive, jobs):
+    # Runs in a fresh interpreter so peak RSS belongs to this analyzer alone.
+    subdir, call = ANALYZERS[name]
+    cores = script.find_cpu_cores(os.path.join(archive, "oswvmstat")) or 16
+    directory = os.path.join(archive, subdir)
+    cpu_start = os.times()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        call(directory, cores, jobs)
+    wall = time.perf_counter() - start
+    cpu_end = os.times()
+    cpu = sum(cpu_end[:4]) - sum(cpu_start[:4])
+    return {"wall": wall, "cpu": cpu, "peak_rss_mb": peak_rss_mb()}
+
+def measure_input(directory):
+    # Uncompressed bytes and zzz snapshots, counted outside the timed run.
+    size = snapshots = 0
+    for filename in script.list_osw_files(directory):
+        with script.OSW_FILE_OPENERS[script.osw_file_suffix(filename)](os.path.join(directory, filename), "rb") as f:
+            for line in f:
+                size += len(line)
+                if line.startswith(b"zzz "):
+                    snapshots += 1
+    return size, snapshots
+
+def benchmark(archive, names, jobs=1, repeat=1):
+    results = {}
+    inputs = {}
+    for name in names:
+        subdir = ANALYZERS[name][0]
+        if subdir not in inputs:
+            inputs[subdir] = measure_input(os.path.join(archive, subdir))
+        runs = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", name, archive,
+                                     "--jobs", str(jobs)], check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(output.splitlines()[-1]))
+        best = min(runs, key=lambda run: run["wall"])
+        size, snapshots = inputs[subdir]
+        best["mb"] = size / (1024 * 1024)
+        best["snapshots"] = snapshots
+        best["mb_per_s"] = best["mb"] / best["wall"] if best["wall"] else 0.0
+        best["samples_per_s"] = snapshots / best["wall"] if best["wall"] else 0.0
+        results[name] = best
+    return results
+
+def print_results(results, baseline=None):
+    print(f"{'archive':<10} {'analyzer':<8} {'MB':>8} {'wall s':>8} {'cpu s':>8} {'MB/s':>8} "
+          f"{'samples/s':>10} {'peak RSS MB':>11}" + ("  vs baseline" if baseline else ""))
+    for size, by_name in results.items():
+        for name, result in by_name.items():
+            line = (f"{size:<10} {name:<8} {result['mb']:8.1f} {result['wall']:8.2f} {result['cpu']:8.2f} "
+                    f"{result['mb_per_s']:8.1f} {result['samples_per_s']:10.0f} {result['peak_rss_mb']:11.1f}")
+            previous = (baseline or {}).get(size, {}).get(name)
+            if previous:
+                change = (result["wall"] - previous["wall"]) / previous["wall"] * 100
+                line += f"  {change:+6.1f}% wall{' ⚠️' if change > 10 else ''}"
+            print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic OSWatcher archives and benchmark the analyzers.")
+    parser.add_argument("--days", default="1",
+                        help="comma-separated archive sizes in days, one benchmark per size (default 1)")
+    parser.add_argument("--interval", type=int, default=30, help="snapshot interval in seconds (default 30)")
+    parser.add_argument("--processes", type=int, default=40, help="process rows per top snapshot (default 40)")
+    parser.add_argument("--devices", type=int, default=6, help="iostat devices (default 6)")
+    parser.add_argument("--cores", type=int, default=16, help="VCPUS, also the mpstat rows per interval (default 16)")
+    parser.add_argument("--iostat-reports", type=int, default=3, help="iostat reports per snapshot (default 3)")
+    parser.add_argument("--gzip-ratio", type=float, default=0.0, help="fraction of hourly files gzipped (default 0)")
+    parser.add_argument("--analyzers", default=",".join(ANALYZERS),
+                        help=f"comma-separated list of {', '.join(ANALYZERS)}")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes per analyzer (default 1)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per analyzer; the fastest is kept (default 1)")
+    parser.add_argument("--workdir", help="where archives are generated and reused (default: a temporary directory)")
+    parser.add_argument("--generate-only", metavar="DIR",
+                        help="write one archive of --days[0] days into DIR and exit")
+    parser.add_argument("--json", metavar="FILE", help="save the results for later comparison")
+    parser.add_argument("--baseline", metavar="FILE", help="compare wall time against results saved with --json")
+    parser.add_argument("--run-one", nargs=2, metavar=("ANALYZER", "ARCHIVE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one[0], args.run_one[1], args.jobs)))
+        sys.exit(0)
+
+    days = [int(day) for day in args.days.split(",") if day.strip()]
+    params = dict(interval=args.interval, processes=args.processes, devices=args.devices, gzip_ratio=args.gzip_ratio,
+                  cores=args.cores, iostat_reports=args.iostat_reports)
+    if args.generate_only:
+        generate_archive(args.generate_only, days[0], **params)
+        print(f"✅ Archive of {days[0]} days written to: {args.generate_only}")
+        sys.exit(0)
+
+    names = [name.strip() for name in args.analyzers.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ANALYZERS]
+    if unknown:
+        parser.error(f"unknown analyzers: {', '.join(unknown)}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="osw_bench_")
+    results = {}
+    for day_count in days:
+        # Archives are keyed by their parameters and reused across runs.
+        archive = os.path.join(workdir, f"{day_count}d_{args.interval}s_{args.processes}p_{args.devices}d_"
+                                        f"{args.cores}c_{args.iostat_reports}r_{args.gzip_ratio:g}gz")
+        if not os.path.isdir(archive):
+            print(f"🛠️ Generating {day_count}-day archive in {archive}")
+            generate_archive(archive, day_count, **params)
+        print(f"⏱️ Benchmarking {day_count}-day archive")
+        results[f"{day_count}d"] = benchmark(archive, names, args.jobs, args.repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print()
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved to: {args.json}")
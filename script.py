@@ -1,318 +1,1784 @@
+import io
 import os
 import re
+import sys
+import json
+import bz2
+import csv
+import heapq
 import gzip
+import lzma
+import tarfile
+import tempfile
 import shutil
+import math
+import mmap
+import pickle
+import calendar
+import datetime
+import time
+import hashlib
+import zipfile
+import argparse
+import itertools
+import importlib.util
+import functools
 import contextlib
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except ImportError:  # the pure-Python trend engine gives identical results
+    np = None
+
+try:
+    import resource
+except ImportError:  # not on Windows; peak memory is then left out of profiles
+    resource = None
+
+# OSWatcher writes hourly .dat files and compresses older ones in place
+# (gzip by default, bzip2/xz with some OSWBB_COMPRESSION settings).
+OSW_FILE_OPENERS = {
+    ".dat": open,
+    ".dat.gz": gzip.open,
+    ".dat.bz2": bz2.open,
+    ".dat.xz": lzma.open,
+}
+
+# Bump whenever a parser's output changes so stale cache entries are ignored.
+PARSE_CACHE_VERSION = 7
+DEFAULT_CACHE_SIZE_MB = 512
+
+# Set by enable_parse_cache(); None means every file is parsed from text.
+parse_cache = None
+
+# Customers often send the archive as one tarball or zip. Bundles are read
+# in place: a path through a bundle (case.tar.gz/archive/oswtop) addresses
+# its members, and nothing is extracted.
+BUNDLE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".zip")
+BUNDLE_REPORTS_SUFFIX = "_reports"
+
+OSW_READ_ERRORS = (OSError, EOFError, lzma.LZMAError, tarfile.TarError, zipfile.BadZipFile)
 
 def get_oswarchive_path():
     while True:
-        path = input("Enter the absolute path to the OSWatcher archive directory: ").strip()
+        path = input("Enter the absolute path to the OSWatcher archive directory or bundle: ").strip()
         if os.path.isdir(path):
             return path
+        elif is_bundle_file(path):
+            try:
+                return resolve_archive(path)
+            except ValueError as e:
+                print(f"❌ {e}")
         else:
             print("Invalid directory path. Please try again.")
 
-def unzip_gz_files(directory, silent=True):
+def osw_file_suffix(filename):
+    for suffix in OSW_FILE_OPENERS:
+        if filename.endswith(suffix):
+            return suffix
+    return None
+
+def list_osw_files(directory):
+    # Plain and compressed copies of the same hour can coexist after a partial
+    # manual gunzip; keep one per hour (the plain one) in filename order.
+    files = {}
+    for filename in osw_listdir(directory):
+        suffix = osw_file_suffix(filename)
+        if suffix is None:
+            continue
+        base = filename[:-len(suffix)]
+        if base not in files or suffix == ".dat":
+            files[base] = filename
+    return [files[base] for base in sorted(files)]
+
+def bundle_suffix(path):
+    lowered = path.lower()
+    return next((suffix for suffix in BUNDLE_SUFFIXES if lowered.endswith(suffix)), None)
+
+def is_bundle_file(path):
+    return bundle_suffix(path) is not None and os.path.isfile(path)
+
+def member_name(name):
+    # Tar and zip member names as "dir/sub/file", without "./" or "/" prefixes.
+    return "/".join(part for part in name.split("/") if part not in ("", "."))
+
+class OswBundle:
+    # Member index of a .tar(.gz/.bz2/.xz) or .zip bundle. Plain tars and
+    # zips are read member by member in place; a compressed tar can only be
+    # read front to back, so its members are streamed with iter_members().
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        self.files = {}
+        self.dirs = {"": set()}
+        suffix = bundle_suffix(path)
+        if suffix == ".zip":
+            self.archive = zipfile.ZipFile(path)
+            members = [(info.filename, info.file_size, info) for info in self.archive.infolist() if not info.is_dir()]
+        elif suffix == ".tar":
+            self.archive = tarfile.open(path, "r:*")
+            members = [(info.name, info.size, info) for info in self.archive.getmembers() if info.isfile()]
+        else:
+            self.archive = None
+            members = [(name, size, None) for name, size in self.scan_members()]
+        for name, size, info in members:
+            name = member_name(name)
+            if not name:
+                continue
+            self.files[name] = (size, info)
+            parts = name.split("/")
+            for depth in range(len(parts)):
+                self.dirs.setdefault("/".join(parts[:depth]), set()).add(parts[depth])
+
+    def scan_members(self):
+        # Listing a compressed tar means decompressing all of it, so the
+        # listing is kept in the parse cache.
+        members = parse_cache.get("bundle", self.path) if parse_cache else CACHE_MISS
+        if members is CACHE_MISS:
+            with profile_stage("index bundle"), tarfile.open(self.path, "r|*") as tar:
+                members = [(info.name, info.size) for info in tar if info.isfile()]
+            if parse_cache:
+                parse_cache.put("bundle", self.path, members)
+        return members
+
+    def isdir(self, member):
+        return member in self.dirs
+
+    def listdir(self, member):
+        if member not in self.dirs:
+            raise FileNotFoundError(f"No such directory in {self.path}: {member}")
+        return list(self.dirs[member])
+
+    def stat(self, member):
+        # (size, mtime_ns); members carry the bundle's mtime.
+        if member not in self.files:
+            raise FileNotFoundError(f"No such file in {self.path}: {member}")
+        return self.files[member][0], self.mtime_ns
+
+    def archive_dirs(self):
+        # Directories holding osw* subdirectories, e.g. "archive" or "oswbb/archive".
+        return sorted(directory for directory, children in self.dirs.items()
+                      if any(name.startswith("osw") and name != RESULTS_DIR_NAME
+                             and "/".join(filter(None, (directory, name))) in self.dirs for name in children))
+
+    def open(self, member):
+        # Binary stream of the member as stored (a .dat.gz member stays gzipped).
+        self.stat(member)
+        info = self.files[member][1]
+        if isinstance(self.archive, zipfile.ZipFile):
+            return self.archive.open(info)
+        if self.archive is not None:
+            return self.archive.extractfile(info)
+        with contextlib.closing(self.iter_members([member])) as members:
+            return io.BytesIO(next(members)[1])
+
+    def iter_members(self, members):
+        # (member, stored bytes or None if absent) for each member in the
+        # given order, in one pass over a compressed tar that stops after the
+        # last one. Members the tar holds before their turn are spooled to
+        # temporary files, so only the member handed out is in memory.
+        if self.archive is not None:
+            for member in members:
+                with self.open(member) as f:
+                    yield member, f.read()
+            return
+        order = deque(members)
+        wanted = set(order)
+        spooled = {}
+        with contextlib.ExitStack() as stack:
+            tar = stack.enter_context(tarfile.open(self.path, "r|*"))
+            wall, cpu = time.perf_counter(), time.process_time()
+            for info in tar:
+                name = member_name(info.name)
+                if name not in wanted or not info.isfile():
+                    continue
+                wanted.discard(name)
+                if name != order[0]:
+                    spooled[name] = stack.enter_context(tempfile.TemporaryFile())
+                    shutil.copyfileobj(tar.extractfile(info), spooled[name])
+                    continue
+                data = tar.extractfile(info).read()
+                ready = [(order.popleft(), data)]
+                while order and order[0] in spooled:
+                    f = spooled.pop(order[0])
+                    f.seek(0)
+                    ready.append((order.popleft(), f.read()))
+                    f.close()
+                for member, data in ready:
+                    # Reading time only; the consumer's time while this
+                    # generator is suspended belongs to its own stages.
+                    if profiler:
+                        profiler.add_time("read bundle", time.perf_counter() - wall, time.process_time() - cpu,
+                                          bytes=len(data))
+                    yield member, data
+                    wall, cpu = time.perf_counter(), time.process_time()
+                if not order:
+                    return
+            for member in order:
+                f = spooled.pop(member, None)
+                if f is not None:
+                    f.seek(0)
+                yield member, f.read() if f is not None else None
+
+# Bundles opened by this process, by path.
+bundles = {}
+
+def get_bundle(path):
+    bundle = bundles.get(path)
+    if bundle is None or bundle.pid != os.getpid():
+        # A forked worker opens its own handle rather than sharing the
+        # parent's file offset.
+        bundle = bundles[path] = OswBundle(path)
+    return bundle
+
+def split_bundle_path(path):
+    # (bundle file, member path) for a path at or below a bundle, else None.
+    head = path
+    tail = []
+    while head and not os.path.exists(head):
+        head, part = os.path.split(head)
+        if not part:
+            break
+        tail.append(part)
+    if not head or not is_bundle_file(head):
+        return None
+    return head, "/".join(reversed(tail))
+
+class BundleMember(str):
+    # A member path that carries the member's stored bytes, so parsers in
+    # worker processes never go back to a compressed tar for one file.
+    def __new__(cls, path, data=None):
+        member = super().__new__(cls, path)
+        member.data = data
+        return member
+
+def in_bundle(path):
+    return isinstance(path, BundleMember) or split_bundle_path(path) is not None
+
+def osw_listdir(directory):
+    located = split_bundle_path(directory)
+    if located is None:
+        return os.listdir(directory)
+    return get_bundle(located[0]).listdir(located[1])
+
+def osw_isdir(path):
+    located = split_bundle_path(path)
+    if located is None:
+        return os.path.isdir(path)
+    return get_bundle(located[0]).isdir(located[1])
+
+def osw_stat(path):
+    # (size, mtime_ns) of a file on disk or in a bundle.
+    located = split_bundle_path(path)
+    if located is None or not located[1]:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    return get_bundle(located[0]).stat(located[1])
+
+def read_osw_member(path):
+    if isinstance(path, BundleMember):
+        return path.data
+    bundle, member = split_bundle_path(path)
+    with get_bundle(bundle).open(member) as f:
+        return f.read()
+
+def preload_osw_files(paths):
+    # Yields the paths in order, members of compressed tars as BundleMember
+    # with their bytes, read in one pass per bundle as they are reached;
+    # everything else is opened where it is parsed. Consumed lazily (see
+    # parallel_map()), so only the members in flight are held in memory.
+    paths = list(paths)
+    bundle_of = {}
+    wanted = {}
+    for path in paths:
+        located = split_bundle_path(path)
+        if located and get_bundle(located[0]).archive is None:
+            bundle_of[path] = located[0]
+            wanted.setdefault(located[0], []).append(located[1])
+    streams = {bundle: get_bundle(bundle).iter_members(members) for bundle, members in wanted.items()}
+    for path in paths:
+        if path in bundle_of:
+            _, data = next(streams[bundle_of[path]])
+            yield BundleMember(path, data) if data is not None else path
+        else:
+            yield path
+
+def bundle_archives(bundle):
+    return [os.path.join(bundle, *directory.split("/")) if directory else bundle
+            for directory in get_bundle(bundle).archive_dirs()]
+
+def resolve_archive(path):
+    # The archive directory to analyze: path itself, or the one archive
+    # inside a bundle. Raises ValueError otherwise.
+    if not is_bundle_file(path):
+        return path
     try:
-        files = os.listdir(directory)
-    except Exception as e:
-        if not silent:
-            print(f"⚠️ Error accessing directory '{directory}': {e}")
-        return False  # Signal failure to calling function
-
-    success = True
-    for file in files:
-        if file.endswith(".gz"):
-            gz_path = os.path.join(directory, file)
-            dat_path = gz_path[:-3]
-            if not os.path.exists(dat_path):
-                if not silent:
-                    print(f"Unzipping: {file}")
-                try:
-                    with gzip.open(gz_path, 'rb') as f_in:
-                        with open(dat_path, 'wb') as f_out:
-                            shutil.copyfileobj(f_in, f_out)
-                    os.remove(gz_path)
-                except Exception as e:
-                    print(f"❌ Error unzipping {file}: {e}")
-                    success = False  # One file failed, still keep going
-
-    return success  # True if all/unzipped or already extracted, False if any error occurred
-
-
-def get_cpu_cores_from_vmstat(vmstat_dir):
-    #unzip_gz_files(vmstat_dir)
-    for file in sorted(os.listdir(vmstat_dir)):
-        if file.endswith(".dat"):
-            file_path = os.path.join(vmstat_dir, file)
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        archives = bundle_archives(path)
+    except OSW_READ_ERRORS as e:
+        raise ValueError(f"cannot read bundle {path}: {e}")
+    if not archives:
+        raise ValueError(f"no OSWatcher archive (osw* directories) in {path}")
+    if len(archives) > 1:
+        raise ValueError(f"{path} holds {len(archives)} archives; analyze them with --fleet")
+    return archives[0]
+
+def archive_location(archive_dir):
+    # The bundle file of an archive read from one, else the directory itself.
+    located = split_bundle_path(archive_dir)
+    return located[0] if located else archive_dir
+
+def archive_output_dir(archive_dir):
+    # Reports and the manifest go into the archive directory; for an archive
+    # read from case.tar.gz they go to case.tar.gz_reports/ next to the
+    # bundle, named after the whole file so case.tar and case.zip don't share.
+    located = split_bundle_path(archive_dir)
+    if located is None:
+        return archive_dir
+    bundle, member = located
+    directory = os.path.join(bundle + BUNDLE_REPORTS_SUFFIX, *filter(None, member.split("/")))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+class BoundedReader(io.RawIOBase):
+    # Lets a text wrapper read at most `limit` bytes from a binary stream.
+    def __init__(self, raw, limit):
+        self.raw = raw
+        self.remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+class ProfiledReader(io.RawIOBase):
+    # Times reads (and decompression) of the wrapped stream for the profiler.
+    def __init__(self, raw, stage):
+        self.raw = raw
+        self.stage = stage
+        self.bytes = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def readable(self):
+        return True
+
+    def timed(self, func, *args):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return func(*args)
+        finally:
+            self.wall += time.perf_counter() - wall
+            self.cpu += time.process_time() - cpu
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.timed(self.raw.seek, offset, whence)
+
+    def readinto(self, buffer):
+        data = self.timed(self.raw.read, len(buffer))
+        buffer[:len(data)] = data
+        self.bytes += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed and profiler:
+            profiler.add_time(self.stage, self.wall, self.cpu, bytes=self.bytes)
+        self.raw.close()
+        super().close()
+
+def open_osw_binary(filepath):
+    # Uncompressed bytes of an OSWatcher file, on disk or in a bundle.
+    opener = OSW_FILE_OPENERS[osw_file_suffix(filepath)]
+    if isinstance(filepath, BundleMember):
+        raw = io.BytesIO(filepath.data)
+    else:
+        located = split_bundle_path(filepath)
+        if located is None:
+            return opener(filepath, "rb")
+        raw = get_bundle(located[0]).open(located[1])
+    return raw if opener is open else opener(raw, "rb")
+
+def open_osw_file(filepath, span=None):
+    # span=(start, stop) restricts reading to that range of uncompressed bytes;
+    # stop=None reads to the end. Compressed files seek by decompressing.
+    suffix = osw_file_suffix(filepath)
+    if span is None and profiler is None and not in_bundle(filepath):
+        return OSW_FILE_OPENERS[suffix](filepath, "rt", encoding="utf-8", errors="ignore")
+    raw = open_osw_binary(filepath)
+    if profiler:
+        raw = ProfiledReader(raw, f"read {suffix}")
+    start, stop = span or (0, None)
+    if start:
+        raw.seek(start)
+    if stop is not None:
+        raw = io.BufferedReader(BoundedReader(raw, stop - start))
+    elif profiler:
+        raw = io.BufferedReader(raw, 1 << 16)
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="ignore")
+
+def iter_osw_lines(filepath, span=None):
+    # Decompresses on the fly so analysis starts on the first block and the
+    # archive itself is never modified.
+    try:
+        with open_osw_file(filepath, span) as f:
+            if profiler is None:
+                yield from f
+            else:
+                lines = 0
                 for line in f:
-                    if line.startswith("VCPUS"):
-                        try:
-                            cores = int(line.strip().split()[1])
-                            print(f"\n🧠 Detected CPU Cores (VCPUS): {cores}")
-                            return cores
-                        except (IndexError, ValueError):
-                            pass
-    print("Could not determine CPU cores from vmstat data.")
-    exit(1)
+                    lines += 1
+                    yield line
+                profiler.count(f"read {osw_file_suffix(filepath)}", lines=lines)
+    except OSW_READ_ERRORS as e:
+        print(f"❌ Error reading {os.path.basename(filepath)}: {e}", file=sys.stderr)
+
+# ASCII bytes for which decoded-text parsing can differ from bytes-level
+# parsing: line endings other than \n, and separators that str.split() and
+# \s treat as whitespace but bytes do not.
+OSW_TEXT_ONLY_BYTES = (b"\r", b"\x1c", b"\x1d", b"\x1e", b"\x1f")
+
+def is_plain_ascii(buffer, start, stop, chunk_size=1 << 20):
+    for offset in range(start, stop, chunk_size):
+        chunk = buffer[offset:min(offset + chunk_size, stop)]
+        if not chunk.isascii() or any(byte in chunk for byte in OSW_TEXT_ONLY_BYTES):
+            return False
+    return True
+
+@contextlib.contextmanager
+def mmap_osw_file(filepath, span=None):
+    # Yields (buffer, start, stop) for plain .dat files that bytes-level
+    # scanners can parse exactly like iter_osw_lines() would, and None for
+    # everything else (compressed, non-ASCII, CRLF) so callers fall back to
+    # the text path. OSW_TEXT_PARSER=1 (--text-parser) forces the fallback.
+    # Plain .dat members of a bundle are read into memory instead of mapped.
+    buffer = None
+    stage = "read .dat (mmap)"
+    wall, cpu = time.perf_counter(), time.process_time()
+    if osw_file_suffix(filepath) == ".dat" and not os.environ.get("OSW_TEXT_PARSER"):
+        try:
+            if in_bundle(filepath):
+                stage = "read .dat (bundle)"
+                buffer = read_osw_member(filepath)
+            else:
+                with open(filepath, "rb") as f:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSW_READ_ERRORS + (ValueError,):
+            buffer = None
+    if buffer is None:
+        yield None
+        return
+    try:
+        start, stop = span or (0, None)
+        stop = len(buffer) if stop is None else min(stop, len(buffer))
+        plain = is_plain_ascii(buffer, start, stop)
+        if profiler and plain:
+            # The ASCII check is what pages the file in.
+            profiler.add_time(stage, time.perf_counter() - wall, time.process_time() - cpu,
+                              bytes=stop - start, lines=count_bytes(buffer, b"\n", start, stop))
+        yield (buffer, start, stop) if plain else None
+    finally:
+        # A scanner interrupted by an exception may still hold the buffer;
+        # the map is then released once it is garbage collected.
+        if isinstance(buffer, mmap.mmap):
+            with contextlib.suppress(BufferError):
+                buffer.close()
+
+def compile_line_pattern(body):
+    # A pattern anchored at line starts. Searching for the newline literal
+    # lets the regex engine skip ahead instead of trying every byte as
+    # re.MULTILINE "^" would, so the first line gets its own pattern.
+    return re.compile(body), re.compile(rb"\n(?:" + body + rb")")
+
+def iter_line_matches(patterns, buffer, start, stop):
+    first_line, other_lines = patterns
+    if start > 0:
+        # Spans always start right after a newline.
+        start -= 1
+    else:
+        match = first_line.match(buffer, 0, stop)
+        if match:
+            yield match
+    yield from other_lines.finditer(buffer, start, stop)
+
+def count_bytes(buffer, needle, start, stop, chunk_size=1 << 20):
+    # mmap has no count(); chunks overlap by len(needle) - 1 so every match
+    # is counted once, in the chunk where it starts.
+    count = 0
+    for offset in range(start, stop, chunk_size):
+        count += buffer[offset:min(offset + chunk_size + len(needle) - 1, stop)].count(needle)
+    return count
+
+def count_line_starts(buffer, start, stop, prefix):
+    first = buffer[start:start + len(prefix)] == prefix
+    return first + count_bytes(buffer, b"\n" + prefix, start, stop)
+
+def parallel_map(func, *iterables, jobs=1):
+    # Results come back in submission order, so merging them reproduces a
+    # sequential run exactly. At most 2 * jobs files are in flight, so a slow
+    # consumer (e.g. the timeline merge) does not buffer a whole archive.
+    # Arguments are drawn lazily, so a generator of file contents is only
+    # read as far as the files in flight.
+    items = zip(*iterables)
+    head = list(itertools.islice(items, jobs))
+    if jobs > 1 and len(head) > 1:
+        with ProcessPoolExecutor(max_workers=len(head)) as pool:
+            pending = deque()
+            for args in itertools.chain(head, items):
+                pending.append(pool_submit(pool, func, *args))
+                if len(pending) > 2 * jobs:
+                    yield pool_result(pending.popleft())
+            while pending:
+                yield pool_result(pending.popleft())
+    else:
+        for args in itertools.chain(head, items):
+            yield func(*args)
+
+def split_jobs(jobs, count):
+    # Shares of `jobs` worker processes for `count` tasks that run at the
+    # same time, at least 1 each. A task given 1 runs without a pool.
+    base, extra = divmod(jobs, max(count, 1))
+    return [max(base + (i < extra), 1) for i in range(count)]
+
+def pool_jobs(jobs, count):
+    # For `count` tasks run on a pool: (pool workers, jobs of each task). The
+    # pool workers count against `jobs` and only the rest is split among the
+    # tasks' own pools, so no more than `jobs` worker processes are alive.
+    workers = min(jobs, count)
+    return workers, [share if share > 1 else 1 for share in split_jobs(jobs - workers, count)]
+
+def select_osw_files(directory, window=None):
+    # [(path, span), ...] in filename order. Files outside the window are left
+    # out; boundary files get the byte span of their in-window blocks and
+    # span None means the whole file.
+    selected = []
+    for filename in list_osw_files(directory):
+        path = os.path.join(directory, filename)
+        coverage = window.file_coverage(filename) if window else "inside"
+        if coverage == "inside":
+            selected.append((path, None))
+        elif coverage == "partial":
+            span = window.span(zzz_index(path))
+            if span is not None:
+                selected.append((path, span))
+    return selected
+
+def map_osw_files(parse_file, directory, jobs=1, cache_kind=None, window=None):
+    # Per-file parsers, called as parse_file(path, span), run in a process
+    # pool when jobs > 1. With a cache_kind, unchanged whole files are served
+    # from the parse cache and only new or modified files are parsed.
+    selected = select_osw_files(directory, window)
+    cache = parse_cache if cache_kind else None
+    cached = {}
+    if cache:
+        for path, span in selected:
+            if span is None:
+                value = cache.get(cache_kind, path)
+                if value is not CACHE_MISS:
+                    cached[path] = value
+
+    missing = [(path, span) for path, span in selected if path not in cached]
+    parsed = parallel_map(parse_file, preload_osw_files([path for path, _ in missing]),
+                          [span for _, span in missing], jobs=jobs)
+    for path, span in selected:
+        if path in cached:
+            yield cached[path]
+        else:
+            value = next(parsed)
+            if cache and span is None:
+                cache.put(cache_kind, path, value)
+            yield value
+    if cache:
+        cache.evict()
+
+CACHE_MISS = object()
+
+class ParseCache:
+    # Parsed per-file results on disk, one entry per (parser kind, source
+    # path), valid while the source keeps its size and mtime. Entry mtimes are
+    # bumped on every hit so evict() can drop the least recently used entries
+    # once the whole cache, shared across archives, exceeds max_bytes.
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, kind, path):
+        key = f"{PARSE_CACHE_VERSION}:{kind}:{os.path.realpath(path)}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+
+    def get(self, kind, path):
+        entry_path = self.entry_path(kind, path)
+        try:
+            stat = osw_stat(path)
+            with open(entry_path, "rb") as f:
+                size, mtime_ns, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return CACHE_MISS
+        if (size, mtime_ns) != stat:
+            return CACHE_MISS
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, kind, path, value):
+        entry_path = self.entry_path(kind, path)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            size, mtime_ns = osw_stat(path)
+            with open(tmp_path, "wb") as f:
+                pickle.dump((size, mtime_ns, value), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            print(f"⚠️ Could not write parse cache entry: {e}", file=sys.stderr)
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                with contextlib.suppress(OSError):
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((st.st_mtime_ns, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "oswatcher-analyser")
+
+def enable_parse_cache(cache_dir=None, max_mb=DEFAULT_CACHE_SIZE_MB):
+    global parse_cache
+    try:
+        parse_cache = ParseCache(cache_dir or default_cache_dir(), max_mb * 1024 * 1024)
+    except OSError as e:
+        print(f"⚠️ Parse cache disabled: {e}", file=sys.stderr)
+        parse_cache = None
+
+# Set by enable_profiler(); None means nothing is measured.
+profiler = None
+PROFILE_FIELDS = ("calls", "wall", "self_wall", "cpu", "self_cpu", "bytes", "lines", "samples", "rejected")
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    unit = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / (1024 * 1024)
+
+class Profiler:
+    # Wall/CPU time and counters per stage. Stages nest, so each is keyed by
+    # its path from the outermost stage, and "self" time excludes the time
+    # spent in nested stages. Counters (bytes, lines, samples, rejected)
+    # are added to the innermost running stage or one of its children.
+    def __init__(self, prefix=()):
+        self.stack = [[name, 0.0, 0.0] for name in prefix]
+        self.stages = {}
+        self.worker_peak_rss = None
+        self.started = (time.perf_counter(), time.process_time())
+
+    def path(self):
+        return tuple(name for name, _, _ in self.stack)
+
+    def entry(self, path):
+        if path not in self.stages:
+            self.stages[path] = dict.fromkeys(PROFILE_FIELDS, 0)
+        return self.stages[path]
+
+    def add_time(self, name, wall, cpu, child_wall=0.0, child_cpu=0.0, **counters):
+        # Records one finished call of a child stage of the running one.
+        entry = self.entry(self.path() + (name,))
+        entry["calls"] += 1
+        entry["wall"] += wall
+        entry["self_wall"] += wall - child_wall
+        entry["cpu"] += cpu
+        entry["self_cpu"] += cpu - child_cpu
+        for key, value in counters.items():
+            entry[key] += value
+        if self.stack:
+            self.stack[-1][1] += wall
+            self.stack[-1][2] += cpu
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.stack.append([name, 0.0, 0.0])
+        try:
+            yield
+        finally:
+            _, child_wall, child_cpu = self.stack.pop()
+            self.add_time(name, time.perf_counter() - wall, time.process_time() - cpu, child_wall, child_cpu)
+
+    def count(self, name=None, **counters):
+        entry = self.entry(self.path() + ((name,) if name else ()))
+        for key, value in counters.items():
+            entry[key] += value
+
+    def merge(self, stages, worker_peak_rss):
+        # Worker stages are not charged to the stage that waited for them, so
+        # with --jobs > 1 that stage's self time includes the wait.
+        for path, other in stages.items():
+            entry = self.entry(path)
+            for key, value in other.items():
+                entry[key] += value
+        if worker_peak_rss is not None:
+            self.worker_peak_rss = max(self.worker_peak_rss or 0, worker_peak_rss)
+
+    def report(self):
+        wall = time.perf_counter() - self.started[0]
+        cpu = time.process_time() - self.started[1]
+        print(f"\n========⏱️ Profile (main process: {wall:.2f}s wall, {cpu:.2f}s CPU) =========\n")
+        print(f"{'stage':<44} {'calls':>6} {'wall s':>8} {'self s':>8} {'cpu s':>8} {'self cpu':>8} "
+              f"{'MB':>8} {'lines':>10} {'samples':>9} {'rejected':>8}")
+        for path in sorted(self.stages):
+            entry = self.stages[path]
+            name = "  " * (len(path) - 1) + path[-1]
+            print(f"{name:<44} {entry['calls']:>6} {entry['wall']:8.3f} {entry['self_wall']:8.3f} "
+                  f"{entry['cpu']:8.3f} {entry['self_cpu']:8.3f} {entry['bytes'] / (1024 * 1024):8.1f} "
+                  f"{entry['lines']:>10} {entry['samples']:>9} {entry['rejected']:>8}")
+        main_rss = peak_rss_mb()
+        if main_rss is not None:
+            workers = f", largest worker {self.worker_peak_rss:.1f} MB" if self.worker_peak_rss is not None else ""
+            print(f"\nPeak RSS: main process {main_rss:.1f} MB{workers}")
+
+    def write_json(self, path):
+        data = {
+            "version": 1,
+            "argv": sys.argv[1:],
+            "wall": time.perf_counter() - self.started[0],
+            "cpu": time.process_time() - self.started[1],
+            "peak_rss_mb": {"main": peak_rss_mb(), "largest_worker": self.worker_peak_rss},
+            "stages": [{"stage": " / ".join(stage_path), "depth": len(stage_path) - 1, **entry}
+                       for stage_path, entry in sorted(self.stages.items())],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+def enable_profiler():
+    global profiler
+    profiler = Profiler()
+
+def finish_profile(show=True, json_path=None):
+    if profiler is None:
+        return
+    if show:
+        profiler.report()
+    if json_path:
+        try:
+            profiler.write_json(json_path)
+            print(f"✅ Profile written to: {json_path}")
+        except OSError as e:
+            print(f"⚠️ Could not write profile: {e}", file=sys.stderr)
+
+def profile_stage(name):
+    return profiler.stage(name) if profiler else contextlib.nullcontext()
+
+def profile_count(**counters):
+    if profiler:
+        profiler.count(**counters)
+
+def profiled(name):
+    # Measures every call of the decorated function as stage `name`.
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def call_profiled(prefix, func, *args):
+    # Runs in a pool worker: measures func with a fresh profiler whose stages
+    # sit under the submitting stage, and returns them with the result.
+    global profiler
+    profiler = Profiler(prefix)
+    result = func(*args)
+    return result, profiler.stages, peak_rss_mb()
+
+def pool_submit(pool, func, *args):
+    if profiler:
+        return pool.submit(call_profiled, profiler.path(), func, *args)
+    return pool.submit(func, *args)
+
+def pool_result(future):
+    result = future.result()
+    if profiler:
+        result, stages, worker_peak_rss = result
+        profiler.merge(stages, worker_peak_rss)
+    return result
+
+def require_osw_dir(directory):
+    if osw_isdir(directory):
+        return True
+    print(f"❌ Directory not found: {directory}. Skipping.")
+    return False
+
+def find_cpu_cores(vmstat_dir):
+    for file in list_osw_files(vmstat_dir):
+        file_path = os.path.join(vmstat_dir, file)
+        for line in iter_osw_lines(file_path):
+            if line.startswith("VCPUS"):
+                try:
+                    return int(line.strip().split()[1])
+                except (IndexError, ValueError):
+                    pass
+    return None
+
+def get_cpu_cores(manifest):
+    cores = manifest["cpu_cores"]
+    if cores is None:
+        print("Could not determine CPU cores from vmstat data.")
+        exit(1)
+    print(f"\n🧠 Detected CPU Cores (VCPUS): {cores}")
+    return cores
 
 def extract_date_from_filename(filename):
-    match = re.search(r"_(\d{2}\.\d{2}\.\d{2})\.\d{4}\.dat$", filename)
+    match = re.search(r"_(\d{2}\.\d{2}\.\d{2})\.\d{4}\.dat(?:\.gz|\.bz2|\.xz)?$", filename)
     return match.group(1) if match else "Unknown Date"
 
-def detect_increasing_load_patterns(load_data, cpu_cores, min_consecutive=6):
-    threshold_50 = 0.5 * cpu_cores
-    increasing_patterns = []
-    temp_pattern = []
-    tracking = False
+# "Mon Jan 15 10:00:05 UTC 2024", as written by `date` after "zzz ***"
+OSW_TIMESTAMP_PATTERN = re.compile(r"^\s*\w{3}\s+(\w{3})\s+(\d{1,2})\s+(\d{1,2}):(\d{2}):(\d{2})\s+(?:\S+\s+)?(\d{4})\s*$")
+MONTHS = {name: i for i, name in enumerate(calendar.month_abbr) if name}
 
-    for i in range(1, len(load_data)):
-        prev_time, prev_date, prev_load_1m, _, _ = load_data[i - 1]
-        curr_time, curr_date, curr_load_1m, _, _ = load_data[i]
+def parse_osw_timestamp(text):
+    # Epoch seconds of the archive's wall-clock time (the zone name is not
+    # applied), or -1 when the text is not a `date` timestamp.
+    match = OSW_TIMESTAMP_PATTERN.match(text or "")
+    if not match or match.group(1) not in MONTHS:
+        return -1
+    month, day, hour, minute, second, year = match.groups()
+    try:
+        return calendar.timegm((int(year), MONTHS[month], int(day), int(hour), int(minute), int(second)))
+    except ValueError:
+        return -1
+
+def load_epoch(date, hhmmss):
+    # Epoch for an oswtop sample: the date comes from the file name (YY.MM.DD),
+    # the time of day from the "top - HH:MM:SS" line packed as HHMMSS.
+    try:
+        year, month, day = (int(part) for part in date.split("."))
+        return calendar.timegm((2000 + year, month, day, hhmmss // 10000, hhmmss // 100 % 100, hhmmss % 100))
+    except ValueError:
+        return -1
 
-        if curr_load_1m > threshold_50:
-            if not tracking and prev_load_1m > threshold_50:
-                tracking = True
-                temp_pattern = [(prev_time, prev_date, prev_load_1m)]
+def format_hhmmss(hhmmss):
+    return f"{hhmmss // 10000:02d}:{hhmmss // 100 % 100:02d}:{hhmmss % 100:02d}"
 
-            if curr_load_1m > prev_load_1m:
-                temp_pattern.append((curr_time, curr_date, curr_load_1m))
+class TimeSeries:
+    # Samples stored column by column instead of as a list of tuples. Column
+    # kinds: an array typecode ("q", "i", "d", "f") for numbers, "interned"
+    # for low-cardinality strings such as dates and devices (codes into one
+    # label list) and "text" for per-sample strings (one utf-8 buffer plus end
+    # offsets; None is allowed). Numeric columns are exposed as the arrays
+    # themselves, so detectors read them without copying.
+    def __init__(self, schema):
+        self.schema = dict(schema)
+        self.columns = {}
+        self.labels = {}
+        self.label_codes = {}
+        self.nulls = {}
+        for name, kind in self.schema.items():
+            if kind == "interned":
+                self.columns[name] = array("I")
+                self.labels[name] = []
+                self.label_codes[name] = {}
+            elif kind == "text":
+                self.columns[name] = (bytearray(), array("Q"))
+                self.nulls[name] = set()
             else:
-                if len(temp_pattern) >= min_consecutive:
-                    increasing_patterns.append(temp_pattern)
-                temp_pattern = []
-                tracking = False
+                self.columns[name] = array(kind)
+
+    def __len__(self):
+        name, kind = next(iter(self.schema.items()))
+        column = self.columns[name]
+        return len(column[1]) if kind == "text" else len(column)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["label_codes"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.label_codes = {name: {label: i for i, label in enumerate(labels)}
+                            for name, labels in self.labels.items()}
+
+    def intern(self, name, label):
+        codes = self.label_codes[name]
+        code = codes.get(label)
+        if code is None:
+            code = codes[label] = len(codes)
+            self.labels[name].append(sys.intern(label))
+        return code
+
+    def append(self, *row):
+        for (name, kind), value in zip(self.schema.items(), row):
+            column = self.columns[name]
+            if kind == "interned":
+                column.append(self.intern(name, value))
+            elif kind == "text":
+                data, ends = column
+                if value is None:
+                    self.nulls[name].add(len(ends))
+                else:
+                    data += value.encode("utf-8")
+                ends.append(len(data))
+            else:
+                column.append(value)
+
+    def extend(self, other):
+        offset = len(self)
+        for name, kind in self.schema.items():
+            column = self.columns[name]
+            if kind == "interned":
+                remap = [self.intern(name, label) for label in other.labels[name]]
+                column.extend(remap[code] for code in other.columns[name])
+            elif kind == "text":
+                data, ends = column
+                base = len(data)
+                other_data, other_ends = other.columns[name]
+                data += other_data
+                ends.extend(base + end for end in other_ends)
+                self.nulls[name].update(offset + i for i in other.nulls[name])
+            else:
+                column.extend(other.columns[name])
+
+    def column(self, name):
+        return self.columns[name]
+
+    def value(self, name, i):
+        kind = self.schema[name]
+        column = self.columns[name]
+        if kind == "interned":
+            return self.labels[name][column[i]]
+        if kind == "text":
+            if i in self.nulls[name]:
+                return None
+            data, ends = column
+            return data[ends[i - 1] if i else 0:ends[i]].decode("utf-8")
+        return column[i]
+
+    def row(self, i):
+        return tuple(self.value(name, i) for name in self.schema)
+
+    def as_columns(self):
+        # {name: sequence of values} with labels and text decoded, for result
+        # writers; numeric columns are the arrays themselves.
+        columns = {}
+        for name, kind in self.schema.items():
+            if kind == "interned":
+                labels = self.labels[name]
+                columns[name] = [labels[code] for code in self.columns[name]]
+            elif kind == "text":
+                columns[name] = [self.value(name, i) for i in range(len(self))]
+            else:
+                columns[name] = self.columns[name]
+        return columns
+
+    def rows(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+LOAD_SCHEMA = (("epoch", "q"), ("time", "i"), ("date", "interned"),
+               ("load_1m", "d"), ("load_5m", "d"), ("load_15m", "d"))
+MEMORY_SCHEMA = (("epoch", "q"), ("timestamp", "text"), ("used_pct", "d"),
+                 ("used_gb", "d"), ("free_gb", "d"), ("total_kb", "q"))
+VMSTAT_SCHEMA = (("epoch", "q"), ("timestamp", "text"), ("r", "q"), ("b", "q"))
+
+# Parser plugins, keyed by subdirectory. A source declares the columns of its
+# samples (schema), which lines it reads (lines, a bytes regex matched at line
+# starts) and what a line or a finished zzz block adds; reading, scheduling
+# over files, the parse cache and columnar storage are shared by all sources.
+OSW_SOURCES = {}
+
+def register_source(source):
+    OSW_SOURCES[source.name] = source
+    return source
+
+class OswSource:
+    name = None  # subdirectory, also the parse-cache kind
+    schema = ()
+    lines = rb".*"
+
+    def __init_subclass__(cls, **kwargs):
+        # zzz headers always get through. On the mmap path other lines are
+        # skipped without being decoded; the text path applies the same
+        # pattern, so both paths feed identical lines.
+        super().__init_subclass__(**kwargs)
+        body = rb"(?:zzz |" + cls.lines + rb")"
+        cls.line_patterns = compile_line_pattern(body + rb".*")
+        cls.line_filter = re.compile(body.decode())
+
+    def __init__(self):
+        self.samples = TimeSeries(self.schema)
+        self.timestamp = None
+        self.epoch = -1
+        self.rejected = 0
+
+    @classmethod
+    def parse(cls, filepath, span=None):
+        # Per-file parser for map_osw_files(): a TimeSeries of cls.schema.
+        with profile_stage(f"parse {cls.name}"):
+            source = cls()
+            with mmap_osw_file(filepath, span) as view:
+                if view is not None:
+                    for match in iter_line_matches(cls.line_patterns, *view):
+                        source.feed(match.group().lstrip(b"\n").decode())
+            if view is None:
+                for line in iter_osw_lines(filepath, span):
+                    if cls.line_filter.match(line):
+                        source.feed(line)
+            profile_count(samples=len(source.samples), rejected=source.rejected)
+            return source.samples
+
+    def feed(self, line):
+        if line.startswith("zzz "):
+            self.end_block()
+            self.timestamp = line.strip().replace("zzz ", "").replace("***", "")
+            self.epoch = parse_osw_timestamp(self.timestamp)
+        else:
+            self.parse_line(line)
+
+    def parse_line(self, line):
+        pass
+
+    def end_block(self):
+        # Called when the next zzz header arrives, so a block still being
+        # written at the end of a file is never used.
+        pass
+
+class TableSource(OswSource):
+    # Command output with a header row naming the columns, then data rows
+    # (mpstat, ps). `fields` maps schema columns to the header names they
+    # may appear under; positions come from the latest header, so versions
+    # that add, drop or rename columns parse alike. A header row contains
+    # `key` and no plain number; optional fields it lacks are None. Lines
+    # before the first header are ignored, rows under a header without the
+    # required fields are rejected.
+    key = None
+    fields = {}
+    required = ()
+
+    def __init__(self):
+        super().__init__()
+        self.positions = None
+
+    def parse_line(self, line):
+        columns = line.split()
+        if not columns or self.positions is None and self.key not in columns:
+            return
+        if self.key in columns and not any(column.isdigit() for column in columns):
+            self.read_header(columns)
+        elif not self.positions:
+            self.rejected += 1
+        else:
+            try:
+                self.add_row(columns)
+            except (IndexError, ValueError):
+                self.rejected += 1
+
+    def read_header(self, columns):
+        positions = {field: next((columns.index(name) for name in names if name in columns), None)
+                     for field, names in self.fields.items()}
+        usable = all(positions[field] is not None for field in self.required)
+        self.positions = positions if usable else {}
+
+    def add_row(self, columns):
+        raise NotImplementedError
+
+def map_source_files(name, directory, jobs=1, window=None):
+    source = OSW_SOURCES[name]
+    return map_osw_files(source.parse, directory, jobs, source.name, window)
+
+def file_hour_epoch(filename):
+    # Start of the hour an OSWatcher file covers (..._YY.MM.DD.HH00.dat), or None.
+    match = re.search(r"_(\d{2})\.(\d{2})\.(\d{2})\.(\d{2})00\.dat(?:\.gz|\.bz2|\.xz)?$", filename)
+    if not match:
+        return None
+    year, month, day, hour = (int(part) for part in match.groups())
+    return calendar.timegm((2000 + year, month, day, hour, 0, 0))
+
+def build_zzz_index(filepath):
+    # [(epoch, offset, header_length), ...] for every "zzz" header line, with
+    # offsets into the uncompressed bytes of the file.
+    index = []
+    offset = 0
+    try:
+        with open_osw_binary(filepath) as f:
+            for line in f:
+                if line.startswith(b"zzz "):
+                    timestamp = line.decode("utf-8", "ignore").strip().replace("zzz ", "").replace("***", "")
+                    index.append((parse_osw_timestamp(timestamp), offset, len(line)))
+                offset += len(line)
+    except OSW_READ_ERRORS as e:
+        print(f"❌ Error indexing {os.path.basename(filepath)}: {e}", file=sys.stderr)
+    return index
+
+def zzz_index(filepath):
+    if parse_cache:
+        index = parse_cache.get("zzzindex", filepath)
+        if index is not CACHE_MISS:
+            return index
+    index = build_zzz_index(filepath)
+    if parse_cache:
+        parse_cache.put("zzzindex", filepath, index)
+    return index
+
+def format_epoch(epoch):
+    if epoch is None or epoch < 0:
+        return "…"
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def parse_time_arg(text):
+    # "2024-01-15 10:00", "2024-01-15T10:00:30" or "2024-01-15", in the
+    # archive's wall-clock time like the zzz timestamps.
+    try:
+        return calendar.timegm(datetime.datetime.fromisoformat(text.strip()).timetuple())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time '{text}', expected e.g. 2024-01-15 10:00")
+
+class TimeWindow:
+    # Inclusive [start, end] range of zzz block timestamps; either end may be
+    # None for an open range.
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
+    def __str__(self):
+        return f"{format_epoch(self.start)} → {format_epoch(self.end)}"
+
+    def file_coverage(self, filename):
+        # "inside", "outside" or "partial", judged from the file-name hour.
+        hour = file_hour_epoch(filename)
+        if hour is None:
+            return "partial"
+        if (self.end is not None and hour > self.end) or (self.start is not None and hour + 3600 <= self.start):
+            return "outside"
+        if (self.start is None or hour >= self.start) and (self.end is None or hour + 3599 <= self.end):
+            return "inside"
+        return "partial"
+
+    def span(self, index):
+        # Byte span from the first in-window block up to and including the
+        # header of the first block after the window, so block-at-a-time
+        # parsers still close the last in-window block. None if no block fits.
+        first = next((i for i, (epoch, _, _) in enumerate(index)
+                      if epoch >= 0 and (self.start is None or epoch >= self.start)), None)
+        if first is None or (self.end is not None and index[first][0] > self.end):
+            return None
+        for epoch, offset, header_length in index[first + 1:]:
+            if self.end is not None and epoch > self.end:
+                return index[first][1], offset + header_length
+        return index[first][1], None
+
+# Trend engine shared by the load and memory detectors; works on any metric
+# series (vmstat r, iostat %util, ...). Both functions return runs as
+# sequences of indexes into values.
+
+@profiled("detect trends")
+def find_rising_runs(values, threshold, min_run=6):
+    # Strictly increasing runs whose samples all stay above threshold. A run
+    # that ends by flattening or falling while still above threshold, or at
+    # the end of the data, is reported; one cut short by a sample dropping to
+    # or below threshold is not.
+    if min_run < 2:
+        raise ValueError("min_run must be at least 2")
+    if np is not None:
+        return find_rising_runs_numpy(values, threshold, min_run)
+
+    runs = []
+    start = None
+    for i in range(1, len(values)):
+        if values[i] > threshold:
+            if start is None and values[i - 1] > threshold:
+                start = i - 1
+            if start is not None and values[i] <= values[i - 1]:
+                if i - start >= min_run:
+                    runs.append(range(start, i))
+                start = None
+        else:
+            start = None
+    if start is not None and len(values) - start >= min_run:
+        runs.append(range(start, len(values)))
+    return runs
+
+def as_float64(values):
+    # TimeSeries float columns are array("d"); view them without copying.
+    if isinstance(values, array) and values.typecode == "d":
+        return np.frombuffer(values, dtype=np.float64) if len(values) else np.empty(0)
+    return np.asarray(values, dtype=np.float64)
+
+def find_rising_runs_numpy(values, threshold, min_run):
+    v = as_float64(values)
+    if len(v) < 2:
+        return []
+    above = v > threshold
+    # step[i - 1]: sample i extends the run ending at sample i - 1
+    step = above[1:] & above[:-1] & (v[1:] > v[:-1])
+    starts = np.flatnonzero(above & ~np.concatenate(([False], step)))
+    ends = np.flatnonzero(above & ~np.concatenate((step, [False])))
+    # Runs ending in a drop to/below threshold are discarded.
+    keep = (ends - starts + 1 >= min_run) & ((ends == len(v) - 1) | above[np.minimum(ends + 1, len(v) - 1)])
+    return [range(start, end + 1) for start, end in zip(starts[keep].tolist(), ends[keep].tolist())]
+
+@profiled("detect trends")
+def find_falling_runs(values, threshold, min_run=6):
+    # A run starts at a sample above threshold and follows the strictly
+    # decreasing stretch that begins at the sample after it. That next sample
+    # is only compared, never reported, and later samples need not stay above
+    # threshold; this is how the report has always counted decreasing runs.
+    if min_run < 1:
+        raise ValueError("min_run must be at least 1")
+    if np is not None:
+        return find_falling_runs_numpy(values, threshold, min_run)
+
+    runs = []
+    run = None
+    for i in range(len(values) - 1):
+        if run is None:
+            if values[i] > threshold:
+                run = [i]
+        elif values[i + 1] < values[i]:
+            run.append(i + 1)
         else:
-            tracking = False
-            temp_pattern = []
+            if len(run) >= min_run:
+                runs.append(run)
+            run = None
+    if run is not None and len(run) >= min_run:
+        runs.append(run)
+    return runs
+
+def find_falling_runs_numpy(values, threshold, min_run):
+    v = as_float64(values)
+    n = len(v)
+    if n < 2:
+        return []
+    # Candidate starts (the last sample can never start a run) and the
+    # positions k where v[k + 1] >= v[k] end a run.
+    is_candidate = np.append(v[:-1] > threshold, False)
+    is_break = np.append(v[1:] >= v[:-1], False)
+    candidates = np.flatnonzero(is_candidate)
+    if not len(candidates):
+        return []
+    m = len(candidates)
+    # A run started at candidate c ends at the first break after c (the
+    # comparison at c itself is skipped) or at the last sample; the next run
+    # starts at the first candidate after that end.
+    next_break = np.minimum.accumulate(np.where(is_break, np.arange(n), n - 1)[::-1])[::-1]
+    ends = next_break[candidates + 1]
+    candidates_before = np.concatenate(([0], np.cumsum(is_candidate)))
+    jump = np.where(ends < n - 1, candidates_before[ends + 1], m)
+    jump = np.append(jump, m)
+
+    # Mark the chain of starts reachable from the first candidate by pointer
+    # doubling: after round k every start within 2**k hops is marked.
+    is_start = np.zeros(m + 1, dtype=bool)
+    is_start[0] = True
+    while True:
+        reached = jump[np.flatnonzero(is_start)]
+        if (reached == m).all():
+            break
+        is_start[reached] = True
+        jump = jump[jump]
 
-    if len(temp_pattern) >= min_consecutive:
-        increasing_patterns.append(temp_pattern)
+    starts = candidates[is_start[:m]]
+    ends = ends[is_start[:m]]
+    keep = ends - starts >= min_run
+    return [[start] + list(range(start + 2, end + 1))
+            for start, end in zip(starts[keep].tolist(), ends[keep].tolist())]
+
+def record_columns(names, records):
+    records = list(records)
+    return {name: [record[i] for record in records] for i, name in enumerate(names)}
+
+def pattern_columns(series, column, patterns):
+    # Result rows for detected runs: patterns is [(kind, range), ...].
+    values = series.column(column)
+    epochs = series.column("epoch")
+    return {
+        "kind": [kind for kind, _ in patterns],
+        "start_epoch": [epochs[run[0]] for _, run in patterns],
+        "end_epoch": [epochs[run[-1]] for _, run in patterns],
+        "samples": [len(run) for _, run in patterns],
+        "start_value": [values[run[0]] for _, run in patterns],
+        "end_value": [values[run[-1]] for _, run in patterns],
+        "peak_value": [max(values[i] for i in run) for _, run in patterns],
+    }
+
+def print_load_pattern(load_data, pattern):
+    times = load_data.column("time")
+    loads = load_data.column("load_1m")
+    for i in pattern:
+        print(f"  [{load_data.value('date', i)} {format_hhmmss(times[i])}] Load: {loads[i]:.2f}")
+    print("-" * 40)
+
+def detect_increasing_load_patterns(load_data, cpu_cores, min_consecutive=6):
+    threshold_50 = 0.5 * cpu_cores
+    increasing_patterns = find_rising_runs(load_data.column("load_1m"), threshold_50, min_consecutive)
 
     if increasing_patterns:
         print("\n=== 📈 Detected Increasing Load Average Patterns (5+ consecutive) ===")
         for pattern in increasing_patterns:
             print("📈 Pattern Detected:")
-            for time_val, date_val, load in pattern:
-                print(f"  [{date_val} {time_val}] Load: {load:.2f}")
-            print("-" * 40)
+            print_load_pattern(load_data, pattern)
+    return increasing_patterns
 
 def detect_decreasing_load_patterns(load_data, cpu_cores, min_consecutive=6):
     threshold_75 = 0.75 * cpu_cores
-    decreasing_patterns = []
-    temp_pattern = []
-    tracking = False
-
-    for i in range(len(load_data) - 1):
-        curr_time, curr_date, curr_load_1m, _, _ = load_data[i]
-        next_time, next_date, next_load_1m, _, _ = load_data[i + 1]
-
-        if not tracking:
-            if curr_load_1m > threshold_75:
-                tracking = True
-                temp_pattern = [(curr_time, curr_date, curr_load_1m)]
-        else:
-            if next_load_1m < curr_load_1m:
-                temp_pattern.append((next_time, next_date, next_load_1m))
-            else:
-                if len(temp_pattern) >= min_consecutive:
-                    decreasing_patterns.append(temp_pattern)
-                temp_pattern = []
-                tracking = False
-
-    if len(temp_pattern) >= min_consecutive:
-        decreasing_patterns.append(temp_pattern)
+    decreasing_patterns = find_falling_runs(load_data.column("load_1m"), threshold_75, min_consecutive)
 
     if decreasing_patterns:
         print("\n=== 📉 Detected Decreasing Load Average Patterns (6+ consecutive) ===")
         for pattern in decreasing_patterns:
             print("📉 Decreasing Pattern Detected:")
-            for time_val, date_val, load in pattern:
-                print(f"  [{date_val} {time_val}] Load: {load:.2f}")
-            print("-" * 40)
+            print_load_pattern(load_data, pattern)
     else:
         print("\n✅ No significant decreasing load average patterns detected.")
+    return decreasing_patterns
 
-def process_oswtop_files(directory, cpu_cores, threshold_75):
-    pattern = re.compile(r"^top - (\d{2}:\d{2}:\d{2}) .*load average: ([\d.]+), ([\d.]+), ([\d.]+)")
+OSWTOP_LOAD_PATTERN = re.compile(r"^top - (\d{2}:\d{2}:\d{2}) .*load average: ([\d.]+), ([\d.]+), ([\d.]+)")
 
-    highest = None
-    lowest = None
-    load_data = []
-
-    print(f"\n========📊 Analyzing Server instances where CPU crossed 75%+ usage=============\n")
-    
-    print(f"\n The total cpu cores : {cpu_cores}\n")
-    for filename in sorted(os.listdir(directory)):
-        if filename.endswith(".dat"):
-            filepath = os.path.join(directory, filename)
-            date = extract_date_from_filename(filename)
-
-            with open(filepath, "r", encoding="utf-8", errors="ignore") as file:
-                for line in file:
-                    match = pattern.search(line)
-                    if match:
-                        timestamp, load_avg_1, load_avg_5, load_avg_15 = match.groups()
-                        load_avg_1 = float(load_avg_1)
-                        load_avg_5 = float(load_avg_5)
-                        load_avg_15 = float(load_avg_15)
-                        load_data.append((timestamp, date, load_avg_1, load_avg_5, load_avg_15))
-
-                        if load_avg_1 > threshold_75:
-                            print(f"{filename} - {timestamp} | Load Avg (1m: {load_avg_1}, 5m: {load_avg_5}, 15m: {load_avg_15})")
-
-                        if highest is None or load_avg_1 > highest[0]:
-                            highest = (load_avg_1, timestamp, date, filename)
-                        if lowest is None or load_avg_1 < lowest[0]:
-                            lowest = (load_avg_1, timestamp, date, filename)
+# Pattern to match process lines
+OSWTOP_PROCESS_PATTERN = re.compile(
+    r'^\s*(\d+)\s+(\S+)\s+\d+\s+\S+\s+\S+\s+\S+\s+\S+\s+([RSDZTW])\s+([\d.]+)\s+([\d.]+)\s+[\d:.]+\s+(.+)$'
+)
 
-    if highest:
-        print(f"\n=======🔺 Peak Load Summary 🔺 =======\n"
-              f"Filename: {highest[3]}\nDate: {highest[2]}\nTime: {highest[1]}\nPeak Load Avg: {highest[0]}\n")
+# Multiline bytes equivalents of the per-line oswtop checks, so the mmap path
+# can find headers, load lines and process rows with one regex scan.
+OSWTOP_EVENTS_BYTES = compile_line_pattern(
+    rb"top - (\d{2}:\d{2}:\d{2}) .*load average: ([\d.]+), ([\d.]+), ([\d.]+)"
+    rb"|[ \t\v\f]*zzz \*\*\*(.*)")
+OSWTOP_PROCESS_BYTES = (
+    rb"[ \t\v\f]*(\d+)[ \t\v\f]+(\S+)[ \t\v\f]+\d+[ \t\v\f]+\S+[ \t\v\f]+\S+[ \t\v\f]+\S+[ \t\v\f]+\S+"
+    rb"[ \t\v\f]+([RSDZTW])[ \t\v\f]+([\d.]+)[ \t\v\f]+([\d.]+)[ \t\v\f]+[\d:.]+[ \t\v\f]+(.*\S)")
+OSWTOP_EVENTS_WITH_PROCESSES_BYTES = compile_line_pattern(
+    rb"top - (\d{2}:\d{2}:\d{2}) .*load average: ([\d.]+), ([\d.]+), ([\d.]+)"
+    rb"|[ \t\v\f]*zzz \*\*\*(.*)"
+    rb"|top - "
+    rb"|" + OSWTOP_PROCESS_BYTES)
 
-    if lowest:
-        print(f"\n======= 🔻 Lowest Load Summary 🔻 =======\n"
-              f"Filename: {lowest[3]}\nDate: {lowest[2]}\nTime: {lowest[1]}\nLowest Load Avg: {lowest[0]}\n")
+def compile_state_filter(states):
+    # (candidate, row) patterns for process rows in the given states. The
+    # candidate pattern finds the state column without parsing the row; only
+    # lines it hits are matched against the full row pattern.
+    states = states.encode()
+    return (re.compile(rb"[ \t\v\f][" + states + rb"][ \t\v\f]"),
+            re.compile(OSWTOP_PROCESS_BYTES.replace(b"RSDZTW", states)))
 
-    detect_increasing_load_patterns(load_data, cpu_cores, min_consecutive=6)
-    detect_decreasing_load_patterns(load_data, cpu_cores, min_consecutive=6)
+class OswtopConsumer:
+    # An analysis fed by scan_oswtop(). The per-file hooks (start_file, on_*,
+    # end_file) run on a fresh instance wherever the file is parsed, possibly
+    # in a worker process; merge() and report() run on the registered
+    # instance, in filename order. process_states limits on_process() to rows
+    # in those states (e.g. "D"); None means every row.
+    needs_processes = False
+    process_states = None
 
-def detect_increasing_memory_patterns(mem_data, min_consecutive=6):
-    pattern = []
-    tracking = False
-    increasing_patterns = []
+    def start_file(self, filename):
+        pass
+
+    def on_snapshot(self, timestamp):
+        pass
+
+    def on_load(self, timestamp, load_avg_1, load_avg_5, load_avg_15):
+        pass
 
-    for i in range(1, len(mem_data)):
-        prev = mem_data[i - 1]
-        curr = mem_data[i]
+    def on_process(self, pid, user, state, cpu, mem, cmd):
+        pass
 
-        if curr[1] > 50:
-            if not tracking and prev[1] > 50:
-                tracking = True
-                pattern = [prev]
+    def end_file(self):
+        return None
 
-            if curr[1] > prev[1]:
-                pattern.append(curr)
+    def merge(self, partial):
+        pass
+
+    def report(self):
+        pass
+
+def wanted_process_states(process_consumers):
+    states = set()
+    for consumer in process_consumers:
+        if consumer.process_states is None:
+            return None
+        states.update(consumer.process_states)
+    return "".join(sorted(states))
+
+@profiled("parse oswtop")
+def scan_oswtop_file(filepath, consumer_types, span=None):
+    consumers = [consumer_type() for consumer_type in consumer_types]
+    process_consumers = [c for c in consumers if c.needs_processes]
+    states = wanted_process_states(process_consumers)
+    filename = os.path.basename(filepath)
+    for consumer in consumers:
+        consumer.start_file(filename)
+
+    with mmap_osw_file(filepath, span) as view:
+        if view is not None:
+            if process_consumers and states is not None:
+                loads, rows = scan_oswtop_states_bytes(view, consumers, process_consumers, states)
             else:
-                if len(pattern) >= min_consecutive:
-                    increasing_patterns.append(pattern)
-                pattern = []
-                tracking = False
+                loads, rows = scan_oswtop_bytes(view, consumers, process_consumers)
+            if profiler:
+                # "top - " lines without a parsable load average
+                rejected = count_line_starts(*view, b"top - ") - loads
+                profile_count(samples=loads + rows, rejected=rejected)
+            return [consumer.end_file() for consumer in consumers]
+
+    loads = rows = rejected = 0
+    for line in iter_osw_lines(filepath, span):
+        if line.startswith("top - "):
+            match = OSWTOP_LOAD_PATTERN.search(line)
+            if match:
+                timestamp, load_avg_1, load_avg_5, load_avg_15 = match.groups()
+                load_avg_1 = float(load_avg_1)
+                load_avg_5 = float(load_avg_5)
+                load_avg_15 = float(load_avg_15)
+                loads += 1
+                for consumer in consumers:
+                    consumer.on_load(timestamp, load_avg_1, load_avg_5, load_avg_15)
+            else:
+                rejected += 1
+            continue
+
+        line = line.strip()
+        if line.startswith("zzz ***"):
+            for consumer in consumers:
+                consumer.on_snapshot(line[7:])
+            continue
+
+        if process_consumers:
+            # Rows in other states cannot contain the wanted state letters.
+            if states is not None and not any(state in line for state in states):
+                continue
+            match = OSWTOP_PROCESS_PATTERN.match(line)
+            if match and (states is None or match.group(3) in states):
+                pid, user, state, cpu, mem, cmd = match.groups()
+                cpu = float(cpu)
+                mem = float(mem)
+                rows += 1
+                for consumer in process_consumers:
+                    consumer.on_process(pid, user, state, cpu, mem, cmd)
+
+    profile_count(samples=loads + rows, rejected=rejected)
+    return [consumer.end_file() for consumer in consumers]
+
+def scan_oswtop_bytes(view, consumers, process_consumers):
+    # Fast path of scan_oswtop_file(): only matched fields are decoded.
+    # Returns the number of load lines and process rows passed on.
+    buffer, start, stop = view
+    pattern = OSWTOP_EVENTS_WITH_PROCESSES_BYTES if process_consumers else OSWTOP_EVENTS_BYTES
+    loads = rows = 0
+    for match in iter_line_matches(pattern, buffer, start, stop):
+        # lastindex tells the alternatives apart: 4 load, 5 zzz, 11 process.
+        kind = match.lastindex
+        if kind == 4:
+            timestamp, load_avg_1, load_avg_5, load_avg_15 = match.groups()[:4]
+            timestamp = timestamp.decode()
+            load_avg_1 = float(load_avg_1)
+            load_avg_5 = float(load_avg_5)
+            load_avg_15 = float(load_avg_15)
+            loads += 1
+            for consumer in consumers:
+                consumer.on_load(timestamp, load_avg_1, load_avg_5, load_avg_15)
+        elif kind == 5:
+            header = match.group(5).rstrip().decode()
+            for consumer in consumers:
+                consumer.on_snapshot(header)
+        elif kind == 11:
+            pid, user, state, cpu, mem, cmd = match.groups()[5:]
+            pid = pid.decode()
+            user = user.decode()
+            state = state.decode()
+            cpu = float(cpu)
+            mem = float(mem)
+            cmd = cmd.decode()
+            rows += 1
+            for consumer in process_consumers:
+                consumer.on_process(pid, user, state, cpu, mem, cmd)
+    return loads, rows
+
+def scan_oswtop_states_bytes(view, consumers, process_consumers, states):
+    # Like scan_oswtop_bytes(), but process rows are located through their
+    # state column, so rows in other states are never parsed.
+    buffer, start, stop = view
+    candidates, process_row = compile_state_filter(states)
+    events = iter_line_matches(OSWTOP_EVENTS_BYTES, buffer, start, stop)
+    last_line_start = -1
+    loads = rows = 0
+    for match in heapq.merge(events, candidates.finditer(buffer, start, stop), key=lambda m: m.start()):
+        if match.re is not candidates:
+            if match.lastindex == 4:
+                timestamp, load_avg_1, load_avg_5, load_avg_15 = match.groups()[:4]
+                timestamp = timestamp.decode()
+                load_avg_1 = float(load_avg_1)
+                load_avg_5 = float(load_avg_5)
+                load_avg_15 = float(load_avg_15)
+                loads += 1
+                for consumer in consumers:
+                    consumer.on_load(timestamp, load_avg_1, load_avg_5, load_avg_15)
+            else:
+                header = match.group(5).rstrip().decode()
+                for consumer in consumers:
+                    consumer.on_snapshot(header)
+            continue
+
+        newline = buffer.rfind(b"\n", start, match.start())
+        line_start = newline + 1 if newline >= 0 else start
+        if line_start == last_line_start:
+            continue
+        last_line_start = line_start
+        line_end = buffer.find(b"\n", match.start(), stop)
+        row = process_row.match(buffer, line_start, stop if line_end < 0 else line_end)
+        if row:
+            pid, user, state, cpu, mem, cmd = row.groups()
+            pid = pid.decode()
+            user = user.decode()
+            state = state.decode()
+            cpu = float(cpu)
+            mem = float(mem)
+            cmd = cmd.decode()
+            rows += 1
+            for consumer in process_consumers:
+                consumer.on_process(pid, user, state, cpu, mem, cmd)
+    return loads, rows
+
+def scan_oswtop(directory, consumers, jobs=1, window=None):
+    # One pass over oswtop regardless of how many analyses are registered.
+    # Partials of whole files are cached per consumer, so a file is only
+    # rescanned for the consumers that have no cached result for it.
+    consumer_types = tuple(type(consumer) for consumer in consumers)
+    kinds = ["oswtop." + consumer_type.__name__ for consumer_type in consumer_types]
+    selected = select_osw_files(directory, window)
+
+    cached = []
+    for path, span in selected:
+        if parse_cache and span is None:
+            cached.append([parse_cache.get(kind, path) for kind in kinds])
         else:
-            pattern = []
-            tracking = False
+            cached.append([CACHE_MISS] * len(kinds))
+
+    todo = []
+    for (path, span), file_cached in zip(selected, cached):
+        missing_types = tuple(t for t, value in zip(consumer_types, file_cached) if value is CACHE_MISS)
+        if missing_types:
+            todo.append((path, missing_types, span))
+
+    if todo:
+        paths, types, spans = zip(*todo)
+        scanned = parallel_map(scan_oswtop_file, preload_osw_files(paths), types, spans, jobs=jobs)
+    else:
+        scanned = iter(())
+    for (path, span), file_cached in zip(selected, cached):
+        if CACHE_MISS in file_cached:
+            fresh = iter(next(scanned))
+            for i, value in enumerate(file_cached):
+                if value is CACHE_MISS:
+                    file_cached[i] = next(fresh)
+                    if parse_cache and span is None:
+                        parse_cache.put(kinds[i], path, file_cached[i])
+        for consumer, partial in zip(consumers, file_cached):
+            consumer.merge(partial)
+    if parse_cache:
+        parse_cache.evict()
+
+class OswtopLoadConsumer(OswtopConsumer):
+    def __init__(self, cpu_cores=None, threshold_75=None):
+        self.cpu_cores = cpu_cores
+        self.threshold_75 = threshold_75
+        self.files = []
+
+    def start_file(self, filename):
+        self.filename = filename
+        self.date = extract_date_from_filename(filename)
+        self.samples = TimeSeries(LOAD_SCHEMA)
 
-    if len(pattern) >= min_consecutive:
-        increasing_patterns.append(pattern)
+    def on_load(self, timestamp, load_avg_1, load_avg_5, load_avg_15):
+        hhmmss = int(timestamp.replace(":", ""))
+        self.samples.append(load_epoch(self.date, hhmmss), hhmmss, self.date, load_avg_1, load_avg_5, load_avg_15)
+
+    def end_file(self):
+        return self.filename, self.samples
+
+    def merge(self, partial):
+        self.files.append(partial)
+
+    def report(self, results=None):
+        cpu_cores = self.cpu_cores
+        threshold_75 = self.threshold_75
+        text = results is None or results.text
+        highest = None
+        lowest = None
+        load_data = TimeSeries(LOAD_SCHEMA)
+        findings = 0
+
+        print(f"\n========📊 Analyzing Server instances where CPU crossed 75%+ usage=============\n")
+        
+        print(f"\n The total cpu cores : {cpu_cores}\n")
+        for filename, samples in self.files:
+            load_data.extend(samples)
+            if results:
+                columns = samples.as_columns()
+                results.write("cpu_load", {
+                    "epoch": columns["epoch"], "file": [filename] * len(samples), "date": columns["date"],
+                    "time": [format_hhmmss(hhmmss) for hhmmss in columns["time"]],
+                    "load_1m": columns["load_1m"], "load_5m": columns["load_5m"], "load_15m": columns["load_15m"],
+                    "above_75": [load > threshold_75 for load in columns["load_1m"]]})
+            for _, hhmmss, date, load_avg_1, load_avg_5, load_avg_15 in samples.rows():
+                timestamp = format_hhmmss(hhmmss)
+
+                if load_avg_1 > threshold_75:
+                    findings += 1
+                    if text:
+                        print(f"{filename} - {timestamp} | Load Avg (1m: {load_avg_1}, 5m: {load_avg_5}, 15m: {load_avg_15})")
+
+                if highest is None or load_avg_1 > highest[0]:
+                    highest = (load_avg_1, timestamp, date, filename)
+                if lowest is None or load_avg_1 < lowest[0]:
+                    lowest = (load_avg_1, timestamp, date, filename)
+
+        if highest:
+            print(f"\n=======🔺 Peak Load Summary 🔺 =======\n"
+                  f"Filename: {highest[3]}\nDate: {highest[2]}\nTime: {highest[1]}\nPeak Load Avg: {highest[0]}\n")
+
+        if lowest:
+            print(f"\n======= 🔻 Lowest Load Summary 🔻 =======\n"
+                  f"Filename: {lowest[3]}\nDate: {lowest[2]}\nTime: {lowest[1]}\nLowest Load Avg: {lowest[0]}\n")
+
+        increasing = detect_increasing_load_patterns(load_data, cpu_cores, min_consecutive=6)
+        decreasing = detect_decreasing_load_patterns(load_data, cpu_cores, min_consecutive=6)
+        if results:
+            results.write("cpu_patterns", pattern_columns(
+                load_data, "load_1m", [("increasing", run) for run in increasing] + [("decreasing", run) for run in decreasing]))
+        return findings
+
+def process_oswtop_files(directory, cpu_cores, threshold_75, jobs=1, window=None, results=None):
+    consumer = OswtopLoadConsumer(cpu_cores, threshold_75)
+    scan_oswtop(directory, [consumer], jobs, window)
+    return consumer.report(results)
+
+def print_memory_pattern(mem_data, pattern):
+    for i in pattern:
+        _, ts, used_pct, used_gb, free_gb, _ = mem_data.row(i)
+        print(f"  [{ts}] Used: {used_pct:.2f}% ({used_gb:.2f} GB), Free: {free_gb:.2f} GB")
+    print("-" * 40)
+
+def detect_increasing_memory_patterns(mem_data, min_consecutive=6):
+    increasing_patterns = find_rising_runs(mem_data.column("used_pct"), 50, min_consecutive)
 
     if increasing_patterns:
         print("\n=== 📈 Detected Increasing Memory Usage Patterns (5+ consecutive) ===")
         for p in increasing_patterns:
             print("📈 Pattern Detected:")
-            for entry in p:
-                ts, used_pct, used_gb, free_gb = entry
-                print(f"  [{ts}] Used: {used_pct:.2f}% ({used_gb:.2f} GB), Free: {free_gb:.2f} GB")
-            print("-" * 40)
+            print_memory_pattern(mem_data, p)
+    return increasing_patterns
 
 def detect_decreasing_memory_patterns(mem_data, min_consecutive=6):
-    pattern = []
-    tracking = False
-    decreasing_patterns = []
-
-    for i in range(len(mem_data) - 1):
-        curr = mem_data[i]
-        next_ = mem_data[i + 1]
-
-        if not tracking:
-            if curr[1] > 75:
-                tracking = True
-                pattern = [curr]
-        else:
-            if next_[1] < curr[1]:
-                pattern.append(next_)
-            else:
-                if len(pattern) >= min_consecutive:
-                    decreasing_patterns.append(pattern)
-                pattern = []
-                tracking = False
-
-    if len(pattern) >= min_consecutive:
-        decreasing_patterns.append(pattern)
+    decreasing_patterns = find_falling_runs(mem_data.column("used_pct"), 75, min_consecutive)
 
     if decreasing_patterns:
         print("\n=== 📉 Detected Decreasing Memory Usage Patterns (6+ consecutive) ===")
         for p in decreasing_patterns:
             print("📉 Pattern Detected:")
-            for entry in p:
-                ts, used_pct, used_gb, free_gb = entry
-                print(f"  [{ts}] Used: {used_pct:.2f}% ({used_gb:.2f} GB), Free: {free_gb:.2f} GB")
-            print("-" * 40)
+            print_memory_pattern(mem_data, p)
     else:
         print("\n✅ No significant decreasing memory usage patterns detected.")
+    return decreasing_patterns
+
+MEMINFO_KEYS = ("MemTotal", "MemFree", "Buffers", "Cached")
+
+@register_source
+class MeminfoSource(OswSource):
+    # One sample per /proc/meminfo block; buffers and page cache count as free.
+    name = "oswmeminfo"
+    schema = MEMORY_SCHEMA
+    lines = rb"[ \t\v\f]*(?:MemTotal|MemFree|Buffers|Cached):"
+
+    def __init__(self):
+        super().__init__()
+        self.values = {}
+
+    def parse_line(self, line):
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].endswith(":"):
+            key = parts[0].rstrip(":")
+            if key in MEMINFO_KEYS:
+                self.values[key] = parts[1]
+
+    def end_block(self):
+        if self.values:
+            try:
+                total = int(self.values["MemTotal"])
+                free = int(self.values["MemFree"])
+                buffers = int(self.values["Buffers"])
+                cached = int(self.values["Cached"])
+
+                free_mem_kb = free + buffers + cached
+                used_mem_kb = total - free_mem_kb
+                used_pct = (used_mem_kb / total) * 100
+
+                self.samples.append(self.epoch, self.timestamp, used_pct,
+                                    used_mem_kb / (1024 * 1024), free_mem_kb / (1024 * 1024), total)
+            except KeyError:
+                self.rejected += 1
+        self.values = {}
 
-def process_oswmeminfo_files(meminfo_dir):
+def process_oswmeminfo_files(meminfo_dir, jobs=1, window=None, mem_total_kb=None, results=None):
     print("\n========🧠 Analyzing Memory Usage above 75%=========\n")
-    #unzip_gz_files(meminfo_dir)
+    text = results is None or results.text
 
     highest = None
     lowest = None
-    total_gb = None
     printed_total = False
-    mem_data = []
+    if mem_total_kb:
+        print(f"💾 Total Memory on Server: {mem_total_kb / (1024 * 1024):.2f} GB\n")
+        printed_total = True
+    mem_data = TimeSeries(MEMORY_SCHEMA)
+    findings = 0
 
-    for filename in sorted(os.listdir(meminfo_dir)):
-        if filename.endswith(".dat"):
-            filepath = os.path.join(meminfo_dir, filename)
-            with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                timestamp = None
-                values = {}
+    for samples in map_source_files("oswmeminfo", meminfo_dir, jobs, window):
+        mem_data.extend(samples)
+        if results:
+            columns = samples.as_columns()
+            columns["above_75"] = [used_pct > 75 for used_pct in columns["used_pct"]]
+            results.write("memory_samples", columns)
+        for _, timestamp, used_pct, used_gb, free_gb, total in samples.rows():
+            free_pct = 100 - used_pct
 
-                for line in f:
-                    if line.startswith("zzz "):
-                        if values:
-                            try:
-                                total = int(values["MemTotal"])
-                                free = int(values["MemFree"])
-                                buffers = int(values["Buffers"])
-                                cached = int(values["Cached"])
-
-                                free_mem_kb = free + buffers + cached
-                                used_mem_kb = total - free_mem_kb
-                                used_pct = (used_mem_kb / total) * 100
-                                free_pct = 100 - used_pct
-
-                                total_gb = total / (1024 * 1024)
-                                used_gb = used_mem_kb / (1024 * 1024)
-                                free_gb = free_mem_kb / (1024 * 1024)
-
-                                if not printed_total:
-                                    print(f"💾 Total Memory on Server: {total_gb:.2f} GB\n")
-                                    printed_total = True
-
-                                if used_pct > 75:
-                                    print(f"{timestamp} | Used: {used_pct:.2f}% ({used_gb:.2f} GB), Free: {free_pct:.2f}% ({free_gb:.2f} GB)")
-
-                                mem_data.append((timestamp, used_pct, used_gb, free_gb))
-
-                                if highest is None or used_pct > highest[0]:
-                                    highest = (used_pct, timestamp, used_gb, free_gb)
-                                if lowest is None or used_pct < lowest[0]:
-                                    lowest = (used_pct, timestamp, used_gb, free_gb)
-
-                            except KeyError:
-                                pass
-
-                        values = {}
-                        timestamp = line.strip().replace("zzz ", "").replace("***", "")
-
-                    else:
-                        parts = line.split()
-                        if len(parts) >= 2 and parts[0].endswith(":"):
-                            key = parts[0].rstrip(":")
-                            val = parts[1]
-                            if key in ["MemTotal", "MemFree", "Buffers", "Cached"]:
-                                values[key] = val
+            if not printed_total:
+                total_gb = total / (1024 * 1024)
+                print(f"💾 Total Memory on Server: {total_gb:.2f} GB\n")
+                printed_total = True
+
+            if used_pct > 75:
+                findings += 1
+                if text:
+                    print(f"{timestamp} | Used: {used_pct:.2f}% ({used_gb:.2f} GB), Free: {free_pct:.2f}% ({free_gb:.2f} GB)")
+
+            if highest is None or used_pct > highest[0]:
+                highest = (used_pct, timestamp, used_gb, free_gb)
+            if lowest is None or used_pct < lowest[0]:
+                lowest = (used_pct, timestamp, used_gb, free_gb)
 
     if highest:
         print(f"\n======= 🔺 Peak Memory Usage Summary 🔺 =======")
@@ -324,182 +1790,2420 @@ def process_oswmeminfo_files(meminfo_dir):
         print(f"Timestamp: {lowest[1]}")
         print(f"Used: {lowest[0]:.2f}% ({lowest[2]:.2f} GB), Free: {100 - lowest[0]:.2f}% ({lowest[3]:.2f} GB)")
 
-    detect_increasing_memory_patterns(mem_data, min_consecutive=6)
-    detect_decreasing_memory_patterns(mem_data, min_consecutive=6)
+    increasing = detect_increasing_memory_patterns(mem_data, min_consecutive=6)
+    decreasing = detect_decreasing_memory_patterns(mem_data, min_consecutive=6)
+    if results:
+        results.write("memory_patterns", pattern_columns(
+            mem_data, "used_pct", [("increasing", run) for run in increasing] + [("decreasing", run) for run in decreasing]))
+    return findings
+
+@register_source
+class VmstatSource(OswSource):
+    # vmstat rows: r and b are the first two columns.
+    name = "oswvmstat"
+    schema = VMSTAT_SCHEMA
+    lines = rb"[ \t\v\f]*\d"
 
-def process_oswvmstat_files(vmstat_dir, cpu_cores):
+    def parse_line(self, line):
+        columns = line.split()
+        if len(columns) < 6 or not columns[0][:1].isdecimal():
+            return
+        try:
+            r_val = int(columns[0])
+            b_val = int(columns[1])
+        except ValueError:
+            self.rejected += 1
+            return
+        self.samples.append(self.epoch, self.timestamp, r_val, b_val)
+
+def process_oswvmstat_files(vmstat_dir, cpu_cores, jobs=1, window=None, results=None):
     print("\n========⚙️ Analyzing vmstat output where 'r' > CPU cores ========\n")
 
     r_exceeds = []
 
-    for filename in sorted(os.listdir(vmstat_dir)):
-        if filename.endswith(".dat"):
-            filepath = os.path.join(vmstat_dir, filename)
-            timestamp = None
-            with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                for line in f:
-                    if line.startswith("zzz "):
-                        timestamp = line.strip().replace("zzz ", "").replace("***", "")
-                    elif re.match(r"\s*\d+", line):
-                        columns = re.split(r"\s+", line.strip())
-                        if len(columns) >= 6:
-                            try:
-                                r_val = int(columns[0])
-                                b_val = int(columns[1])
-                                if r_val > cpu_cores:
-                                    r_exceeds.append((timestamp, r_val, b_val))
-                            except ValueError:
-                                continue
+    for samples in map_source_files("oswvmstat", vmstat_dir, jobs, window):
+        r_column = samples.column("r")
+        if results:
+            columns = samples.as_columns()
+            columns["r_above_cores"] = [r > cpu_cores for r in r_column]
+            results.write("vmstat_samples", columns)
+        for i in range(len(samples)):
+            if r_column[i] > cpu_cores:
+                _, timestamp, r_val, b_val = samples.row(i)
+                r_exceeds.append((timestamp, r_val, b_val))
 
     if r_exceeds:
         print("⚠️  Detected times where 'r' (running processes) > CPU cores:\n")
-        for ts, r, b in r_exceeds:
-            print(f"  [{ts}] r = {r}, b = {b}")
+        if results is None or results.text:
+            for ts, r, b in r_exceeds:
+                print(f"  [{ts}] r = {r}, b = {b}")
         print(f"\n🔍 Total occurrences: {len(r_exceeds)}")
     else:
         print("✅ No 'r' values exceeding CPU cores detected.")
+    return len(r_exceeds)
+
+
 
+# D-state rows of oswtop; "snapshot" numbers the zzz blocks of the archive,
+# so rows of one snapshot are contiguous and gaps mark snapshots without D.
+DSTATE_SCHEMA = (("snapshot", "q"), ("epoch", "q"), ("timestamp", "interned"), ("pid", "interned"),
+                 ("user", "interned"), ("state", "interned"), ("cpu", "d"), ("mem", "d"), ("cmd", "interned"))
 
+DSTATE_TOP_EPISODES = 10
 
+class OswtopDStateConsumer(OswtopConsumer):
+    needs_processes = True
+    process_states = "D"
 
+    def __init__(self):
+        self.rows = TimeSeries(DSTATE_SCHEMA)
+        self.snapshot_count = 0
 
-def analyze_oswtop_data(oswtop_dir):
-    
-    timestamp_header_pattern = re.compile(r'^zzz \*\*\*(.*?)$')
+    def start_file(self, filename):
+        self.file_rows = TimeSeries(DSTATE_SCHEMA)
+        self.snapshot = -1
+        self.current_timestamp = None
+        self.epoch = -1
 
-    # Pattern to match process lines
-    process_line_pattern = re.compile(
-        r'^\s*(\d+)\s+(\S+)\s+\d+\s+\S+\s+\S+\s+\S+\s+\S+\s+([RSDZTW])\s+([\d.]+)\s+([\d.]+)\s+[\d:.]+\s+(.+)$'
-    )
+    def on_snapshot(self, timestamp):
+        self.snapshot += 1
+        self.current_timestamp = timestamp
+        self.epoch = parse_osw_timestamp(timestamp)
 
-    for root, _, files in os.walk(oswtop_dir):
-        for file in sorted(files):
-            filepath = os.path.join(root, file)
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
+    def on_process(self, pid, user, state, cpu, mem, cmd):
+        # Rows before the first zzz header have no snapshot to belong to.
+        if state == 'D' and self.current_timestamp:
+            self.file_rows.append(self.snapshot, self.epoch, self.current_timestamp,
+                                  pid, user, state, cpu, mem, cmd)
 
-            current_timestamp = None
-            process_list = []
+    def end_file(self):
+        return self.file_rows, self.snapshot + 1
 
-            for line in lines:
-                line = line.strip()
+    def merge(self, partial):
+        file_rows, snapshot_count = partial
+        offset = len(self.rows)
+        self.rows.extend(file_rows)
+        snapshots = self.rows.column("snapshot")
+        for i in range(offset, len(snapshots)):
+            snapshots[i] += self.snapshot_count
+        self.snapshot_count += snapshot_count
 
-                match_ts = timestamp_header_pattern.match(line)
-                if match_ts:
-                    if current_timestamp and process_list:
-                        d_processes = [proc for proc in process_list if proc['state'] == 'D']
-                        if d_processes:
-                            print(f"\n[{current_timestamp}] D-state Processes (Count: {len(d_processes)}):")
-                            for proc in d_processes:
-                                print(f"PID={proc['pid']}, USER={proc['user']}, STATE={proc['state']}, CPU={proc['cpu']}%, MEM={proc['mem']}%, CMD={proc['cmd']}")
-                    current_timestamp = match_ts.group(1)
-                    process_list = []
+    def iter_snapshots(self):
+        # (snapshot, [row index, ...]) for every snapshot with D processes.
+        snapshots = self.rows.column("snapshot")
+        start = 0
+        for i in range(1, len(snapshots) + 1):
+            if i == len(snapshots) or snapshots[i] != snapshots[start]:
+                yield snapshots[start], range(start, i)
+                start = i
+
+    def report(self, results=None):
+        findings = 0
+        text = results is None or results.text
+        for _, indices in self.iter_snapshots():
+            findings += 1
+            if not text:
+                continue
+            print(f"\n[{self.rows.value('timestamp', indices[0])}] D-state Processes (Count: {len(indices)}):")
+            for i in indices:
+                _, _, _, pid, user, state, cpu, mem, cmd = self.rows.row(i)
+                print(f"PID={pid}, USER={user}, STATE={state}, CPU={cpu}%, MEM={mem}%, CMD={cmd}")
+        if results:
+            results.write("dstate_rows", self.rows.as_columns())
+        if findings:
+            self.report_durations(results)
+        return findings
+
+    def report_durations(self, results=None):
+        # A PID/command stays in one episode while it is in D in consecutive
+        # snapshots. Only open episodes, the longest closed ones and
+        # per-command totals are kept, however long the archive is.
+        open_episodes = {}
+        longest = []
+        per_command = {}
+
+        def close(key, episode):
+            first_snapshot, last_snapshot, first_i, last_i = episode
+            length = last_snapshot - first_snapshot + 1
+            item = (length, last_i - first_i, key, first_i, last_i)
+            if len(longest) < DSTATE_TOP_EPISODES:
+                heapq.heappush(longest, item)
+            else:
+                heapq.heappushpop(longest, item)
+            totals = per_command.setdefault(key[1], [0, 0, 0])
+            totals[0] += 1
+            totals[1] += length
+            totals[2] = max(totals[2], length)
+
+        for snapshot, indices in self.iter_snapshots():
+            for i in indices:
+                key = (self.rows.value("pid", i), self.rows.value("cmd", i))
+                episode = open_episodes.get(key)
+                if episode is not None and episode[1] == snapshot:
                     continue
+                if episode is not None and episode[1] == snapshot - 1:
+                    episode[1] = snapshot
+                    episode[3] = i
+                else:
+                    if episode is not None:
+                        close(key, episode)
+                    open_episodes[key] = [snapshot, snapshot, i, i]
+            for key in [key for key, episode in open_episodes.items() if episode[1] != snapshot]:
+                close(key, open_episodes.pop(key))
+        for key, episode in open_episodes.items():
+            close(key, episode)
 
-                match_proc = process_line_pattern.match(line)
-                if match_proc:
-                    proc_info = {
-                        'pid': match_proc.group(1),
-                        'user': match_proc.group(2),
-                        'state': match_proc.group(3),
-                        'cpu': float(match_proc.group(4)),
-                        'mem': float(match_proc.group(5)),
-                        'cmd': match_proc.group(6)
-                    }
-                    process_list.append(proc_info)
+        epochs = self.rows.column("epoch")
+        episodes = []
+        print("\n========⏳ D-state duration per PID/command =========\n")
+        print("Longest D-state episodes (consecutive snapshots):")
+        for length, _, (pid, cmd), first_i, last_i in sorted(longest, reverse=True):
+            first = self.rows.value("timestamp", first_i)
+            last = self.rows.value("timestamp", last_i)
+            duration = epochs[last_i] - epochs[first_i] if epochs[first_i] >= 0 and epochs[last_i] >= 0 else None
+            seconds = f", {duration}s" if duration is not None else ""
+            print(f"PID={pid}, CMD={cmd}: {length} snapshot(s), {first} → {last}{seconds}")
+            episodes.append((pid, cmd, length, first, last, duration))
 
-            # Final block for last timestamp
-            if current_timestamp and process_list:
-                d_processes = [proc for proc in process_list if proc['state'] == 'D']
-                if d_processes:
-                    print(f"\n[{current_timestamp}] D-state Processes (Count: {len(d_processes)}):")
-                    for proc in d_processes:
-                        print(f"PID={proc['pid']}, USER={proc['user']}, STATE={proc['state']}, CPU={proc['cpu']}%, MEM={proc['mem']}%, CMD={proc['cmd']}")
+        print("\nD-state totals per command:")
+        for cmd, (episode_count, snapshots, longest_run) in heapq.nlargest(
+                DSTATE_TOP_EPISODES, per_command.items(), key=lambda item: (item[1][1], item[0])):
+            print(f"{cmd}: {snapshots} snapshot(s) in D over {episode_count} episode(s), longest {longest_run} consecutive")
 
+        if results:
+            results.write("dstate_episodes", record_columns(
+                ("pid", "cmd", "snapshots", "first", "last", "seconds"), episodes))
+            results.write("dstate_commands", record_columns(
+                ("cmd", "episodes", "snapshots", "longest"),
+                ((cmd, *totals) for cmd, totals in sorted(per_command.items()))))
 
+PROCESS_TOP_K = 10
 
+class OswtopProcessConsumer(OswtopConsumer):
+    # Per PID/user/command rollups of every process row: [samples, cpu sum,
+    # cpu max, mem sum, mem max, first seen, last seen, snapshot last seen,
+    # order first seen].
+    # Only processes in the newest file are kept open; one that is gone is
+    # finalized into the per-command totals and four top-K heaps, so memory
+    # grows with processes alive at once and distinct commands, not with
+    # every PID the archive ever saw.
+    needs_processes = True
+    RANKINGS = (("highest peak %CPU", lambda stats: (stats[2], stats[1] / stats[0])),
+                ("highest average %CPU", lambda stats: (stats[1] / stats[0], stats[2])),
+                ("highest peak %MEM", lambda stats: (stats[4], stats[3] / stats[0])),
+                ("highest average %MEM", lambda stats: (stats[3] / stats[0], stats[4])))
 
+    def __init__(self):
+        self.processes = {}
+        self.rows = 0
+        self.snapshots = 0
+        self.rollups = 0
+        # (rank key, -order, pid/user/command, rollup); on ties the process
+        # seen first ranks higher.
+        self.top = [[] for _ in self.RANKINGS]
+        self.commands = {}
 
+    def start_file(self, filename):
+        self.file_processes = {}
+        self.file_rows = 0
+        self.file_snapshots = 0
+        self.current_timestamp = None
 
+    def on_snapshot(self, timestamp):
+        self.current_timestamp = sys.intern(timestamp)
+        self.file_snapshots += 1
 
-def analyze_iostat_files(directory):
-    iowait_records = []  # To store tuples (timestamp, iowait)
-    high_util_disks = []  # To store tuples (timestamp, disk, read_MBps, write_MBps, util%)
+    def on_process(self, pid, user, state, cpu, mem, cmd):
+        if not self.current_timestamp:
+            return
+        self.file_rows += 1
+        key = (pid, user, cmd)
+        stats = self.file_processes.get(key)
+        if stats is None:
+            key = (sys.intern(pid), sys.intern(user), sys.intern(cmd))
+            self.file_processes[key] = [1, cpu, cpu, mem, mem, self.current_timestamp, self.current_timestamp,
+                                        self.file_snapshots]
+            return
+        stats[0] += 1
+        stats[1] += cpu
+        stats[3] += mem
+        if cpu > stats[2]:
+            stats[2] = cpu
+        if mem > stats[4]:
+            stats[4] = mem
+        stats[6] = self.current_timestamp
+        stats[7] = self.file_snapshots
 
-    def kb_to_mb(kb):
-        return kb / 1024.0
+    def end_file(self):
+        return self.file_processes, self.file_rows, self.file_snapshots
 
-    for filename in sorted(os.listdir(directory)):
-        if not filename.endswith(".dat"):
+    def merge(self, partial):
+        # Partials arrive in file order.
+        file_processes, file_rows, file_snapshots = partial
+        self.rows += file_rows
+        for key in [key for key in self.processes if key not in file_processes]:
+            self.finalize(key, self.processes.pop(key))
+        for key, file_stats in file_processes.items():
+            last_snapshot = self.snapshots + file_stats[7]
+            stats = self.processes.get(key)
+            if stats is None:
+                self.processes[tuple(sys.intern(part) for part in key)] = file_stats[:7] + [last_snapshot, self.rollups]
+                self.rollups += 1
+                continue
+            stats[0] += file_stats[0]
+            stats[1] += file_stats[1]
+            stats[2] = max(stats[2], file_stats[2])
+            stats[3] += file_stats[3]
+            stats[4] = max(stats[4], file_stats[4])
+            stats[6] = file_stats[6]
+            stats[7] = last_snapshot
+        self.snapshots += file_snapshots
+
+    def finalize(self, key, stats):
+        for top, (_, rank) in zip(self.top, self.RANKINGS):
+            item = (rank(stats), -stats[8], key, stats)
+            if len(top) < PROCESS_TOP_K:
+                heapq.heappush(top, item)
+            else:
+                heapq.heappushpop(top, item)
+        # The same rollup per command, across PIDs and users, plus the order
+        # and snapshot its first and last sightings came from.
+        samples, cpu_sum, cpu_max, mem_sum, mem_max, first, last, last_snapshot, order = stats
+        totals = self.commands.get(key[2])
+        if totals is None:
+            self.commands[key[2]] = [samples, cpu_sum, cpu_max, mem_sum, mem_max, first, last, 1, order, last_snapshot]
+            return
+        totals[0] += samples
+        totals[1] += cpu_sum
+        totals[2] = max(totals[2], cpu_max)
+        totals[3] += mem_sum
+        totals[4] = max(totals[4], mem_max)
+        totals[7] += 1
+        if order < totals[8]:
+            totals[5] = first
+            totals[8] = order
+        if last_snapshot > totals[9]:
+            totals[6] = last
+            totals[9] = last_snapshot
+
+    def report(self, results=None):
+        # Informational only, so it adds no findings.
+        for key in list(self.processes):
+            self.finalize(key, self.processes.pop(key))
+        print("\n========🔥 Top CPU and Memory Consuming Processes =========\n")
+        print(f"Process rows analyzed: {self.rows} ({self.rollups} PID/user/command combinations)")
+        if not self.rollups:
+            return 0
+        ranked = []
+        for top, (title, _) in zip(self.top, self.RANKINGS):
+            print(f"\nTop {PROCESS_TOP_K} processes by {title}:")
+            for _, _, (pid, user, cmd), stats in sorted(top, reverse=True):
+                samples, cpu_sum, cpu_max, mem_sum, mem_max, first, last = stats[:7]
+                print(f"PID={pid}, USER={user}, CMD={cmd} | Samples={samples}, "
+                      f"CPU avg={cpu_sum / samples:.2f}% max={cpu_max}%, MEM avg={mem_sum / samples:.2f}% max={mem_max}%, "
+                      f"Seen: {first} → {last}")
+                ranked.append((title, pid, user, cmd, samples, cpu_sum / samples, cpu_max,
+                               mem_sum / samples, mem_max, first, last))
+
+        print(f"\nTop {PROCESS_TOP_K} commands by total %CPU (all PIDs):")
+        for cmd, (samples, cpu_sum, cpu_max, mem_sum, mem_max, first, last, pids, _, _) in heapq.nlargest(
+                PROCESS_TOP_K, self.commands.items(), key=lambda item: item[1][1]):
+            print(f"CMD={cmd} | PIDs={pids}, Samples={samples}, "
+                  f"CPU avg={cpu_sum / samples:.2f}% max={cpu_max}%, MEM avg={mem_sum / samples:.2f}% max={mem_max}%, "
+                  f"Seen: {first} → {last}")
+        if results:
+            results.write("process_top", record_columns(
+                ("ranking", "pid", "user", "cmd", "samples", "cpu_avg", "cpu_max", "mem_avg", "mem_max",
+                 "first_seen", "last_seen"), ranked))
+            results.write("process_commands", record_columns(
+                ("cmd", "pids", "samples", "cpu_avg", "cpu_max", "mem_avg", "mem_max", "first_seen", "last_seen"),
+                ((cmd, pids, samples, cpu_sum / samples, cpu_max, mem_sum / samples, mem_max, first, last)
+                 for cmd, (samples, cpu_sum, cpu_max, mem_sum, mem_max, first, last, pids, _, _)
+                 in sorted(self.commands.items()))))
+        return 0
+
+def report_oswtop_data(dstate, processes, results=None):
+    findings = dstate.report(results)
+    processes.report(results)
+    return findings
+
+def analyze_oswtop_data(oswtop_dir, jobs=1, window=None, results=None):
+    consumers = [OswtopDStateConsumer(), OswtopProcessConsumer()]
+    scan_oswtop(oswtop_dir, consumers, jobs, window)
+    return report_oswtop_data(*consumers, results)
+
+
+def kb_to_mb(kb):
+    return kb / 1024.0
+
+class QuantileSketch:
+    # Streaming quantiles with ~1% relative error: values are counted in
+    # logarithmic buckets, so memory depends on the value range, not on the
+    # number of samples, and sketches from different files can be added.
+    GAMMA = 1.02
+    LOG_GAMMA = math.log(GAMMA)
+
+    def __init__(self):
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.LOG_GAMMA)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.zeros += other.zeros
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.GAMMA ** key / (self.GAMMA + 1)
+        return 2 * self.GAMMA ** max(self.buckets) / (self.GAMMA + 1)
+
+class RunningStat:
+    # Count, mean, max and p95/p99 of one metric.
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+        self.sketch = QuantileSketch()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.sketch.add(value)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        self.sketch.merge(other.sketch)
+
+    def values(self):
+        # (count, mean, max, p95, p99); None where there are no samples.
+        if not self.count:
+            return self.count, None, None, None, None
+        return (self.count, self.total / self.count, self.max,
+                min(self.sketch.quantile(0.95), self.max), min(self.sketch.quantile(0.99), self.max))
+
+    def summary(self):
+        if not self.count:
+            return "n/a"
+        return (f"avg {self.total / self.count:.2f} max {self.max:.2f} "
+                f"p95 {min(self.sketch.quantile(0.95), self.max):.2f} p99 {min(self.sketch.quantile(0.99), self.max):.2f}")
+
+class WindowQuantile:
+    # The q-quantile of a sliding window, kept current as samples enter and
+    # leave: values are counted in log-spaced buckets like QuantileSketch
+    # (log1p, so idle zeros have a bucket too) and a pointer to the bucket
+    # holding the quantile moves with every update. The cost of an update is
+    # bounded by the bucket range, never by the window length.
+    LOG_GAMMA = QuantileSketch.LOG_GAMMA
+
+    def __init__(self, q):
+        self.q = q
+        self.counts = {}
+        self.count = 0
+        self.key = 0
+        self.below = 0  # samples in buckets under self.key
+
+    def bucket(self, value):
+        return math.ceil(math.log1p(max(value, 0.0)) / self.LOG_GAMMA)
+
+    def add(self, value):
+        key = self.bucket(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        if key < self.key:
+            self.below += 1
+        self.rebalance()
+
+    def remove(self, value):
+        key = self.bucket(value)
+        self.counts[key] -= 1
+        if not self.counts[key]:
+            del self.counts[key]
+        self.count -= 1
+        if key < self.key:
+            self.below -= 1
+        self.rebalance()
+
+    def rebalance(self):
+        if not self.count:
+            self.key = self.below = 0
+            return
+        rank = int(self.q * (self.count - 1))
+        while self.below > rank:
+            self.key -= 1
+            self.below -= self.counts.get(self.key, 0)
+        while self.below + self.counts.get(self.key, 0) <= rank:
+            self.below += self.counts.get(self.key, 0)
+            self.key += 1
+
+    def value(self):
+        if not self.count:
+            return None
+        gamma = QuantileSketch.GAMMA
+        return max(2 * gamma ** self.key / (gamma + 1) - 1, 0.0)
+
+class RollingWindow:
+    # Mean, variance, least-squares slope and optionally a quantile of the
+    # (epoch, value) samples of the last `seconds`. Samples entering and
+    # leaving update the sums with Welford's recurrences, so each add() is
+    # O(1); the sums are recomputed from the window once per window's worth
+    # of updates so rounding errors cannot build up over a long archive.
+    def __init__(self, seconds, quantile=None):
+        self.seconds = seconds
+        self.samples = deque()
+        self.quantile = WindowQuantile(quantile) if quantile is not None else None
+        self.updates = 0
+        self.mean_t = self.mean = self.m2_t = self.m2 = self.co = 0.0
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, epoch, value):
+        samples = self.samples
+        while samples and samples[0][0] <= epoch - self.seconds:
+            self.remove(*samples.popleft())
+        samples.append((epoch, value))
+        n = len(samples)
+        dt = epoch - self.mean_t
+        mean_t = self.mean_t = self.mean_t + dt / n
+        dx = value - self.mean
+        mean = self.mean = self.mean + dx / n
+        self.m2_t += dt * (epoch - mean_t)
+        self.m2 += dx * (value - mean)
+        self.co += dt * (value - mean)
+        if self.quantile:
+            self.quantile.add(value)
+        self.updates += 1
+        if self.updates >= n:
+            self.recompute()
+
+    def remove(self, epoch, value):
+        # After popleft(): undoes the sample's contribution to the sums.
+        n = len(self.samples)
+        if self.quantile:
+            self.quantile.remove(value)
+        if not n:
+            self.mean_t = self.mean = self.m2_t = self.m2 = self.co = 0.0
+            return
+        dt = epoch - self.mean_t
+        mean_t = self.mean_t = self.mean_t - dt / n
+        dx = value - self.mean
+        mean = self.mean = self.mean - dx / n
+        self.m2_t -= dt * (epoch - mean_t)
+        self.m2 -= dx * (value - mean)
+        self.co -= dt * (value - mean)
+
+    def recompute(self):
+        n = len(self.samples)
+        self.updates = 0
+        self.mean_t = sum(epoch for epoch, _ in self.samples) / n
+        self.mean = sum(value for _, value in self.samples) / n
+        self.m2_t = sum((epoch - self.mean_t) ** 2 for epoch, _ in self.samples)
+        self.m2 = sum((value - self.mean) ** 2 for _, value in self.samples)
+        self.co = sum((epoch - self.mean_t) * (value - self.mean) for epoch, value in self.samples)
+
+    def std(self):
+        return math.sqrt(max(self.m2, 0.0) / (len(self.samples) - 1)) if len(self.samples) > 1 else 0.0
+
+    def slope(self):
+        # Least-squares change per second, and r² of the fit.
+        if self.m2_t <= 0 or self.m2 <= 0:
+            return 0.0, 0.0
+        return self.co / self.m2_t, min(self.co * self.co / (self.m2_t * self.m2), 1.0)
+
+IOSTAT_TOP_N = 10
+IOSTAT_DEVICE_LIMIT = 20
+IOSTAT_HOT_UTIL = 50.0
+
+class IostatStats:
+    # Everything the iostat report needs, in memory that does not grow with
+    # the archive: top-N heaps of iowait samples, device rows and hot-disk
+    # episodes, plus running per-device statistics. One instance is built
+    # per file and merged in filename order, so samples are numbered (seq)
+    # and reports counted to keep ties and episodes exact. A zzz block
+    # usually holds several iostat reports; episodes follow the reports.
+    def __init__(self):
+        self.reports = 0
+        self.new_report = True
+        self.iowait_samples = 0
+        self.iowait_top = []
+        self.device_rows = 0
+        self.hot_rows = 0
+        self.util_top = []
+        self.devices = {}
+        self.open_episodes = {}
+        self.leading_episodes = {}
+        self.episode_top = []
+        self.episode_count = 0
+
+    @staticmethod
+    def push(heap, item):
+        if len(heap) < IOSTAT_TOP_N:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+
+    def add_report(self):
+        # At each zzz line and Device header; the next device row opens the
+        # report, so a block's header right after its zzz line is not counted twice.
+        self.new_report = True
+
+    def add_iowait(self, timestamp, iowait):
+        # Negated sequence numbers make earlier samples win ties, matching a
+        # stable sort of the whole series.
+        self.push(self.iowait_top, (iowait, -self.iowait_samples, timestamp))
+        self.iowait_samples += 1
+
+    def add_device(self, timestamp, device, read_mbps, write_mbps, await_ms, util):
+        if self.new_report:
+            self.reports += 1
+            self.new_report = False
+        report = self.reports - 1
+        stats = self.devices.get(device)
+        if stats is None:
+            stats = self.devices[sys.intern(device)] = (RunningStat(), RunningStat(), RunningStat())
+        util_stat, await_stat, throughput_stat = stats
+        util_stat.add(util)
+        if await_ms is not None:
+            await_stat.add(await_ms)
+        throughput_stat.add(read_mbps + write_mbps)
+
+        if util > IOSTAT_HOT_UTIL:
+            self.push(self.util_top, (util, -self.device_rows, timestamp, device, read_mbps, write_mbps))
+            self.hot_rows += 1
+            self.extend_episode(device, report, timestamp, util)
+        elif device in self.open_episodes:
+            self.close_episode(device, self.open_episodes.pop(device))
+        self.device_rows += 1
+
+    def extend_episode(self, device, report, timestamp, util):
+        # Episode: [first report, last report, first ts, last ts, peak, util sum, intervals]
+        episode = self.open_episodes.get(device)
+        if episode is not None and episode[1] >= report - 1:
+            if episode[1] != report:
+                episode[1] = report
+                episode[3] = timestamp
+                episode[6] += 1
+                episode[5] += util
+            episode[4] = max(episode[4], util)
+            return
+        if episode is not None:
+            self.close_episode(device, episode)
+        self.open_episodes[device] = [report, report, timestamp, timestamp, util, util, 1]
+
+    def close_episode(self, device, episode, final=False):
+        # An episode that starts at this instance's first report may still
+        # continue one from the previous file, so it is kept aside until merged.
+        if episode[0] == 0 and not final:
+            self.leading_episodes[device] = episode
+            return
+        first, last, first_ts, last_ts, peak, util_sum, intervals = episode
+        self.episode_count += 1
+        self.push(self.episode_top, (intervals, peak, device, first_ts or "", last_ts or "", util_sum / intervals))
+
+    def merge(self, other):
+        offset = self.iowait_samples
+        for iowait, neg_seq, timestamp in other.iowait_top:
+            self.push(self.iowait_top, (iowait, neg_seq - offset, timestamp))
+        self.iowait_samples += other.iowait_samples
+
+        offset = self.device_rows
+        for util, neg_seq, *row in other.util_top:
+            self.push(self.util_top, (util, neg_seq - offset, *row))
+        self.device_rows += other.device_rows
+        self.hot_rows += other.hot_rows
+
+        for device, other_stats in other.devices.items():
+            stats = self.devices.get(device)
+            if stats is None:
+                self.devices[device] = other_stats
+            else:
+                for stat, other_stat in zip(stats, other_stats):
+                    stat.merge(other_stat)
+
+        if not other.reports:
+            return
+        offset = self.reports
+        for episodes in (other.open_episodes, other.leading_episodes):
+            for episode in episodes.values():
+                episode[0] += offset
+                episode[1] += offset
+        continued = {device: episode for episodes in (other.leading_episodes, other.open_episodes)
+                     for device, episode in episodes.items() if episode[0] == offset}
+        for device, episode in self.open_episodes.items():
+            following = continued.get(device) if episode[1] == offset - 1 else None
+            if following is None:
+                self.close_episode(device, episode)
+                continue
+            following[0] = episode[0]
+            following[2] = episode[2]
+            following[4] = max(following[4], episode[4])
+            following[5] += episode[5]
+            following[6] += episode[6]
+        self.open_episodes = other.open_episodes
+        for device, episode in other.leading_episodes.items():
+            self.close_episode(device, episode)
+        for item in other.episode_top:
+            self.push(self.episode_top, item)
+        self.episode_count += other.episode_count
+        self.reports += other.reports
+
+    def report(self, results=None):
+        for episodes in (self.leading_episodes, self.open_episodes):
+            for device, episode in episodes.items():
+                self.close_episode(device, episode, final=True)
+        self.leading_episodes = {}
+        self.open_episodes = {}
+        if results:
+            self.write_results(results)
+
+        # Print top 10 iowait values
+        print("Top 10 highest iowait values:")
+        for iowait, _, timestamp in sorted(self.iowait_top, reverse=True):
+            print(f"{timestamp} - iowait: {iowait:.2f}%")
+
+        # Print the busiest device samples instead of every hot row
+        print(f"\nTop {IOSTAT_TOP_N} disk utilization samples (> {IOSTAT_HOT_UTIL:.0f}%, "
+              f"{self.hot_rows} of {self.device_rows} device samples):")
+        for util, _, ts, dev, r_mb, w_mb in sorted(self.util_top, reverse=True):
+            print(f"{ts} - Device: {dev}, Read: {r_mb:.2f} MB/s, Write: {w_mb:.2f} MB/s, Utilization: {util:.2f}%")
+
+        print(f"\nLongest high-utilization episodes (consecutive samples > {IOSTAT_HOT_UTIL:.0f}%, "
+              f"{self.episode_count} episodes):")
+        for intervals, peak, device, first_ts, last_ts, mean in sorted(self.episode_top, reverse=True):
+            print(f"{device}: {intervals} samples, {first_ts} → {last_ts}, peak {peak:.2f}%, avg {mean:.2f}%")
+
+        print(f"\nPer-device statistics ({min(len(self.devices), IOSTAT_DEVICE_LIMIT)} of "
+              f"{len(self.devices)} devices, busiest by p95 utilization):")
+        busiest = heapq.nlargest(IOSTAT_DEVICE_LIMIT, self.devices.items(),
+                                 key=lambda item: (item[1][0].sketch.quantile(0.95) or 0, item[0]))
+        for device, (util_stat, await_stat, throughput_stat) in busiest:
+            print(f"{device} ({util_stat.count} samples): %util {util_stat.summary()} | "
+                  f"await ms {await_stat.summary()} | MB/s {throughput_stat.summary()}")
+        return self.hot_rows
+
+    def write_results(self, results):
+        results.write("iostat_iowait_top", record_columns(
+            ("timestamp", "iowait"), ((timestamp, iowait) for iowait, _, timestamp in sorted(self.iowait_top, reverse=True))))
+        results.write("iostat_util_top", record_columns(
+            ("timestamp", "device", "read_mbps", "write_mbps", "util"),
+            ((ts, dev, r_mb, w_mb, util) for util, _, ts, dev, r_mb, w_mb in sorted(self.util_top, reverse=True))))
+        results.write("iostat_episodes", record_columns(
+            ("device", "samples", "first", "last", "peak_util", "avg_util"),
+            ((device, intervals, first_ts, last_ts, peak, mean)
+             for intervals, peak, device, first_ts, last_ts, mean in sorted(self.episode_top, reverse=True))))
+        names = ["device"] + [f"{metric}_{field}" for metric in ("util", "await_ms", "mbps")
+                              for field in ("count", "avg", "max", "p95", "p99")]
+        results.write("iostat_devices", record_columns(names, (
+            (device, *util_stat.values(), *await_stat.values(), *throughput_stat.values())
+            for device, (util_stat, await_stat, throughput_stat) in sorted(self.devices.items()))))
+
+@profiled("parse oswiostat")
+def parse_oswiostat_file(filepath, span=None):
+    stats = IostatStats()
+    lines = iter_osw_lines(filepath, span)
+    timestamp = None
+    await_index = None
+    rejected = 0
+    for line in lines:
+        line = line.strip()
+
+        # Extract timestamp
+        if line.startswith('zzz') or line.startswith('***'):
+            timestamp = line.split('***')[-1].strip()
+            stats.add_report()
             continue
 
-        filepath = os.path.join(directory, filename)
-        with open(filepath, 'r') as f:
-            timestamp = None
-            for line in f:
-                line = line.strip()
+        # Handle avg-cpu section
+        if line.startswith('avg-cpu:'):
+            try:
+                cpu_line = next(lines).strip()
+                parts = cpu_line.split()
+                if len(parts) >= 4:
+                    iowait = float(parts[3])
+                    stats.add_iowait(timestamp, iowait)
+            except StopIteration:
+                continue
+            continue
 
-                # Extract timestamp
-                if line.startswith('zzz') or line.startswith('***'):
-                    timestamp = line.split('***')[-1].strip()
-                    continue
+        if line.startswith('Device'):
+            # await moved between sysstat versions; look it up by name
+            header = line.split()
+            await_index = header.index('await') if 'await' in header else None
+            stats.add_report()
+            continue
 
-                # Handle avg-cpu section
-                if line.startswith('avg-cpu:'):
-                    try:
-                        cpu_line = next(f).strip()
-                        parts = cpu_line.split()
-                        if len(parts) >= 4:
-                            iowait = float(parts[3])
-                            iowait_records.append((timestamp, iowait))
-                    except StopIteration:
-                        continue
-                    continue
+        if line == '':
+            continue
 
-                if line.startswith('Device') or line == '':
-                    continue
+        parts = line.split()
+        if len(parts) < 14:
+            continue
 
-                parts = line.split()
-                if len(parts) < 14:
-                    continue
+        try:
+            device = parts[0]
+            read_kBps = float(parts[5])   # Corrected index
+            write_kBps = float(parts[6])  # Corrected index
+            util = float(parts[-1])
+        except ValueError:
+            rejected += 1
+            continue
+        try:
+            await_ms = float(parts[await_index]) if await_index is not None else None
+        except (ValueError, IndexError):
+            await_ms = None
+
+        stats.add_device(timestamp, device, kb_to_mb(read_kBps), kb_to_mb(write_kBps), await_ms, util)
+
+    profile_count(samples=stats.iowait_samples + stats.device_rows, rejected=rejected)
+    return stats
+
+def analyze_iostat_files(directory, jobs=1, window=None, results=None):
+    stats = IostatStats()
+    for file_stats in map_osw_files(parse_oswiostat_file, directory, jobs, "oswiostat", window):
+        stats.merge(file_stats)
+    return stats.report(results)
+
+# mpstat -P ALL: per interval a header row, an "all" row (cpu -1) and one row
+# per CPU. Values are float32 columns, so a 200-core host costs array slots
+# rather than a Python object per cell; "interval" numbers the intervals of
+# a file, as a zzz block holds several.
+MPSTAT_SCHEMA = (("epoch", "q"), ("interval", "q"), ("cpu", "i"), ("usr", "f"), ("sys", "f"), ("iowait", "f"),
+                 ("irq", "f"), ("soft", "f"), ("steal", "f"), ("idle", "f"))
+MPSTAT_VALUES = ("usr", "sys", "iowait", "irq", "soft", "steal", "idle")
+MPSTAT_HOT_BUSY = 90.0
+MPSTAT_IMBALANCE_AVG = 50.0
+MPSTAT_TOP_N = 10
+
+@register_source
+class MpstatSource(TableSource):
+    # Rows start with the time of day; "Average:" rows repeat the intervals.
+    name = "oswmpstat"
+    schema = MPSTAT_SCHEMA
+    lines = rb"[ \t\v\f]*\d{1,2}:\d\d:\d\d"
+    key = "CPU"
+    fields = {"cpu": ("CPU",), "usr": ("%usr", "%user"), "sys": ("%sys", "%system"), "iowait": ("%iowait",),
+              "irq": ("%irq",), "soft": ("%soft",), "steal": ("%steal",), "idle": ("%idle",)}
+    required = ("cpu", "idle")
+
+    def __init__(self):
+        super().__init__()
+        self.interval = -1
+        self.value_positions = ()
+        self.arrays = [self.samples.column(name) for name, _ in MPSTAT_SCHEMA]
+
+    def read_header(self, columns):
+        super().read_header(columns)
+        self.interval += 1
+        if self.positions:
+            self.value_positions = [self.positions[field] for field in MPSTAT_VALUES]
+
+    def add_row(self, columns):
+        # Every column is numeric, so rows go straight into the arrays.
+        cpu = columns[self.positions["cpu"]]
+        row = [self.epoch, self.interval, -1 if cpu == "all" else int(cpu)]
+        row += [math.nan if position is None else float(columns[position]) for position in self.value_positions]
+        for values, value in zip(self.arrays, row):
+            values.append(value)
+
+class MpstatStats:
+    # Per interval, the hottest core against the average of all cores; per
+    # core, busy time and how often it was hot. Busy is everything but %idle
+    # and %iowait. Memory grows with the core count, not the archive.
+    def __init__(self):
+        self.intervals = 0
+        self.imbalanced = 0
+        self.max_cpus = 0
+        self.top = []
+        self.cpu_busy = array("d")
+        self.cpu_intervals = array("q")
+        self.cpu_hot = array("q")
+
+    def add_interval(self, epoch, cpus, total, peak, peak_cpu, peak_kernel, hot):
+        mean = total / cpus
+        imbalanced = hot > 0 and mean < MPSTAT_IMBALANCE_AVG
+        self.intervals += 1
+        self.max_cpus = max(self.max_cpus, cpus)
+        if imbalanced:
+            self.imbalanced += 1
+            item = (peak - mean, epoch, peak_cpu, peak, peak_kernel, mean, hot)
+            if len(self.top) < MPSTAT_TOP_N:
+                heapq.heappush(self.top, item)
+            else:
+                heapq.heappushpop(self.top, item)
+        return epoch, cpus, mean, peak, peak_cpu, peak_kernel, hot, imbalanced
+
+    def add(self, samples):
+        # Summarizes the intervals of one file; returns one row per interval.
+        epochs, numbers, cpus = (samples.column(name) for name in ("epoch", "interval", "cpu"))
+        values = [samples.column(name) for name in MPSTAT_VALUES]
+        usr, sys_, iowait, irq, soft, steal, idle = values
+        cpu_busy, cpu_intervals, cpu_hot = self.cpu_busy, self.cpu_intervals, self.cpu_hot
+        rows = []
+        current = None
+        count = 0
+        for i in range(len(samples)):
+            cpu = cpus[i]
+            if cpu < 0:
+                continue
+            if numbers[i] != current:
+                if count:
+                    rows.append(self.add_interval(epoch, count, total, peak, peak_cpu, peak_kernel, hot))
+                current, epoch = numbers[i], epochs[i]
+                count = hot = 0
+                total = 0.0
+                peak, peak_cpu, peak_kernel = -1.0, -1, math.nan
+            if idle[i] == 0 and not any(column[i] for column in values if column[i] == column[i]):
+                continue  # offline CPUs print all zeros; a CPU at 100% iowait or steal is online
+            wait = iowait[i]
+            busy = 100.0 - idle[i] - (wait if wait == wait else 0.0)
+            if busy != busy:
+                continue
+            count += 1
+            total += busy
+            while len(cpu_busy) <= cpu:
+                cpu_busy.append(0.0)
+                cpu_intervals.append(0)
+                cpu_hot.append(0)
+            cpu_busy[cpu] += busy
+            cpu_intervals[cpu] += 1
+            if busy >= MPSTAT_HOT_BUSY:
+                hot += 1
+                cpu_hot[cpu] += 1
+            if busy > peak:
+                peak, peak_cpu = busy, cpu
+                peak_kernel = sum(value for value in (sys_[i], irq[i], soft[i]) if value == value)
+        if count:
+            rows.append(self.add_interval(epoch, count, total, peak, peak_cpu, peak_kernel, hot))
+        return rows
+
+    def report(self, results=None):
+        print("\n========🔥 Analyzing per-CPU hot-core imbalance (mpstat) ========\n")
+        if not self.intervals:
+            print("❌ No per-CPU mpstat rows found (OSWatcher runs mpstat -P ALL on Linux).")
+            return 0
+        print(f"📊 {self.intervals} intervals, up to {self.max_cpus} CPUs each")
+        print(f"🔥 A core is hot at {MPSTAT_HOT_BUSY:.0f}% busy or more (everything but %idle and %iowait)\n")
+        if self.imbalanced:
+            print(f"⚠️  {self.imbalanced} intervals had a hot core while the average CPU was below "
+                  f"{MPSTAT_IMBALANCE_AVG:.0f}% busy\n")
+            print(f"Top {len(self.top)} imbalanced intervals (hottest core vs. the average):")
+            for spread, epoch, cpu, peak, kernel, mean, hot in sorted(self.top, reverse=True):
+                print(f"  [{format_epoch(epoch)}] CPU {cpu}: {peak:.1f}% busy ({kernel:.1f}% sys+irq+soft) vs. "
+                      f"{mean:.1f}% average, {hot} hot core(s)")
+        else:
+            print("✅ No interval had a hot core while the other cores were mostly idle.")
+
+        cpus = [cpu for cpu in range(len(self.cpu_intervals)) if self.cpu_intervals[cpu]]
+        hottest = heapq.nlargest(MPSTAT_TOP_N, (cpu for cpu in cpus if self.cpu_hot[cpu]),
+                                 key=lambda cpu: (self.cpu_hot[cpu], -cpu))
+        if hottest:
+            print("\nCores most often hot:")
+            for cpu in hottest:
+                intervals = self.cpu_intervals[cpu]
+                print(f"  CPU {cpu}: hot in {self.cpu_hot[cpu]} of {intervals} intervals "
+                      f"({self.cpu_hot[cpu] / intervals * 100:.1f}%), {self.cpu_busy[cpu] / intervals:.1f}% busy on average")
+        if results:
+            results.write("mpstat_cpus", {
+                "cpu": cpus,
+                "intervals": [self.cpu_intervals[cpu] for cpu in cpus],
+                "avg_busy": [self.cpu_busy[cpu] / self.cpu_intervals[cpu] for cpu in cpus],
+                "hot_intervals": [self.cpu_hot[cpu] for cpu in cpus],
+            })
+        return self.imbalanced
+
+def analyze_mpstat_files(directory, jobs=1, window=None, results=None):
+    stats = MpstatStats()
+    for samples in map_source_files("oswmpstat", directory, jobs, window):
+        rows = stats.add(samples)
+        if results and rows:
+            results.write("mpstat_intervals", record_columns(
+                ["epoch", "cpus", "avg_busy", "max_busy", "hot_cpu", "hot_cpu_kernel", "hot_cores", "imbalanced"],
+                rows))
+    return stats.report(results)
+
+# Every process of every ps snapshot; sizes in KB as ps prints them.
+PS_SCHEMA = (("epoch", "q"), ("pid", "q"), ("user", "interned"), ("vsz_kb", "q"), ("rss_kb", "q"),
+             ("cmd", "interned"))
+PS_TOP_N = 10
+PS_RSS_GROWTH_MB = 100
+
+@register_source
+class PsSource(TableSource):
+    # ps -e -o user,pid,...,vsize,rssize,...,start,cputime,command. Only the
+    # program name is kept of COMMAND. STARTED reads "Jan 15" for processes
+    # older than a day, which moves TIME and COMMAND one column right; TIME
+    # always has a colon, so the shift is detected there.
+    name = "oswps"
+    schema = PS_SCHEMA
+    key = "PID"
+    fields = {"user": ("USER", "UID"), "pid": ("PID",), "vsz": ("VSZ", "VSIZE"), "rss": ("RSS", "RSZ"),
+              "time": ("TIME",), "cmd": ("COMMAND", "CMD", "ARGS")}
+    required = ("pid", "vsz", "rss", "cmd")
+
+    def add_row(self, columns):
+        positions = self.positions
+        shift = 0
+        if positions["time"] is not None and ":" not in columns[positions["time"]]:
+            shift = 1
+        user = columns[positions["user"]] if positions["user"] is not None else "?"
+        self.samples.append(self.epoch, int(columns[positions["pid"]]), user, int(columns[positions["vsz"]]),
+                            int(columns[positions["rss"]]), columns[positions["cmd"] + shift])
+
+class PsStats:
+    # First and last sample and peak RSS per process, keyed by pid and
+    # program so a reused pid starts over, plus the RSS of all processes per
+    # snapshot.
+    def __init__(self):
+        self.processes = {}
+        self.snapshots = array("q")
+        self.total_rss = array("q")
+        self.process_counts = array("q")
+
+    def add(self, samples):
+        epochs, pids, vsz, rss = (samples.column(name) for name in ("epoch", "pid", "vsz_kb", "rss_kb"))
+        users, cmds = samples.column("user"), samples.column("cmd")
+        user_labels, cmd_labels = samples.labels["user"], samples.labels["cmd"]
+        processes = self.processes
+        for i in range(len(samples)):
+            epoch = epochs[i]
+            if epoch < 0:
+                continue
+            rss_kb, vsz_kb = rss[i], vsz[i]
+            key = (pids[i], cmd_labels[cmds[i]])
+            process = processes.get(key)
+            if process is None:
+                processes[key] = [user_labels[users[i]], 1, epoch, rss_kb, vsz_kb, epoch, rss_kb, vsz_kb, rss_kb]
+            else:
+                process[1] += 1
+                process[5:8] = epoch, rss_kb, vsz_kb
+                if rss_kb > process[8]:
+                    process[8] = rss_kb
+            if not self.snapshots or self.snapshots[-1] != epoch:
+                self.snapshots.append(epoch)
+                self.total_rss.append(0)
+                self.process_counts.append(0)
+            self.total_rss[-1] += rss_kb
+            self.process_counts[-1] += 1
+
+    def print_top(self, title, growth):
+        print(f"\nTop {PS_TOP_N} processes by {title} growth:")
+        top = [item for item in heapq.nlargest(PS_TOP_N, self.processes.items(), key=growth) if growth(item) > 0]
+        for (pid, cmd), (user, samples, first, first_rss, first_vsz, last, last_rss, last_vsz, peak_rss) in top:
+            hours = (last - first) / 3600
+            rss_growth = kb_to_mb(last_rss - first_rss)
+            rate = f", {rss_growth / hours:+.1f} MB/h" if hours else ""
+            print(f"  PID {pid} {cmd} ({user}): RSS {kb_to_mb(first_rss):.1f} → {kb_to_mb(last_rss):.1f} MB "
+                  f"({rss_growth:+.1f} MB{rate} over {hours:.1f} h, peak {kb_to_mb(peak_rss):.1f} MB), "
+                  f"VSZ {kb_to_mb(first_vsz):.1f} → {kb_to_mb(last_vsz):.1f} MB")
+        if not top:
+            print("  none")
+
+    def report(self, results=None):
+        print("\n========📈 Analyzing process memory growth (ps RSS/VSZ) ========\n")
+        if not self.processes:
+            print("❌ No ps rows with RSS and VSZ columns found.")
+            return 0
+        print(f"📊 {len(self.processes)} processes over {len(self.snapshots)} snapshots "
+              f"({format_epoch(self.snapshots[0])} → {format_epoch(self.snapshots[-1])})")
+        peak = max(range(len(self.total_rss)), key=self.total_rss.__getitem__)
+        print(f"💾 RSS of all processes: {kb_to_mb(self.total_rss[0]) / 1024:.2f} GB at start, "
+              f"{kb_to_mb(self.total_rss[-1]) / 1024:.2f} GB at end, peak {kb_to_mb(self.total_rss[peak]) / 1024:.2f} GB "
+              f"at {format_epoch(self.snapshots[peak])}")
+
+        self.print_top("RSS", lambda item: item[1][6] - item[1][3])
+        self.print_top("VSZ", lambda item: item[1][7] - item[1][4])
+        grown = sum(1 for process in self.processes.values() if process[6] - process[3] >= PS_RSS_GROWTH_MB * 1024)
+        if grown:
+            print(f"\n⚠️  {grown} processes grew by {PS_RSS_GROWTH_MB} MB RSS or more")
+        else:
+            print(f"\n✅ No process grew by {PS_RSS_GROWTH_MB} MB RSS or more.")
+        if results:
+            results.write("ps_growth", record_columns(
+                ["pid", "cmd", "user", "samples", "first_epoch", "first_rss_kb", "first_vsz_kb", "last_epoch",
+                 "last_rss_kb", "last_vsz_kb", "peak_rss_kb"],
+                ((pid, cmd, *process) for (pid, cmd), process in self.processes.items())))
+            results.write("ps_total_rss", {"epoch": self.snapshots, "rss_kb": self.total_rss,
+                                           "processes": self.process_counts})
+        return grown
+
+def analyze_ps_files(directory, jobs=1, window=None, results=None):
+    stats = PsStats()
+    for samples in map_source_files("oswps", directory, jobs, window):
+        stats.add(samples)
+    return stats.report(results)
+
+# Cumulative TCP segment counters of netstat -s, one row per block.
+NETSTAT_SCHEMA = (("epoch", "q"), ("segments_received", "q"), ("segments_sent", "q"),
+                  ("segments_retransmitted", "q"))
+# Older net-tools print "send out" and "retransmited".
+NETSTAT_COUNTERS = {"segments received": "segments_received", "segments send out": "segments_sent",
+                    "segments sent out": "segments_sent", "segments retransmited": "segments_retransmitted",
+                    "segments retransmitted": "segments_retransmitted"}
+NETSTAT_RETRANS_PCT = 1.0
+NETSTAT_MIN_SEGMENTS = 1000
+
+@register_source
+class NetstatSource(OswSource):
+    name = "oswnetstat"
+    schema = NETSTAT_SCHEMA
+    lines = rb"[ \t\v\f]*\d+ segments "
+
+    def __init__(self):
+        super().__init__()
+        self.values = {}
+
+    def parse_line(self, line):
+        count, text = line.split(None, 1)
+        column = NETSTAT_COUNTERS.get(" ".join(text.split()))
+        if column:
+            self.values[column] = int(count)
+
+    def end_block(self):
+        if self.values:
+            if len(self.values) == 3:
+                self.samples.append(self.epoch, self.values["segments_received"], self.values["segments_sent"],
+                                    self.values["segments_retransmitted"])
+            else:
+                self.rejected += 1
+        self.values = {}
+
+def analyze_netstat_files(directory, jobs=1, window=None, results=None):
+    # Rates come from counter deltas between consecutive blocks, across file
+    # boundaries too; intervals sending fewer than NETSTAT_MIN_SEGMENTS are
+    # too small for a meaningful percentage and never flagged.
+    print("\n========📡 Analyzing TCP retransmits (netstat) ========\n")
+    text = results is None or results.text
+    previous = None
+    intervals = resets = flagged = 0
+    sent_total = retransmitted_total = 0
+    peak = None
+    for samples in map_source_files("oswnetstat", directory, jobs, window):
+        rows = []
+        for epoch, _, sent, retransmitted in samples.rows():
+            if epoch < 0:
+                continue
+            if previous is not None and epoch <= previous[0]:
+                continue
+            if previous is not None:
+                start, sent_delta, retransmitted_delta = previous[0], sent - previous[1], retransmitted - previous[2]
+                if sent_delta < 0 or retransmitted_delta < 0:
+                    resets += 1  # counters restart at reboot
+                else:
+                    intervals += 1
+                    sent_total += sent_delta
+                    retransmitted_total += retransmitted_delta
+                    pct = retransmitted_delta / sent_delta * 100 if sent_delta else 0.0
+                    per_second = retransmitted_delta / (epoch - start)
+                    high = sent_delta >= NETSTAT_MIN_SEGMENTS and pct >= NETSTAT_RETRANS_PCT
+                    if high:
+                        flagged += 1
+                        if text:
+                            if flagged == 1:
+                                print(f"⚠️  Intervals retransmitting {NETSTAT_RETRANS_PCT}% of TCP segments or more:\n")
+                            print(f"  [{format_epoch(start)} → {format_epoch(epoch)}] {pct:.2f}% "
+                                  f"({retransmitted_delta} of {sent_delta} segments, {per_second:.1f}/s)")
+                    if sent_delta >= NETSTAT_MIN_SEGMENTS and (peak is None or pct > peak[0]):
+                        peak = (pct, start, epoch, retransmitted_delta, sent_delta)
+                    rows.append((start, epoch, sent_delta, retransmitted_delta, pct, per_second, high))
+            previous = (epoch, sent, retransmitted)
+        if results and rows:
+            results.write("netstat_intervals", record_columns(
+                ["start_epoch", "end_epoch", "segments_sent", "segments_retransmitted", "retrans_pct",
+                 "retrans_per_s", "high"], rows))
+
+    if previous is None:
+        print("❌ No TCP segment counters found in netstat -s output.")
+        return 0
+    if flagged:
+        print(f"\n🔍 Total intervals at or above {NETSTAT_RETRANS_PCT}%: {flagged}")
+    else:
+        print(f"✅ No interval retransmitted {NETSTAT_RETRANS_PCT}% of TCP segments or more.")
+    overall = retransmitted_total / sent_total * 100 if sent_total else 0.0
+    print(f"\n📊 {intervals} intervals: {retransmitted_total} of {sent_total} segments retransmitted ({overall:.3f}%)")
+    if peak:
+        pct, start, end, retransmitted_delta, sent_delta = peak
+        print(f"🔺 Peak: {pct:.2f}% ({retransmitted_delta} of {sent_delta} segments) "
+              f"from {format_epoch(start)} to {format_epoch(end)}")
+    if resets:
+        print(f"ℹ️  Counters went backwards {resets} times (reboot); those intervals are left out.")
+    return flagged
+
+IOSTAT_TIMELINE_SCHEMA = (("epoch", "q"), ("iowait", "d"), ("max_util", "d"))
+
+@profiled("parse oswiostat timeline")
+def parse_oswiostat_timeline_file(filepath, span=None):
+    # One row per zzz block: avg-cpu %iowait and the busiest device's %util
+    # (NaN when the block has no such line).
+    samples = TimeSeries(IOSTAT_TIMELINE_SCHEMA)
+    lines = iter_osw_lines(filepath, span)
+    epoch = -1
+    iowait = max_util = math.nan
+    for line in lines:
+        line = line.strip()
+        if line.startswith('zzz') or line.startswith('***'):
+            if epoch >= 0 and not (math.isnan(iowait) and math.isnan(max_util)):
+                samples.append(epoch, iowait, max_util)
+            epoch = parse_osw_timestamp(line.split('***')[-1].strip())
+            iowait = max_util = math.nan
+            continue
+
+        if line.startswith('avg-cpu:'):
+            parts = next(lines, "").split()
+            if len(parts) >= 4:
+                with contextlib.suppress(ValueError):
+                    iowait = float(parts[3])
+            continue
+
+        parts = line.split()
+        if line.startswith('Device') or len(parts) < 14:
+            continue
+        with contextlib.suppress(ValueError):
+            util = float(parts[-1])
+            if math.isnan(max_util) or util > max_util:
+                max_util = util
+
+    if epoch >= 0 and not (math.isnan(iowait) and math.isnan(max_util)):
+        samples.append(epoch, iowait, max_util)
+    profile_count(samples=len(samples))
+    return samples
+
+def parse_oswtop_load_file(filepath, span=None):
+    return scan_oswtop_file(filepath, (OswtopLoadConsumer,), span)[0][1]
+
+# Joined timeline columns: (metric, subdirectory, parser, cache kind, column).
+TIMELINE_SOURCES = (
+    ("load_1m", "oswtop", parse_oswtop_load_file, "oswtop.load", "load_1m"),
+    ("r", "oswvmstat", VmstatSource.parse, "oswvmstat", "r"),
+    ("b", "oswvmstat", VmstatSource.parse, "oswvmstat", "b"),
+    ("mem_used_pct", "oswmeminfo", MeminfoSource.parse, "oswmeminfo", "used_pct"),
+    ("iowait", "oswiostat", parse_oswiostat_timeline_file, "oswiostat.timeline", "iowait"),
+    ("max_util", "oswiostat", parse_oswiostat_timeline_file, "oswiostat.timeline", "max_util"),
+)
+TIMELINE_IOWAIT_LIMIT = 20.0
+DEFAULT_GRID_SECONDS = 60
+
+def timeline_limits(cores):
+    # Values above these are abnormal in the timeline and in follow mode.
+    return {
+        "load_1m": 0.75 * cores if cores else None,
+        "r": cores,
+        "mem_used_pct": 75,
+        "iowait": TIMELINE_IOWAIT_LIMIT,
+        "max_util": IOSTAT_HOT_UTIL,
+    }
+
+def iter_series_samples(samples, metrics):
+    columns = [(metric, samples.column(column)) for metric, column in metrics]
+    for i, epoch in enumerate(samples.column("epoch")):
+        if epoch < 0:
+            continue
+        for metric, values in columns:
+            value = values[i]
+            if value == value:  # skips NaN
+                yield epoch, metric, value
+
+def iter_metric_samples(directory, parse_file, cache_kind, metrics, jobs=1, window=None):
+    # (epoch, metric, value) in time order, one file at a time, so a stream
+    # never holds more than one parsed file.
+    for samples in map_osw_files(parse_file, directory, jobs, cache_kind, window):
+        yield from iter_series_samples(samples, metrics)
+
+def iter_timeline_rows(streams, step):
+    # k-way merge of the per-metric streams onto a step-second grid; several
+    # samples of one metric in a grid cell keep the highest.
+    bucket = None
+    row = {}
+    for epoch, metric, value in heapq.merge(*streams):
+        cell = epoch - epoch % step
+        if cell != bucket:
+            if row:
+                yield bucket, row
+            bucket = cell
+            row = {}
+        if metric not in row or value > row[metric]:
+            row[metric] = value
+    if row:
+        yield bucket, row
+
+class Timeline:
+    # The joined metric grid of one archive. rows() streams (bucket, row,
+    # abnormal metrics) and collects the windows where two or more metrics
+    # are abnormal in consecutive grid cells.
+    def __init__(self, archive_dir, manifest, jobs=1, window=None):
+        cores = manifest["cpu_cores"]
+        self.step = manifest.get("snap_interval") or DEFAULT_GRID_SECONDS
+        self.limits = timeline_limits(cores)
+        self.metrics = [metric for metric, *_ in TIMELINE_SOURCES]
+        self.windows = []
+
+        # One stream per source file set; metrics read from the same files share it.
+        sources = {}
+        for metric, subdir, parse_file, cache_kind, column in TIMELINE_SOURCES:
+            sources.setdefault((subdir, parse_file, cache_kind), []).append((metric, column))
+        found = []
+        self.missing = []
+        for (subdir, parse_file, cache_kind), source_metrics in sources.items():
+            directory = os.path.join(archive_dir, subdir)
+            if osw_isdir(directory):
+                found.append((directory, parse_file, cache_kind, source_metrics))
+            else:
+                self.missing.append((subdir, [metric for metric, _ in source_metrics]))
+        # The streams are read side by side, so they split the jobs.
+        self.streams = [iter_metric_samples(*source, stream_jobs, window)
+                        for source, stream_jobs in zip(found, split_jobs(jobs, len(found)))]
+
+    def rows(self):
+        current = None
+        for bucket, row in iter_timeline_rows(self.streams, self.step):
+            abnormal = [metric for metric in self.metrics
+                        if metric in row and self.limits.get(metric) is not None and row[metric] > self.limits[metric]]
+            yield bucket, row, abnormal
+
+            if len(abnormal) >= 2:
+                if current is not None and bucket == current["end"] + self.step:
+                    current["end"] = bucket
+                    current["rows"] += 1
+                else:
+                    current = {"start": bucket, "end": bucket, "rows": 1, "peaks": {}}
+                    self.windows.append(current)
+                for metric in abnormal:
+                    current["peaks"][metric] = max(current["peaks"].get(metric, row[metric]), row[metric])
+            else:
+                current = None
+
+def correlate_timeline(archive_dir, manifest, jobs=1, window=None, results=None):
+    timeline = Timeline(archive_dir, manifest, jobs, window)
+    text = results is None or results.text
+    step = timeline.step
+    limits = timeline.limits
+    metrics = timeline.metrics
+
+    print(f"\n========🔗 Timeline correlation ({step}s grid) =========\n")
+    print("Abnormal (*) when above: " + ", ".join(f"{metric} {limit:g}" for metric, limit in limits.items() if limit is not None))
+    for subdir, missing_metrics in timeline.missing:
+        print(f"⚠️ {subdir} not found; {', '.join(missing_metrics)} left empty")
+
+    print("\n" + f"{'time':<19}  " + "  ".join(f"{metric:>13}" for metric in metrics))
+    grid = {"epoch": [], **{metric: [] for metric in metrics}, "abnormal": []}
+    for bucket, row, abnormal in timeline.rows():
+        if results:
+            grid["epoch"].append(bucket)
+            for metric in metrics:
+                grid[metric].append(row.get(metric, math.nan))
+            grid["abnormal"].append(",".join(abnormal))
+            if len(grid["epoch"]) >= RESULT_BATCH_ROWS:
+                results.write("timeline_grid", grid)
+                grid = {name: [] for name in grid}
+        if not text:
+            continue
+        cells = []
+        for metric in metrics:
+            cell = f"{row[metric]:.2f}{'*' if metric in abnormal else ' '}" if metric in row else "- "
+            cells.append(f"{cell:>13}")
+        print(f"{format_epoch(bucket):<19}  " + "  ".join(cells))
+    if results and grid["epoch"]:
+        results.write("timeline_grid", grid)
+
+    print("\n========🚨 Windows with several abnormal metrics at once =========\n")
+    if not timeline.windows:
+        print("✅ No windows where several metrics were abnormal at once.")
+    for w in timeline.windows:
+        peaks = ", ".join(f"{metric} peak {peak:.2f} (> {limits[metric]:g})" for metric, peak in w["peaks"].items())
+        print(f"{format_epoch(w['start'])} → {format_epoch(w['end'] + step)} ({w['rows']} intervals): {peaks}")
+    if results:
+        results.write("timeline_windows", record_columns(
+            ["start_epoch", "end_epoch", "intervals", "metrics"] + [f"{metric}_peak" for metric in metrics],
+            ((w["start"], w["end"] + step, w["rows"], ",".join(w["peaks"]),
+              *(w["peaks"].get(metric, math.nan) for metric in metrics)) for w in timeline.windows)))
+    return len(timeline.windows)
+
+@profiled("fleet summary")
+def summarize_host(archive_dir, manifest, window=None):
+    # The per-host figures the fleet report compares, from one timeline pass.
+    timeline = Timeline(archive_dir, manifest, 1, window)
+    summary = {"peak_load": None, "peak_load_at": None, "r_saturated": 0, "intervals": 0}
+    for bucket, row, abnormal in timeline.rows():
+        summary["intervals"] += 1
+        load = row.get("load_1m")
+        if load is not None and (summary["peak_load"] is None or load > summary["peak_load"]):
+            summary["peak_load"] = load
+            summary["peak_load_at"] = bucket
+        if "r" in abnormal:
+            summary["r_saturated"] += 1
+    summary["windows"] = [(w["start"], w["end"] + timeline.step, sorted(w["peaks"])) for w in timeline.windows]
+    return summary
+
+# Anomalies are judged against each metric's own recent past rather than
+# fixed limits: the baseline is the previous hour, trends are fitted over 15
+# minutes, and the EWMA follows the level with a 5 minute time constant.
+ANOMALY_BASELINE_SECONDS = 3600
+ANOMALY_TREND_SECONDS = 900
+ANOMALY_EWMA_SECONDS = 300
+ANOMALY_MIN_BASELINE = 30
+ANOMALY_Z = 4.0
+ANOMALY_EWMA_L = 3.0
+ANOMALY_TREND_R2 = 0.6
+ANOMALY_GAP_SECONDS = 120
+ANOMALY_KINDS = ("spike", "shift", "rising")
+
+@functools.lru_cache(maxsize=1024)
+def ewma_smoothing(seconds):
+    # EWMA factor for a step of `seconds`; a shared timestamp (vmstat's
+    # samples within one snapshot) still counts as one second.
+    return 1 - math.exp(-max(seconds, 1) / ANOMALY_EWMA_SECONDS)
+
+def anomaly_floors(cores):
+    # Smallest rise above the baseline worth reporting, so jitter on a flat,
+    # idle series is not flagged however small its variance.
+    return {
+        "load_1m": 0.25 * cores if cores else 1.0,
+        "r": max(cores / 4, 2) if cores else 2,
+        "b": 2,
+        "mem_used_pct": 5.0,
+        "iowait": 5.0,
+        "max_util": 20.0,
+    }
+
+class AnomalyDetector:
+    # Streaming anomaly detection for one metric, O(1) per sample. Every
+    # sample is compared with the baseline of the samples before it:
+    #   spike  - the sample is ANOMALY_Z standard deviations above the
+    #            baseline mean and above its p95,
+    #   shift  - the EWMA has moved ANOMALY_EWMA_L of its own standard
+    #            deviations above the baseline mean (a sustained step that no
+    #            single sample gives away),
+    #   rising - the trend window fits a rising line (r² >= ANOMALY_TREND_R2).
+    # All three also need the rise to reach the metric's floor. Flagged
+    # samples up to ANOMALY_GAP_SECONDS apart form one episode, so a single
+    # noisy sample does not split it.
+    def __init__(self, metric, floor):
+        self.metric = metric
+        self.floor = floor
+        self.baseline = RollingWindow(ANOMALY_BASELINE_SECONDS, quantile=0.95)
+        self.trend = RollingWindow(ANOMALY_TREND_SECONDS)
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+        self.ewma = None
+        self.last_epoch = None
+        self.open = {}
+        self.episodes = []
+
+    def add(self, epoch, value):
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            self.ewma += ewma_smoothing(epoch - self.last_epoch) * (value - self.ewma)
+        self.last_epoch = epoch
+        self.trend.add(epoch, value)
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        baseline = self.baseline
+        n = len(baseline)
+        if n >= ANOMALY_MIN_BASELINE:
+            flags = {}
+            mean = baseline.mean
+            std = baseline.std()
+            p95 = baseline.quantile.value()
+            rise = value - mean
+            if rise >= self.floor and rise >= ANOMALY_Z * std and value > p95:
+                flags["spike"] = rise / std if std else math.inf
+            # Standard deviation of an EWMA of independent samples, with the
+            # smoothing factor of the baseline's average sample spacing.
+            shift = self.ewma - mean
+            if shift >= self.floor:
+                alpha = ewma_smoothing(round((baseline.samples[-1][0] - baseline.samples[0][0]) / (n - 1)))
+                ewma_std = std * math.sqrt(alpha / (2 - alpha))
+                if shift >= ANOMALY_EWMA_L * ewma_std:
+                    flags["shift"] = shift / ewma_std if ewma_std else math.inf
+            slope, r2 = self.trend.slope()
+            if r2 >= ANOMALY_TREND_R2 and slope * ANOMALY_TREND_SECONDS >= self.floor:
+                flags["rising"] = slope * 3600
+            if flags or self.open:
+                for kind in ANOMALY_KINDS:
+                    self.track(kind, epoch, value, flags.get(kind), mean, std, p95)
+        baseline.add(epoch, value)
+
+    def track(self, kind, epoch, value, score, mean, std, p95):
+        episode = self.open.get(kind)
+        if episode is not None and epoch - episode["end"] > ANOMALY_GAP_SECONDS:
+            del self.open[kind]
+            episode = None
+        if score is None:
+            return
+        if episode is None:
+            episode = self.open[kind] = {"metric": self.metric, "kind": kind, "start": epoch, "end": epoch,
+                                         "samples": 0, "peak": value, "score": score,
+                                         "mean": mean, "std": std, "p95": p95}
+            self.episodes.append(episode)
+        episode["end"] = epoch
+        episode["samples"] += 1
+        episode["peak"] = max(episode["peak"], value)
+        episode["score"] = max(episode["score"], score)
 
+@profiled("detect anomalies")
+def detect_source_anomalies(directory, parse_file, cache_kind, source_metrics, floors, jobs=1, window=None):
+    # Runs the detectors of the metrics read from one set of files.
+    detectors = {metric: AnomalyDetector(metric, floors[metric]) for metric, _ in source_metrics}
+    for epoch, metric, value in iter_metric_samples(directory, parse_file, cache_kind, source_metrics, jobs, window):
+        detectors[metric].add(epoch, value)
+    return detectors
+
+def detect_anomalies(archive_dir, manifest, jobs=1, window=None, results=None):
+    cores = manifest["cpu_cores"]
+    floors = anomaly_floors(cores)
+
+    print(f"\n========📈 Anomaly detection (baseline {ANOMALY_BASELINE_SECONDS // 60} min, "
+          f"trend {ANOMALY_TREND_SECONDS // 60} min, EWMA {ANOMALY_EWMA_SECONDS // 60} min) =========\n")
+    print(f"spike: z >= {ANOMALY_Z:g} and above the baseline p95; shift: EWMA >= {ANOMALY_EWMA_L:g} sd above the "
+          f"baseline mean; rising: linear fit with r² >= {ANOMALY_TREND_R2:g}")
+    print("Minimum rise: " + ", ".join(f"{metric} {floor:g}" for metric, floor in floors.items()))
+
+    sources = {}
+    for metric, subdir, parse_file, cache_kind, column in TIMELINE_SOURCES:
+        sources.setdefault((subdir, parse_file, cache_kind), []).append((metric, column))
+    found = []
+    for (subdir, parse_file, cache_kind), source_metrics in sources.items():
+        directory = os.path.join(archive_dir, subdir)
+        if osw_isdir(directory):
+            found.append((directory, parse_file, cache_kind, source_metrics))
+        else:
+            print(f"⚠️ {subdir} not found; {', '.join(metric for metric, _ in source_metrics)} not checked")
+
+    # The sources are independent, so with several jobs each gets a worker
+    # and splits the rest of the jobs for parsing its files.
+    workers, source_jobs = pool_jobs(jobs, len(found))
+    detectors = {}
+    for source_detectors in parallel_map(detect_source_anomalies, *zip(*found), [floors] * len(found),
+                                         source_jobs, [window] * len(found), jobs=workers):
+        detectors.update(source_detectors)
+
+    episodes = []
+    for detector in (detectors[metric] for metric, *_ in TIMELINE_SOURCES if metric in detectors):
+        if not detector.count:
+            continue
+        baseline = detector.baseline
+        print(f"\n{detector.metric}: {detector.count} samples, avg {detector.total / detector.count:.2f} "
+              f"max {detector.max:.2f}; at the end: "
+              f"baseline mean {baseline.mean:.2f} sd {baseline.std():.2f} p95 {baseline.quantile.value():.2f}, "
+              f"EWMA {detector.ewma:.2f}")
+        if not detector.episodes:
+            print("  ✅ No anomalies against the rolling baseline.")
+        for episode in sorted(detector.episodes, key=lambda e: (e["start"], ANOMALY_KINDS.index(e["kind"]))):
+            score = (f"{episode['score']:+.2f}/h" if episode["kind"] == "rising"
+                     else f"{episode['score']:.1f} sd" if episode["score"] != math.inf else "flat baseline")
+            print(f"  🚨 {episode['kind']:<6} {format_epoch(episode['start'])} → {format_epoch(episode['end'])} "
+                  f"({episode['samples']} samples): peak {episode['peak']:.2f} vs baseline {episode['mean']:.2f} "
+                  f"(sd {episode['std']:.2f}, p95 {episode['p95']:.2f}), {score}")
+        episodes.extend(detector.episodes)
+
+    print(f"\nTotal: {len(episodes)} anomaly episodes")
+    if results:
+        results.write("anomalies", record_columns(
+            ["metric", "kind", "start_epoch", "end_epoch", "samples", "peak_value",
+             "baseline_mean", "baseline_sd", "baseline_p95", "score"],
+            ((e["metric"], e["kind"], e["start"], e["end"], e["samples"], e["peak"], e["mean"], e["std"], e["p95"],
+              e["score"] if e["score"] != math.inf else math.nan) for e in episodes)))
+    return len(episodes)
+
+# name: (source subdirectory, report file, label). Analyses sharing a source
+# directory run as one task so oswtop is scanned once for cpu and dstate;
+# None marks an analysis that reads several subdirectories.
+ANALYSES = {
+    "cpu": ("oswtop", "cpu_analysis.txt", "CPU analysis"),
+    "memory": ("oswmeminfo", "memory_analysis.txt", "Memory analysis"),
+    "vmstat": ("oswvmstat", "vmstat_analysis.txt", "vmstat analysis"),
+    "dstate": ("oswtop", "dstate_and_high_resource_processes.txt", "D-state and High Resource Process analysis"),
+    "iostat": ("oswiostat", "disk and iowait details.txt", "DIOwait and disk analysis"),
+    "mpstat": ("oswmpstat", "mpstat_cpu_imbalance.txt", "Per-CPU imbalance analysis"),
+    "ps": ("oswps", "ps_memory_growth.txt", "Process memory growth analysis"),
+    "netstat": ("oswnetstat", "netstat_retransmits.txt", "TCP retransmit analysis"),
+    "timeline": (None, "timeline_correlation.txt", "Timeline correlation"),
+    "anomalies": (None, "anomaly_detection.txt", "Anomaly detection"),
+}
+
+# Menu numbers stay as users learned them: 6 has always been Exit, so later
+# analyses are numbered after it.
+MENU_EXIT = "6"
+MENU_ANALYSES = {"1": "cpu", "2": "memory", "3": "vmstat", "4": "dstate", "5": "iostat", "7": "timeline",
+                 "8": "anomalies", "9": "mpstat", "10": "ps", "11": "netstat"}
+
+# Not every archive has these subdirectories, so "all" skips them quietly
+# when they are missing instead of failing the run.
+OPTIONAL_ANALYSES = ("mpstat", "ps", "netstat")
+
+MANIFEST_NAME = "osw_manifest.json"
+MANIFEST_VERSION = 3
+OSW_HOST_PATTERN = re.compile(r"^(.+)_[a-z]+_\d{2}\.\d{2}\.\d{2}\.\d{4}\.dat")
+
+def iter_osw_head(filepath, blocks=1):
+    # Lines up to the end of the first `blocks` zzz blocks, preamble included.
+    seen = 0
+    for line in iter_osw_lines(filepath):
+        if line.startswith("zzz "):
+            seen += 1
+            if seen > blocks:
+                return
+        yield line
+
+def inventory_archive(archive_dir):
+    # {subdirectory: [[filename, size, mtime_ns], ...]} for every osw* data
+    # subdirectory; our own results directory is not part of the archive.
+    inventory = {}
+    for name in sorted(osw_listdir(archive_dir)):
+        directory = os.path.join(archive_dir, name)
+        if name.startswith("osw") and name != RESULTS_DIR_NAME and osw_isdir(directory):
+            files = []
+            for filename in list_osw_files(directory):
+                with contextlib.suppress(OSError):
+                    files.append([filename, *osw_stat(os.path.join(directory, filename))])
+            inventory[name] = files
+    return inventory
+
+def build_manifest(archive_dir, inventory):
+    # Reads only the start of the first file per subdirectory (and the vmstat
+    # preambles), never whole files, unless VCPUS is missing from every preamble.
+    manifest = {"version": MANIFEST_VERSION, "inventory": inventory, "host": None, "cpu_cores": None,
+                "snap_interval": None, "mem_total_kb": None, "start": None, "end": None, "subdirs": {}}
+    for name, files in inventory.items():
+        compression = {}
+        for filename, _, _ in files:
+            suffix = osw_file_suffix(filename)
+            compression[suffix] = compression.get(suffix, 0) + 1
+        hours = [hour for hour in (file_hour_epoch(filename) for filename, _, _ in files) if hour is not None]
+        start = None
+        if files:
+            for line in iter_osw_head(os.path.join(archive_dir, name, files[0][0])):
+                if line.startswith("zzz "):
+                    epoch = parse_osw_timestamp(line.strip().replace("zzz ", "").replace("***", ""))
+                    start = epoch if epoch >= 0 else None
+        if start is None and hours:
+            start = min(hours)
+        manifest["subdirs"][name] = {
+            "files": len(files),
+            "bytes": sum(size for _, size, _ in files),
+            "compression": compression,
+            "start": start,
+            "end": max(hours) + 3600 if hours else None,
+        }
+
+    for files in inventory.values():
+        match = OSW_HOST_PATTERN.match(files[0][0]) if files else None
+        if match:
+            manifest["host"] = match.group(1)
+            break
+    if manifest["host"] is None:
+        manifest["host"] = os.path.basename(os.path.abspath(archive_location(archive_dir)))
+
+    starts = [info["start"] for info in manifest["subdirs"].values() if info["start"] is not None]
+    ends = [info["end"] for info in manifest["subdirs"].values() if info["end"] is not None]
+    manifest["start"] = min(starts) if starts else None
+    manifest["end"] = max(ends) if ends else None
+
+    vmstat_dir = os.path.join(archive_dir, "oswvmstat")
+    for filename, _, _ in inventory.get("oswvmstat", []):
+        for line in iter_osw_head(os.path.join(vmstat_dir, filename), blocks=0):
+            for key, field in (("VCPUS", "cpu_cores"), ("SNAP_INTERVAL", "snap_interval")):
+                if line.startswith(key) and manifest[field] is None:
+                    with contextlib.suppress(IndexError, ValueError):
+                        manifest[field] = int(line.strip().split()[1])
+        if manifest["cpu_cores"] is not None:
+            break
+    if manifest["cpu_cores"] is None and inventory.get("oswvmstat"):
+        manifest["cpu_cores"] = find_cpu_cores(vmstat_dir)
+
+    meminfo_files = inventory.get("oswmeminfo")
+    if meminfo_files:
+        for line in iter_osw_head(os.path.join(archive_dir, "oswmeminfo", meminfo_files[0][0])):
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] == "MemTotal:":
+                with contextlib.suppress(ValueError):
+                    manifest["mem_total_kb"] = int(parts[1])
+                    break
+    return manifest
+
+def load_manifest(archive_dir):
+    # The manifest is saved in the archive directory and reused while the
+    # file inventory (names, sizes, mtimes) is unchanged.
+    inventory = inventory_archive(archive_dir)
+    manifest_path = os.path.join(archive_output_dir(archive_dir), MANIFEST_NAME)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and manifest.get("inventory") == inventory:
+            return manifest
+    except (OSError, ValueError):
+        pass
+
+    manifest = build_manifest(archive_dir, inventory)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+    except OSError as e:
+        print(f"⚠️ Could not save archive manifest: {e}", file=sys.stderr)
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+    return manifest
+
+def print_manifest_summary(manifest):
+    total_files = sum(info["files"] for info in manifest["subdirs"].values())
+    print(f"📦 Archive of {manifest['host']}: {total_files} files in {len(manifest['subdirs'])} subdirectories, "
+          f"{format_epoch(manifest['start'])} → {format_epoch(manifest['end'])}")
+    cores = manifest["cpu_cores"] if manifest["cpu_cores"] is not None else "unknown"
+    memory = f"{manifest['mem_total_kb'] / (1024 * 1024):.2f} GB" if manifest["mem_total_kb"] else "unknown"
+    print(f"   CPU cores (VCPUS): {cores}, MemTotal: {memory}")
+    for name, info in manifest["subdirs"].items():
+        formats = ", ".join(f"{count} {suffix}" for suffix, count in sorted(info["compression"].items()))
+        print(f"   {name}: {info['files']} files ({formats or 'none'}), {info['bytes'] / (1024 * 1024):.1f} MB, "
+              f"{format_epoch(info['start'])} → {format_epoch(info['end'])}")
+
+RESULTS_DIR_NAME = "osw_results"
+RESULT_BATCH_ROWS = 10000
+
+class ResultWriter:
+    # Writes result tables, given as {column: sequence of values}, to one
+    # file per table in the results directory. Later writes to a table
+    # append to it; rows are encoded and written RESULT_BATCH_ROWS at a time.
+    extension = None
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {}
+
+    def path(self, table):
+        return os.path.join(self.directory, f"{table}.{self.extension}")
+
+    def write(self, table, columns):
+        if table not in self.tables:
+            self.tables[table] = self.open_table(table, list(columns))
+        self.write_columns(self.tables[table], columns)
+
+    def close(self):
+        for handle in self.tables.values():
+            self.close_table(handle)
+        self.tables = {}
+
+    def close_table(self, handle):
+        handle.close()
+
+def iter_row_batches(columns):
+    # NaN becomes None (JSON null, empty CSV cell).
+    rows = zip(*columns.values())
+    while True:
+        batch = [[None if value != value else value for value in row]
+                 for row in itertools.islice(rows, RESULT_BATCH_ROWS)]
+        if not batch:
+            return
+        yield batch
+
+class JsonlResultWriter(ResultWriter):
+    extension = "jsonl"
+
+    def open_table(self, table, names):
+        return open(self.path(table), "w"), names
+
+    def write_columns(self, handle, columns):
+        f, names = handle
+        for batch in iter_row_batches(columns):
+            f.write("".join(json.dumps(dict(zip(names, row))) + "\n" for row in batch))
+
+    def close_table(self, handle):
+        handle[0].close()
+
+class CsvResultWriter(ResultWriter):
+    extension = "csv"
+
+    def open_table(self, table, names):
+        f = open(self.path(table), "w", newline="")
+        writer = csv.writer(f)
+        writer.writerow(names)
+        return f, writer
+
+    def write_columns(self, handle, columns):
+        for batch in iter_row_batches(columns):
+            handle[1].writerows(batch)
+
+    def close_table(self, handle):
+        handle[0].close()
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+def npy_column(values):
+    # (dtype descr, raw little-endian data) of one column in .npy layout;
+    # strings become fixed-width unicode so files load without pickle.
+    if not isinstance(values, array):
+        if any(isinstance(value, str) for value in values):
+            strings = ["" if value is None else str(value) for value in values]
+            width = max(map(len, strings), default=0) or 1
+            return f"<U{width}", "".join(string.ljust(width, "\0") for string in strings).encode("utf-32-le")
+        if values and all(isinstance(value, bool) for value in values):
+            return "|b1", bytes(values)
+        if all(isinstance(value, int) for value in values):
+            values = array("q", values)
+        else:
+            values = array("d", (math.nan if value is None else value for value in values))
+    kind = "f" if values.typecode in "fd" else "u" if values.typecode in "BHILQ" else "i"
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return f"<{kind}{values.itemsize}", values.tobytes()
+
+def npy_bytes(values):
+    descr, data = npy_column(values)
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({len(values)},), }}".encode("latin1")
+    # The header is padded so the data starts 64-byte aligned.
+    header += b" " * (-(len(NPY_MAGIC) + 2 + len(header) + 1) % 64) + b"\n"
+    return NPY_MAGIC + len(header).to_bytes(2, "little") + header + data
+
+class NpzResultWriter(ResultWriter):
+    # One .npz (numpy.load-able zip of .npy arrays, one per column) per
+    # table, written on close since the format cannot be appended to. Needs
+    # no numpy to write.
+    extension = "npz"
+
+    def open_table(self, table, names):
+        return table, {name: None for name in names}
+
+    def write_columns(self, handle, columns):
+        _, collected = handle
+        for name, values in columns.items():
+            current = collected[name]
+            if current is None:
+                collected[name] = array(values.typecode, values) if isinstance(values, array) else list(values)
+            elif isinstance(current, array) and isinstance(values, array) and current.typecode == values.typecode:
+                current.extend(values)
+            else:
+                collected[name] = list(current) + list(values)
+
+    def close_table(self, handle):
+        table, collected = handle
+        with zipfile.ZipFile(self.path(table), "w", zipfile.ZIP_STORED) as zf:
+            for name, values in collected.items():
+                zf.writestr(f"{name}.npy", npy_bytes(values if values is not None else []))
+
+class ParquetResultWriter(ResultWriter):
+    # Each write becomes one row group. pyarrow is imported only when this
+    # format is requested.
+    extension = "parquet"
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+
+    def open_table(self, table, names):
+        return [self.path(table), None]
+
+    def write_columns(self, handle, columns):
+        arrays = {name: self.pa.array(list(values)) for name, values in columns.items()}
+        batch = self.pa.table(arrays)
+        if handle[1] is None:
+            handle[1] = self.pq.ParquetWriter(handle[0], batch.schema)
+        handle[1].write_table(batch.cast(handle[1].schema))
+
+    def close_table(self, handle):
+        if handle[1] is not None:
+            handle[1].close()
+
+RESULT_WRITERS = {"jsonl": JsonlResultWriter, "csv": CsvResultWriter,
+                  "npz": NpzResultWriter, "parquet": ParquetResultWriter}
+RESULT_FORMATS = ("text", *RESULT_WRITERS)
+
+class ResultSink:
+    # What the analyses of one archive write their structured results to.
+    # text tells them whether the text report is rendered as well; when it
+    # is not, they skip their per-sample report lines.
+    def __init__(self, archive_dir, formats):
+        self.text = "text" in formats
+        self.directory = os.path.join(archive_output_dir(archive_dir), RESULTS_DIR_NAME)
+        formats = [result_format for result_format in formats if result_format != "text"]
+        if formats:
+            os.makedirs(self.directory, exist_ok=True)
+        self.writers = [RESULT_WRITERS[result_format](self.directory) for result_format in formats]
+
+    def write(self, table, columns):
+        with profile_stage(f"write {table}"):
+            for writer in self.writers:
+                writer.write(table, columns)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+def parse_formats(text):
+    # Validated list of output formats, or raises ValueError.
+    formats = [name.strip() for name in text.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in RESULT_FORMATS]
+    if unknown or not formats:
+        raise ValueError(f"unknown formats: {', '.join(unknown) or text} (choose from {', '.join(RESULT_FORMATS)})")
+    if "parquet" in formats and importlib.util.find_spec("pyarrow") is None:
+        raise ValueError("parquet output needs pyarrow")
+    return formats
+
+def write_report(output_path, report, *args):
+    with open(output_path, "w") as f, contextlib.redirect_stdout(f):
+        return report(*args)
+
+def run_analysis_group(archive_dir, names, manifest, jobs=1, window=None, formats=("text",)):
+    # Runs analyses that read the same subdirectory and writes their reports
+    # in the requested formats. Returns [(name, output_path, findings), ...];
+    # output_path is the results directory when no text report is written.
+    sink = ResultSink(archive_dir, formats) if list(formats) != ["text"] else None
+    try:
+        return run_analyses(archive_dir, names, manifest, jobs, window, sink)
+    finally:
+        if sink:
+            sink.close()
+
+def run_analyses(archive_dir, names, manifest, jobs, window, sink):
+    cpu_cores = manifest["cpu_cores"]
+    if sink is None or sink.text:
+        output_dir = archive_output_dir(archive_dir)
+        output_paths = {name: os.path.join(output_dir, ANALYSES[name][1]) for name in names}
+        report_paths = output_paths
+    else:
+        output_paths = {name: sink.directory for name in names}
+        report_paths = {name: os.devnull for name in names}
+    results = []
+    if ANALYSES[names[0]][0] is None:
+        name = names[0]
+        report = {"timeline": correlate_timeline, "anomalies": detect_anomalies}[name]
+        with profile_stage(f"analysis {name}"):
+            findings = write_report(report_paths[name], report, archive_dir, manifest, jobs, window, sink)
+        return [(name, output_paths[name], findings)]
+
+    source_dir = os.path.join(archive_dir, ANALYSES[names[0]][0])
+
+    if ANALYSES[names[0]][0] == "oswtop":
+        consumers = {}
+        if "cpu" in names:
+            consumers["cpu"] = [OswtopLoadConsumer(cpu_cores, 0.75 * cpu_cores)]
+        if "dstate" in names:
+            consumers["dstate"] = [OswtopDStateConsumer(), OswtopProcessConsumer()]
+        with profile_stage(f"scan oswtop for {', '.join(consumers)}"):
+            scan_oswtop(source_dir, [consumer for group in consumers.values() for consumer in group], jobs, window)
+        reporters = {"cpu": OswtopLoadConsumer.report, "dstate": report_oswtop_data}
+        for name, group in consumers.items():
+            with profile_stage(f"analysis {name}"):
+                findings = write_report(report_paths[name], reporters[name], *group, sink)
+            results.append((name, output_paths[name], findings))
+        return results
+
+    for name in names:
+        with profile_stage(f"analysis {name}"):
+            if name == "memory":
+                findings = write_report(report_paths[name], process_oswmeminfo_files, source_dir, jobs, window,
+                                        manifest["mem_total_kb"], sink)
+            elif name == "vmstat":
+                findings = write_report(report_paths[name], process_oswvmstat_files, source_dir, cpu_cores, jobs,
+                                        window, sink)
+            else:
+                report = {"iostat": analyze_iostat_files, "mpstat": analyze_mpstat_files, "ps": analyze_ps_files,
+                          "netstat": analyze_netstat_files}[name]
+                findings = write_report(report_paths[name], report, source_dir, jobs, window, sink)
+        results.append((name, output_paths[name], findings))
+    return results
+
+def group_analyses(archive_dir, names, manifest, optional=()):
+    # Groups the runnable analyses by source directory; returns (groups,
+    # skipped). Analyses in `optional` whose directory is missing are left
+    # out without counting as skipped.
+    groups = {}
+    skipped = []
+    for name in ANALYSES:
+        if name not in names:
+            continue
+        source = ANALYSES[name][0]
+        if source is None:
+            groups[name] = [name]
+        elif name in optional and not osw_isdir(os.path.join(archive_dir, source)):
+            print(f"ℹ️  No {source} data in {archive_dir}; skipping {name}.")
+        elif not require_osw_dir(os.path.join(archive_dir, source)):
+            skipped.append(name)
+        elif name in ("cpu", "vmstat") and manifest["cpu_cores"] is None:
+            print(f"❌ Could not determine CPU cores from vmstat data; skipping {name}.")
+            skipped.append(name)
+        else:
+            groups.setdefault(source, []).append(name)
+    return list(groups.values()), skipped
+
+def run_batch(archive_dir, names, jobs=1, window=None, formats=("text",), optional=()):
+    # Non-interactive entry point. Exit status: 0 = no findings,
+    # 1 = findings reported, 2 = an analysis could not run.
+    manifest = load_manifest(archive_dir)
+    print_manifest_summary(manifest)
+    if {"cpu", "vmstat"} & set(names) and manifest["cpu_cores"] is not None:
+        print(f"🧠 Detected CPU Cores (VCPUS): {manifest['cpu_cores']}")
+
+    groups, failed = group_analyses(archive_dir, names, manifest, optional)
+    total_findings = 0
+    # Groups run side by side in one worker each when the jobs allow it, else
+    # one after the other here, each with all the jobs for parsing.
+    workers, group_jobs = pool_jobs(jobs, len(groups))
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            runs = [(group, pool_submit(pool, run_analysis_group, archive_dir, group, manifest, share, window,
+                                        formats))
+                    for group, share in zip(groups, group_jobs)]
+        else:
+            runs = [(group, None) for group in groups]
+        for group, future in runs:
+            try:
+                if future is None:
+                    results = run_analysis_group(archive_dir, group, manifest, jobs, window, formats)
+                else:
+                    results = pool_result(future)
+            except Exception as e:
+                print(f"❌ {', '.join(group)} failed: {e}")
+                failed.extend(group)
+                continue
+            for name, output_path, findings in results:
+                total_findings += findings
+                print(f"✅ {ANALYSES[name][2]} written to: {output_path} ({findings} findings)")
+
+    if failed:
+        print(f"❌ Not completed: {', '.join(failed)}")
+        return 2
+    return 1 if total_findings else 0
+
+FLEET_REPORT_NAME = "fleet_summary.txt"
+
+def is_osw_archive(path):
+    return os.path.isdir(path) and any(name.startswith("osw") and name != RESULTS_DIR_NAME
+                                       and os.path.isdir(os.path.join(path, name)) for name in os.listdir(path))
+
+def find_archives(paths):
+    # Each path is an archive, a bundle of archives, or a parent directory of
+    # either.
+    archives = []
+    for path in paths:
+        candidates = [path] if is_bundle_file(path) or is_osw_archive(path) else []
+        if not candidates and os.path.isdir(path):
+            candidates = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        for candidate in candidates:
+            if is_bundle_file(candidate):
                 try:
-                    device = parts[0]
-                    read_kBps = float(parts[5])   # Corrected index
-                    write_kBps = float(parts[6])  # Corrected index
-                    util = float(parts[-1])
-                except ValueError:
-                    continue
+                    archives.extend(bundle_archives(candidate))
+                except OSW_READ_ERRORS as e:
+                    print(f"❌ Cannot read bundle {candidate}: {e}")
+            elif is_osw_archive(candidate):
+                archives.append(candidate)
+    return archives
+
+def report_fleet(labels, manifests, summaries, findings):
+    # Epochs are each host's wall-clock time, so hosts are compared as they
+    # logged; RAC nodes normally share a time zone.
+    archives = list(labels)
+    print(f"\n========🌐 Fleet summary ({len(archives)} hosts) =========\n")
+    print(f"{'host':<24} {'cores':>5} {'peak load':>9} {'per core':>8}  {'peak at':<19} {'r>cores':>7} {'windows':>7}  findings")
+    by_peak = sorted(archives, key=lambda archive: summaries.get(archive, {}).get("peak_load") or 0, reverse=True)
+    for archive in by_peak:
+        summary = summaries.get(archive, {})
+        cores = manifests[archive]["cpu_cores"]
+        peak = summary.get("peak_load")
+        per_core = f"{peak / cores:.2f}" if peak is not None and cores else "-"
+        host_findings = ", ".join(f"{name} {findings[archive][name]}" for name in ANALYSES if name in findings[archive]) or "-"
+        print(f"{labels[archive]:<24} {cores if cores is not None else '-':>5} "
+              f"{f'{peak:.2f}' if peak is not None else '-':>9} {per_core:>8}  "
+              f"{format_epoch(summary.get('peak_load_at')):<19} {summary.get('r_saturated', '-'):>7} "
+              f"{len(summary.get('windows', [])):>7}  {host_findings}")
+
+    print("\nRun-queue saturation (grid intervals with r > CPU cores), most saturated first:")
+    for archive in sorted(archives, key=lambda archive: summaries.get(archive, {}).get("r_saturated", 0), reverse=True):
+        summary = summaries.get(archive)
+        if summary:
+            print(f"  {labels[archive]}: {summary['r_saturated']} of {summary['intervals']} intervals")
+
+    # Sweep the abnormal windows of all hosts in start order and group the
+    # ones that overlap in time.
+    windows = sorted((start, end, labels[archive], metrics) for archive, summary in summaries.items()
+                     for start, end, metrics in summary["windows"])
+    clusters = []
+    for start, end, label, metrics in windows:
+        if clusters and start < clusters[-1]["end"]:
+            cluster = clusters[-1]
+            cluster["end"] = max(cluster["end"], end)
+        else:
+            cluster = {"start": start, "end": end, "hosts": {}}
+            clusters.append(cluster)
+        cluster["hosts"].setdefault(label, set()).update(metrics)
+    shared = [cluster for cluster in clusters if len(cluster["hosts"]) >= 2]
+
+    print("\n========🚨 Anomaly windows seen on several hosts =========\n")
+    if not shared:
+        print("✅ No abnormal window overlapped across hosts.")
+    for cluster in shared:
+        hosts = "; ".join(f"{label} ({', '.join(sorted(metrics))})" for label, metrics in sorted(cluster["hosts"].items()))
+        print(f"{format_epoch(cluster['start'])} → {format_epoch(cluster['end'])} | {len(cluster['hosts'])} hosts: {hosts}")
+    return len(shared)
+
+def run_fleet(paths, names, jobs=1, window=None, formats=("text",), optional=()):
+    # Every host's analyses plus its summary pass are queued on one pool of
+    # `jobs` workers, so wall-clock time follows the core count rather than
+    # the number of hosts. Exit status as for run_batch().
+    archives = find_archives(paths)
+    if not archives:
+        print(f"❌ No OSWatcher archives found in: {', '.join(paths)}")
+        return 2
+    manifests = {archive: load_manifest(archive) for archive in archives}
+    hosts = [manifests[archive]["host"] for archive in archives]
+    labels = {archive: host if hosts.count(host) == 1
+              else f"{host} ({os.path.basename(os.path.abspath(archive_location(archive)))})"
+              for archive, host in zip(archives, hosts)}
+    print(f"🌐 Fleet: {len(archives)} archives on {jobs} workers")
+
+    failed = []
+    findings = {archive: {} for archive in archives}
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for archive in archives:
+            groups, skipped = group_analyses(archive, names, manifests[archive], optional)
+            failed.extend(f"{labels[archive]}:{name}" for name in skipped)
+            for group in groups:
+                future = pool_submit(pool, run_analysis_group, archive, group, manifests[archive], 1, window, formats)
+                futures[future] = (archive, group)
+            futures[pool_submit(pool, summarize_host, archive, manifests[archive], window)] = (archive, None)
+
+        for future in as_completed(futures):
+            archive, group = futures[future]
+            try:
+                result = pool_result(future)
+            except Exception as e:
+                print(f"❌ {labels[archive]}: {', '.join(group or ['fleet summary'])} failed: {e}")
+                failed.extend(f"{labels[archive]}:{name}" for name in group or ["summary"])
+                continue
+            if group is None:
+                summaries[archive] = result
+                continue
+            for name, output_path, count in result:
+                findings[archive][name] = count
+                print(f"✅ {labels[archive]}: {ANALYSES[name][2]} written to: {output_path} ({count} findings)")
+
+    report_dir = os.path.dirname(os.path.commonpath([os.path.abspath(archive_location(archive)) for archive in archives]))
+    if len(paths) == 1 and os.path.isdir(paths[0]) and not is_osw_archive(paths[0]):
+        report_dir = paths[0]
+    report_path = os.path.join(report_dir, FLEET_REPORT_NAME)
+    write_report(report_path, report_fleet, labels, manifests, summaries, findings)
+    print(f"✅ Fleet summary written to: {report_path}")
+
+    if failed:
+        print(f"❌ Not completed: {', '.join(failed)}")
+        return 2
+    return 1 if any(any(counts.values()) for counts in findings.values()) else 0
+
+FOLLOW_STATE_NAME = "osw_follow.json"
+FOLLOW_TREND_RUN = 6
+FOLLOW_CLEAR_SAMPLES = 3
+DEFAULT_POLL_SECONDS = 10
+
+def complete_block_bounds(data):
+    # For bytes read from a live file: (stop, resume) offsets such that
+    # data[:stop] holds every complete zzz block plus the header line of the
+    # block still being written (so parsers that emit a block on the next
+    # header see it), and data[resume:] starts at that header. None when no
+    # block is complete yet.
+    end = data.rfind(b"\n") + 1
+    pos = data.rfind(b"\nzzz ", 0, end)
+    if pos < 0:
+        return None
+    return data.index(b"\n", pos + 1) + 1, pos + 1
+
+class FollowSource:
+    # Tails the newest hourly file of one subdirectory from a saved byte
+    # offset and moves on to the next file when OSWatcher rolls over.
+    def __init__(self, directory, parse_file, metrics, state):
+        self.directory = directory
+        self.parse_file = parse_file
+        self.metrics = metrics
+        self.base = state.get("file")
+        self.offset = state.get("offset", 0)
+
+    def state(self):
+        return {"file": self.base, "offset": self.offset}
+
+    def read(self, filename, start, stop):
+        samples = self.parse_file(os.path.join(self.directory, filename), (start, stop))
+        return list(iter_series_samples(samples, self.metrics))
+
+    def poll(self):
+        # New (epoch, metric, value) samples since the last poll.
+        files = {name[:-len(osw_file_suffix(name))]: name for name in list_osw_files(self.directory)}
+        bases = sorted(files)
+        if not bases:
+            return []
+        if self.base is None:
+            self.base, self.offset = bases[-1], 0
+        elif self.base not in files:
+            # Removed by OSWatcher housekeeping; continue with the next hour.
+            later = [base for base in bases if base > self.base]
+            self.base, self.offset = (later or bases)[0], 0
+
+        new = []
+        while self.base != bases[-1]:
+            # The file is finished: read its rest, including the last block.
+            if self.offset is not None:
+                new.extend(self.read(files[self.base], self.offset, None))
+            self.base, self.offset = bases[bases.index(self.base) + 1], 0
+
+        filename = files[self.base]
+        if self.offset is None:
+            return new
+        if not filename.endswith(".dat"):
+            # Already compressed, so nothing more will be appended.
+            new.extend(self.read(filename, self.offset, None))
+            self.offset = None
+            return new
+
+        path = os.path.join(self.directory, filename)
+        size = os.path.getsize(path)
+        if size < self.offset:
+            self.offset = 0  # truncated or recreated
+        if size == self.offset:
+            return new
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        bounds = complete_block_bounds(data)
+        if bounds is not None:
+            stop, resume = bounds
+            new.extend(self.read(filename, self.offset, self.offset + stop))
+            self.offset += resume
+        return new
+
+class FollowMetric:
+    # Running statistics of one metric plus the state its alerts depend on:
+    # whether it is above its limit (cleared only after FOLLOW_CLEAR_SAMPLES
+    # samples back at or below it, so noisy metrics do not flap), and the
+    # current strictly rising run above half the limit (the same rule as the
+    # increasing-load report).
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.stat = RunningStat()
+        self.last = None
+        self.above = False
+        self.below = 0
+        self.run = []
+
+    def add(self, epoch, value):
+        alerts = []
+        self.stat.add(value)
+        if value > self.limit:
+            if not self.above:
+                alerts.append((epoch, f"🚨 {self.name} {value:.2f} above {self.limit:g}"))
+            self.above = True
+            self.below = 0
+        elif self.above:
+            self.below += 1
+            if self.below == FOLLOW_CLEAR_SAMPLES:
+                alerts.append((epoch, f"✅ {self.name} back to {value:.2f} (limit {self.limit:g})"))
+                self.above = False
+
+        if value > self.limit / 2 and self.run and value > self.run[-1]:
+            self.run.append(value)
+        else:
+            self.run = [value] if value > self.limit / 2 else []
+        if len(self.run) == FOLLOW_TREND_RUN:
+            alerts.append((epoch, f"📈 {self.name} rising for {FOLLOW_TREND_RUN} samples: "
+                                  f"{self.run[0]:.2f} → {self.run[-1]:.2f}"))
+        self.last = value
+        return alerts
+
+def load_follow_state(archive_dir):
+    try:
+        with open(os.path.join(archive_dir, FOLLOW_STATE_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_follow_state(archive_dir, state):
+    state_path = os.path.join(archive_dir, FOLLOW_STATE_NAME)
+    tmp_path = f"{state_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+    except OSError as e:
+        print(f"⚠️ Could not save follow offsets: {e}", file=sys.stderr)
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+def follow_archive(archive_dir, poll_seconds=DEFAULT_POLL_SECONDS):
+    # Live mode: every poll parses only the zzz blocks completed since the
+    # previous one, updates the running statistics and prints alerts. Offsets
+    # are saved in the archive so a restart resumes where it stopped.
+    manifest = load_manifest(archive_dir)
+    limits = {metric: limit for metric, limit in timeline_limits(manifest["cpu_cores"]).items() if limit is not None}
+    metrics = {metric: FollowMetric(metric, limit) for metric, limit in limits.items()}
+    saved = load_follow_state(archive_dir)
+
+    grouped = {}
+    for metric, subdir, parse_file, _, column in TIMELINE_SOURCES:
+        if metric in limits:
+            grouped.setdefault((subdir, parse_file), []).append((metric, column))
+    sources = {}
+    for (subdir, parse_file), source_metrics in grouped.items():
+        directory = os.path.join(archive_dir, subdir)
+        if os.path.isdir(directory):
+            sources[subdir] = FollowSource(directory, parse_file, source_metrics, saved.get(subdir, {}))
+        else:
+            print(f"⚠️ {subdir} not found; {', '.join(metric for metric, _ in source_metrics)} not followed")
+
+    print(f"👀 Following {archive_dir} every {poll_seconds}s (Ctrl-C to stop). Alert limits: "
+          + ", ".join(f"{metric} {limit:g}" for metric, limit in limits.items()))
+    alert_count = 0
+    try:
+        while True:
+            alerts = []
+            latest = None
+            for source in sources.values():
+                for epoch, metric, value in source.poll():
+                    alerts.extend(metrics[metric].add(epoch, value))
+                    latest = epoch if latest is None else max(latest, epoch)
+            save_follow_state(archive_dir, {subdir: source.state() for subdir, source in sources.items()})
+
+            for epoch, message in sorted(alerts, key=lambda alert: alert[0]):
+                print(f"[{format_epoch(epoch)}] {message}")
+            alert_count += len(alerts)
+            if latest is not None:
+                print(f"⏱️ {format_epoch(latest)} | " + " | ".join(
+                    f"{metric.name} {metric.last:.2f}" for metric in metrics.values() if metric.last is not None),
+                    flush=True)
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        pass
+
+    print(f"\n========👀 Follow summary ({alert_count} alerts) =========\n")
+    for metric in metrics.values():
+        print(f"{metric.name:<13} {metric.stat.count:>6} samples  {metric.stat.summary()}")
+    return 0
 
-                if util > 50.0:
-                    read_MBps = kb_to_mb(read_kBps)
-                    write_MBps = kb_to_mb(write_kBps)
-                    high_util_disks.append((timestamp, device, read_MBps, write_MBps, util))
-
-    # Print top 10 iowait values
-    print("Top 10 highest iowait values:")
-    for ts, io in sorted(iowait_records, key=lambda x: x[1], reverse=True)[:10]:
-        print(f"{ts} - iowait: {io:.2f}%")
-
-    # Print high-utilization disks
-    print("\nDisks with utilization > 50%:")
-    for ts, dev, r_mb, w_mb, util in high_util_disks:
-        print(f"{ts} - Device: {dev}, Read: {r_mb:.2f} MB/s, Write: {w_mb:.2f} MB/s, Utilization: {util:.2f}%")
-#analyze_iostat_files("oswiostat")
 if __name__ == "__main__":
-    archive_dir = get_oswarchive_path()
+    parser = argparse.ArgumentParser(description="Analyze an OSWatcher archive.")
+    parser.add_argument("archives", nargs="*", metavar="archive",
+                        help="archive directory or .tar/.tar.gz/.zip bundle; runs non-interactively when "
+                             "given. Several archives, or --fleet with parent directories, run fleet mode")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep tailing the live archive and print alerts as new snapshots arrive")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS, metavar="SECONDS",
+                        help=f"follow mode polling interval (default {DEFAULT_POLL_SECONDS})")
+    parser.add_argument("--fleet", action="store_true",
+                        help="analyze every archive found in the given directories and write a cross-host summary")
+    parser.add_argument("--analyses", default="all",
+                        help=f"comma-separated list of {', '.join(ANALYSES)}, or all (default)")
+    parser.add_argument("--format", default="text",
+                        help=f"comma-separated report formats out of {', '.join(RESULT_FORMATS)} (default text); "
+                             f"structured results go to {RESULTS_DIR_NAME}/ in the archive")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="use at most N worker processes in total (0 = one per CPU; default one per CPU "
+                             "with archives given, 1 in the interactive menu)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="parsed-data cache location (default: ~/.cache/oswatcher-analyser)")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help="evict least recently used cache entries above this size")
+    parser.add_argument("--no-cache", action="store_true", help="always parse files from text")
+    parser.add_argument("--text-parser", action="store_true",
+                        help="decode every line instead of scanning plain .dat files as bytes")
+    parser.add_argument("--summary", action="store_true",
+                        help="print the archive manifest summary and exit")
+    parser.add_argument("--profile", action="store_true",
+                        help="print per-stage wall/CPU time, bytes, lines, samples and peak memory after the run")
+    parser.add_argument("--profile-json", metavar="FILE",
+                        help="also write the profile as JSON to FILE, for comparing runs")
+    parser.add_argument("--from", dest="time_from", type=parse_time_arg, default=None,
+                        help="only analyze zzz blocks at or after this time, e.g. '2024-01-15 10:00'")
+    parser.add_argument("--to", dest="time_to", type=parse_time_arg, default=None,
+                        help="only analyze zzz blocks at or before this time")
+    args = parser.parse_args()
+    try:
+        formats = parse_formats(args.format)
+    except ValueError as e:
+        parser.error(str(e))
+    fleet = args.fleet or len(args.archives) > 1
+    jobs = args.jobs if args.jobs is not None else (0 if args.archives else 1)
+    jobs = jobs or os.cpu_count() or 1
+    if args.text_parser:
+        os.environ["OSW_TEXT_PARSER"] = "1"
+    if not args.no_cache:
+        enable_parse_cache(args.cache_dir, args.cache_size_mb)
+    if args.profile or args.profile_json:
+        enable_profiler()
+    window = None
+    if args.time_from is not None or args.time_to is not None:
+        window = TimeWindow(args.time_from, args.time_to)
+        print(f"🕒 Time window: {window}")
 
-    oswtop_dir = os.path.join(archive_dir, "oswtop")
-    oswvmstat_dir = os.path.join(archive_dir, "oswvmstat")
-    oswmeminfo_dir = os.path.join(archive_dir, "oswmeminfo")
-    oswiostat_dir= os.path.join(archive_dir, "oswiostat")
+    if args.archives:
+        names = [name.strip() for name in args.analyses.split(",") if name.strip()]
+        optional = ()
+        if names == ["all"]:
+            names = list(ANALYSES)
+            optional = OPTIONAL_ANALYSES
+        unknown = [name for name in names if name not in ANALYSES]
+        if unknown or not names:
+            parser.error(f"unknown analyses: {', '.join(unknown) or args.analyses}")
+        for archive in args.archives:
+            if not os.path.isdir(archive) and not is_bundle_file(archive):
+                parser.error(f"not a directory or bundle: {archive}")
+        if args.follow:
+            if fleet:
+                parser.error("--follow takes a single archive")
+            if is_bundle_file(args.archives[0]):
+                parser.error("--follow needs a live archive directory, not a bundle")
+            status = follow_archive(args.archives[0], args.poll)
+        elif fleet:
+            status = run_fleet(args.archives, names, jobs, window, formats, optional)
+        else:
+            try:
+                archive_dir = resolve_archive(args.archives[0])
+            except ValueError as e:
+                parser.error(str(e))
+            if args.summary:
+                print_manifest_summary(load_manifest(archive_dir))
+                sys.exit(0)
+            status = run_batch(archive_dir, names, jobs, window, formats, optional)
+        finish_profile(args.profile, args.profile_json)
+        sys.exit(status)
 
-    
-   #unzip_gz_files(oswvmstat_dir)
-   #unzip_gz_files(oswmeminfo_dir)
-   # unzip_gz_files(oswiostat_dir)
+    archive_dir = get_oswarchive_path()
+    manifest = load_manifest(archive_dir)
+    print_manifest_summary(manifest)
+    if args.summary:
+        sys.exit(0)
+    cpu_cores = None
 
-    
     while True:
         print("\n========== OSWatcher Analysis Menu ==========")
         print("1. Check CPU performance only")
@@ -508,62 +4212,31 @@ if __name__ == "__main__":
         print("4. Analyze D-state and High CPU/Memory Processes")
         print("5. Analyze Disk and IOwait")
         print("6. Exit")
-        choice = input("Enter your choice (1-6): ").strip()
-
-        if choice == "1":
-            if not unzip_gz_files(oswtop_dir, silent=False):
-              print("❌ Failed to unzip files in oswtop_dir. Returning to main menu.")
-              continue 
-            if not unzip_gz_files(oswvmstat_dir, silent=False):
-              print("❌ Failed to unzip files in oswvmstat_dir. Returning to main menu.")
-              continue
-            output_path = os.path.join(archive_dir, "cpu_analysis.txt")
-            cpu_cores = get_cpu_cores_from_vmstat(oswvmstat_dir)
-            threshold_75 = 0.75 * cpu_cores
-            with open(output_path, "w") as f, contextlib.redirect_stdout(f):
-                process_oswtop_files(oswtop_dir, cpu_cores, threshold_75)
-            print(f"✅ CPU analysis written to: {output_path}")
-
-        elif choice == "2":
-            if not unzip_gz_files(oswmeminfo_dir, silent=False):
-             print("❌ Failed to unzip files in oswmeminfo_dir. Returning to main menu.")
-             continue
-            output_path = os.path.join(archive_dir, "memory_analysis.txt")
-            with open(output_path, "w") as f, contextlib.redirect_stdout(f):
-                process_oswmeminfo_files(oswmeminfo_dir)
-            print(f"✅ Memory analysis written to: {output_path}")
-
-        elif choice == "3":
-            if not unzip_gz_files(oswvmstat_dir, silent=False):
-             print("❌ Failed to unzip files in oswvmstat_dir. Returning to main menu.")
-             continue
-            output_path = os.path.join(archive_dir, "vmstat_analysis.txt")
-            cpu_cores = get_cpu_cores_from_vmstat(oswvmstat_dir)
-            with open(output_path, "w") as f, contextlib.redirect_stdout(f):
-                process_oswvmstat_files(oswvmstat_dir, cpu_cores)
-            print(f"✅ vmstat analysis written to: {output_path}")
-
-        elif choice == "4":
-            if not unzip_gz_files(oswtop_dir, silent=False):
-             print("❌ Failed to unzip files in oswvmstat_dir. Returning to main menu.")
-             continue
-            output_path = os.path.join(archive_dir, "dstate_and_high_resource_processes.txt")
-            with open(output_path, "w") as f, contextlib.redirect_stdout(f):
-                analyze_oswtop_data(oswtop_dir)
-            print(f"✅ D-state and High Resource Process analysis written to: {output_path}")
-        
-        elif choice == "5":
-            if not unzip_gz_files(oswiostat_dir, silent=False):
-             print("❌ Failed to unzip files in oswvmstat_dir. Returning to main menu.")
-             continue 
-            output_path = os.path.join(archive_dir, "disk and iowait details.txt")
-            with open(output_path, "w") as f, contextlib.redirect_stdout(f):
-                analyze_iostat_files(oswiostat_dir)
-            print(f"✅ DIOwait and disk analysis written to: {output_path}")
-
-        elif choice == "6":
+        print("7. Correlate CPU, memory, vmstat and iostat on one timeline")
+        print("8. Detect anomalies against a rolling baseline")
+        print("9. Analyze per-CPU hot-core imbalance (mpstat)")
+        print("10. Analyze process RSS/VSZ growth (ps)")
+        print("11. Analyze TCP retransmit rates (netstat)")
+        choice = input("Enter your choice (1-11, several as e.g. 1,4): ").strip()
+        choices = choice.replace(",", " ").split()
+
+        if MENU_EXIT in choices:
             print("✅ Exiting. Goodbye Shravan!")
             break
 
-        else:
+        if not choices or any(c not in MENU_ANALYSES for c in choices):
             print("❌ Invalid choice. Try again.")
+            continue
+
+        names = [MENU_ANALYSES[c] for c in choices]
+        if cpu_cores is None and {"cpu", "vmstat"} & set(names) and require_osw_dir(os.path.join(archive_dir, "oswvmstat")):
+            cpu_cores = get_cpu_cores(manifest)
+
+        groups, _ = group_analyses(archive_dir, names, manifest)
+        for group in groups:
+            for name, output_path, _ in run_analysis_group(archive_dir, group, manifest, jobs, window, formats):
+                print(f"✅ {ANALYSES[name][2]} written to: {output_path}")
+        if profiler:
+            # One profile per menu choice.
+            finish_profile(args.profile, args.profile_json)
+            enable_profiler()
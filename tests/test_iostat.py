@@ -0,0 +1,86 @@
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import script
+
+DEVICE_HEADER = ("Device:         rrqm/s   wrqm/s     r/s     w/s    rkB/s    wkB/s avgrq-sz avgqu-sz"
+                 "   await r_await w_await  svctm  %util\n")
+
+def iostat_block(when, utils):
+    # One zzz block of `iostat -xk 1 N`: a report per util value.
+    text = f"zzz ***Mon Jan 15 {when} UTC 2024\n"
+    for util in utils:
+        text += ("avg-cpu:  %user   %nice %system %iowait  %steal   %idle\n"
+                 "           5.20    0.00    1.00    2.00    0.00   91.80\n\n" + DEVICE_HEADER +
+                 "sda              0.00     1.00    2.00    5.00  1024.00  2048.00    37.71     0.01"
+                 f"    4.00    1.00    1.70   0.50 {util:6.2f}\n\n")
+    return text
+
+class IostatEpisodeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, *blocks):
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write("Linux OSWbb v8.1.2 host1\n" + "".join(blocks))
+
+    def analyze(self):
+        stats = script.IostatStats()
+        for path in script.list_osw_files(self.directory):
+            stats.merge(script.parse_oswiostat_file(os.path.join(self.directory, path)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats.report()
+        episodes = sorted((first, last, samples) for samples, _, _, first, last, _ in stats.episode_top)
+        return stats, episodes
+
+    def test_dip_inside_block(self):
+        # 60/40/60 in every block: episodes follow the reports, so the hot
+        # report at the end of a block joins the one that starts the next.
+        self.write("host1_iostat_24.01.15.0000.dat", iostat_block("00:00:05", (60, 40, 60)),
+                   iostat_block("00:00:35", (60, 40, 60)))
+        self.write("host1_iostat_24.01.15.0100.dat", iostat_block("00:01:05", (60, 40, 60)))
+        stats, episodes = self.analyze()
+        self.assertEqual(stats.reports, 9)
+        self.assertEqual(stats.devices["sda"][0].count, 9)
+        self.assertEqual(stats.episode_count, 4)
+        self.assertEqual(episodes, [
+            ("Mon Jan 15 00:00:05 UTC 2024", "Mon Jan 15 00:00:05 UTC 2024", 1),
+            ("Mon Jan 15 00:00:05 UTC 2024", "Mon Jan 15 00:00:35 UTC 2024", 2),
+            ("Mon Jan 15 00:00:35 UTC 2024", "Mon Jan 15 00:01:05 UTC 2024", 2),
+            ("Mon Jan 15 00:01:05 UTC 2024", "Mon Jan 15 00:01:05 UTC 2024", 1),
+        ])
+
+    def test_hot_across_files(self):
+        self.write("host1_iostat_24.01.15.0000.dat", iostat_block("00:00:05", (60, 70, 80)))
+        self.write("host1_iostat_24.01.15.0100.dat", iostat_block("00:00:35", (90, 60, 60)))
+        stats, episodes = self.analyze()
+        self.assertEqual(stats.episode_count, 1)
+        self.assertEqual(episodes, [("Mon Jan 15 00:00:05 UTC 2024", "Mon Jan 15 00:00:35 UTC 2024", 6)])
+        samples, peak, _, _, _, mean = stats.episode_top[0]
+        self.assertEqual(peak, 90)
+        self.assertAlmostEqual(mean, 70)
+
+    def test_parallel_matches_sequential(self):
+        for hour in range(4):
+            self.write(f"host1_iostat_24.01.15.{hour:02d}00.dat",
+                       *(iostat_block(f"{hour:02d}:{minute:02d}:05", (60, 40 + 10 * (minute % 3), 60))
+                         for minute in range(5)))
+        outputs = []
+        for jobs in (1, 2):
+            buffer = io.StringIO()
+            with contextlib.redirect_stdout(buffer):
+                script.analyze_iostat_files(self.directory, jobs)
+            outputs.append(buffer.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,264 @@
+import io
+import os
+import sys
+import gzip
+import shutil
+import tempfile
+import unittest
+import contextlib
+from array import array
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import script
+
+# The bytes/mmap fast path against the text parser it falls back to: the
+# same fixtures are parsed with OSW_TEXT_PARSER=1 and without, as plain .dat
+# (mmap), .dat.gz, CRLF and non-ASCII files (the last three take the text
+# path in both runs, which the tests check too).
+
+TOP = """Linux OSWbb v8.1.2 host1
+ 9999 root      20   0 1.0g 1.0g 1.0g D  5.0  0.1   0:00.01 before_first_zzz
+zzz ***Mon Jan 15 {hour}:00:05 UTC 2024
+top - {hour}:00:05 up 10 days,  3:02,  2 users,  load average: 4.29, 3.86, 3.43
+Tasks: 300 total,   1 running, 299 sleeping,   0 stopped,   0 zombie
+
+  PID USER      PR  NI  VIRT  RES  SHR S %CPU %MEM    TIME+  COMMAND
+ 1000 grid      20   0 10.2g 2.1g 2.0g S 11.7  6.8   1:23.45 ora_pmon_ORCL
+ 1001 oracle    20   0 10.2g 2.1g 2.0g D  0.0  0.8   1:23.45 ora_dbw0_ORCL -x  arg
+ 1002 root      20   0 10.2g 2.1g 2.0g R 97.2  6.9 123:23.45 kworker/u8:2
+zzz ***Mon Jan 15 {hour}:00:35 UTC 2024
+top - {hour}:00:35 up 10 days,  3:03,  2 users,  load average: 5.10, 4.00, 3.50
+  PID USER      PR  NI  VIRT  RES  SHR S %CPU %MEM    TIME+  COMMAND
+ 1001 oracle    20   0 10.2g 2.1g 2.0g D  1.5  0.8   1:23.45 ora_dbw0_ORCL -x  arg
+ 1003 grid      20   0 10.2g 2.1g 2.0g D 12.0  1.0   0:01.00 {cmd}
+top - garbled
+zzz ***Mon Jan 15 {hour}:01:05 UTC 2024
+top - {hour}:01:05 up 10 days,  3:03,  2 users,  load average: 6.00, 4.20, 3.60
+ 1003 grid      20   0 10.2g 2.1g 2.0g D 30.0  1.0   0:02.00 {cmd}
+ 1004 root      20   0 10.2g 2.1g 2.0g S 40.0  2.0   0:02.00 sshd
+"""
+
+MEMINFO = """zzz ***Mon Jan 15 {hour}:00:05 UTC 2024
+MemTotal:       65838092 kB
+MemFree:         6372072 kB
+Buffers:          6372072 kB
+Cached:         12744147 kB
+SwapCached:            0 kB
+zzz ***Mon Jan 15 {hour}:00:35 UTC 2024
+MemTotal:       65838092 kB
+MemFree:         6175871 kB
+Buffers:          6175871 kB
+Cached:         12351743 kB
+Comment: {cmd}
+zzz ***Mon Jan 15 {hour}:01:05 UTC 2024
+MemTotal:       65838092 kB
+MemFree:         6047422 kB
+"""
+
+VMSTAT = """Linux OSWbb v8.1.2 host1
+SNAP_INTERVAL 30
+VCPUS 16
+zzz ***Mon Jan 15 {hour}:00:05 UTC 2024
+procs -----------memory---------- ---swap-- -----io---- --system-- -----cpu-----
+ r  b   swpd   free   buff  cache   si   so    bi    bo   in   cs us sy id wa st
+ 2  1      0 5838092 500000 40000000    0    0     1     5    2    3  5  1 94  0  0
+ 5  5      0 5838092 500000 40000000    0    0     1     5    2    3  5  1 94  0  0
+zzz ***Mon Jan 15 {hour}:00:35 UTC 2024
+procs -----------memory---------- ---swap-- -----io---- --system-- -----cpu-----
+ r  b   swpd   free   buff  cache   si   so    bi    bo   in   cs us sy id wa st
+ 9  0      0 5838092 500000 40000000    0    0     1     5    2    3 60 30 10  0  0
+ {cmd}
+"""
+
+MPSTAT = """zzz ***Mon Jan 15 {hour}:00:05 UTC 2024
+Linux 4.18.0 (host1) \t01/15/2024 \t_x86_64_\t(2 CPU)
+
+{hour}:00:05 AM  CPU    %usr   %nice    %sys %iowait    %irq   %soft  %steal  %guest  %gnice   %idle
+{hour}:00:06 AM  all   50.00    0.00    5.00    0.00    0.00    0.00    0.00    0.00    0.00   45.00
+{hour}:00:06 AM    0   95.00    0.00    5.00    0.00    0.00    0.00    0.00    0.00    0.00    0.00
+{hour}:00:06 AM    1    5.00    0.00    5.00    0.00    0.00    0.00    0.00    0.00    0.00   90.00
+
+Average:     CPU    %usr   %nice    %sys %iowait    %irq   %soft  %steal  %guest  %gnice   %idle
+Average:     all   50.00    0.00    5.00    0.00    0.00    0.00    0.00    0.00    0.00   45.00
+zzz ***Mon Jan 15 {hour}:00:35 UTC 2024
+{hour}:00:35 AM  CPU    %usr   %nice    %sys %iowait    %irq   %soft  %steal  %guest  %gnice   %idle
+{hour}:00:36 AM    0   10.00    0.00    5.00    0.00    0.00    0.00    0.00    0.00    0.00   85.00 {cmd}
+"""
+
+PS = """zzz ***Mon Jan 15 {hour}:00:05 UTC 2024
+USER       PID  PPID PRI %CPU %MEM    VSZ   RSS WCHAN  S  STARTED     TIME COMMAND
+oracle    1000     1  19  4.4  0.1  151200  50400 -      S 00:00:05 00:01:00 ora_pmon_ORCL -p 0
+grid      1001     1  19  2.6  0.1  153195  51065 -      S   Jan 10 00:01:01 {cmd}
+zzz ***Mon Jan 15 {hour}:00:35 UTC 2024
+USER       PID  PPID PRI %CPU %MEM    VSZ   RSS WCHAN  S  STARTED     TIME COMMAND
+oracle    1000     1  19  4.4  0.1  251200  150400 -     S 00:00:05 00:01:00 ora_pmon_ORCL -p 0
+grid      1001     1  19  2.6  0.1  153195  51065 -      S   Jan 10 00:01:01 {cmd}
+"""
+
+NETSTAT = """zzz ***Mon Jan 15 {hour}:00:05 UTC 2024
+Tcp:
+    12345 active connection openings
+    38721 segments received
+    35722 segments sent out
+    18 segments retransmitted
+zzz ***Mon Jan 15 {hour}:00:35 UTC 2024
+Tcp:
+    77328 segments received
+    73104 segments sent out
+    66 segments retransmitted
+    {cmd}
+"""
+
+# name: (subdirectory, file tag, template)
+FIXTURES = {
+    "oswtop": ("top", TOP),
+    "oswmeminfo": ("meminfo", MEMINFO),
+    "oswvmstat": ("vmstat", VMSTAT),
+    "oswmpstat": ("mpstat", MPSTAT),
+    "oswps": ("ps", PS),
+    "oswnetstat": ("netstat", NETSTAT),
+}
+
+# variant: (file-name hour, file suffix, command text, line ending)
+VARIANTS = {
+    "plain": ("10", ".dat", "java", "\n"),
+    "gzip": ("11", ".dat.gz", "java", "\n"),
+    "crlf": ("12", ".dat", "java", "\r\n"),
+    "non-ascii": ("13", ".dat", "jävä_dæmon \udcff", "\n"),
+}
+
+def write_fixture(directory, subdir, variant, hour=None):
+    tag, template = FIXTURES[subdir]
+    variant_hour, suffix, cmd, newline = VARIANTS[variant]
+    hour = hour or variant_hour
+    os.makedirs(os.path.join(directory, subdir), exist_ok=True)
+    path = os.path.join(directory, subdir, f"host1_{tag}_24.01.15.{hour}00{suffix}")
+    data = template.format(hour=hour, cmd=cmd).replace("\n", newline).encode("utf-8", "surrogateescape")
+    with (gzip.open if suffix == ".dat.gz" else open)(path, "wb") as f:
+        f.write(data)
+    return path
+
+def plain(value):
+    # Comparable form of parser output: TimeSeries as decoded columns, NaN
+    # as a string so that missing values compare equal.
+    if isinstance(value, script.TimeSeries):
+        return {name: plain(list(column)) for name, column in value.as_columns().items()}
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, array)):
+        return [plain(item) for item in value]
+    if isinstance(value, float) and value != value:
+        return "nan"
+    return value
+
+@contextlib.contextmanager
+def text_parser(enabled):
+    with mock.patch.dict(os.environ):
+        os.environ.pop("OSW_TEXT_PARSER", None)
+        if enabled:
+            os.environ["OSW_TEXT_PARSER"] = "1"
+        yield
+
+OSWTOP_CONSUMER_SETS = (
+    (script.OswtopLoadConsumer,),
+    (script.OswtopDStateConsumer,),
+    (script.OswtopProcessConsumer,),
+    (script.OswtopLoadConsumer, script.OswtopDStateConsumer, script.OswtopProcessConsumer),
+)
+
+class ParserEquivalenceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = {(subdir, variant): write_fixture(self.directory, subdir, variant)
+                      for subdir in FIXTURES for variant in VARIANTS}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def both(self, parse, *args):
+        results = []
+        for enabled in (False, True):
+            with text_parser(enabled):
+                results.append(plain(parse(*args)))
+        return results
+
+    def test_fast_path_taken_for_plain_files_only(self):
+        for (subdir, variant), path in self.paths.items():
+            with script.mmap_osw_file(path) as view:
+                self.assertEqual(view is not None, variant == "plain", (subdir, variant))
+            with text_parser(True), script.mmap_osw_file(path) as view:
+                self.assertIsNone(view)
+
+    def test_oswtop(self):
+        for variant in VARIANTS:
+            path = self.paths["oswtop", variant]
+            for consumer_types in OSWTOP_CONSUMER_SETS:
+                fast, text = self.both(script.scan_oswtop_file, path, consumer_types)
+                self.assertEqual(fast, text, (variant, consumer_types))
+            fast, _ = self.both(script.scan_oswtop_file, path, OSWTOP_CONSUMER_SETS[-1])
+            loads, (dstate_rows, snapshots), (processes, rows, _) = fast
+            self.assertEqual(len(loads[1]["load_1m"]), 3)
+            self.assertEqual(len(dstate_rows["pid"]), 4)
+            self.assertEqual(snapshots, 3)
+            self.assertEqual(rows, 7)
+
+    def test_sources(self):
+        for name in ("oswmeminfo", "oswvmstat", "oswmpstat", "oswps", "oswnetstat"):
+            parse = script.OSW_SOURCES[name].parse
+            for variant in VARIANTS:
+                fast, text = self.both(parse, self.paths[name, variant])
+                self.assertEqual(fast, text, (name, variant))
+                self.assertTrue(next(iter(fast.values())), (name, variant))
+
+    def test_crlf_matches_lf(self):
+        crlf_directory = os.path.join(self.directory, "crlf")
+        for name in FIXTURES:
+            if name == "oswtop":
+                parse = lambda path: script.scan_oswtop_file(path, OSWTOP_CONSUMER_SETS[-1])
+            else:
+                parse = script.OSW_SOURCES[name].parse
+            lf = plain(parse(self.paths[name, "plain"]))
+            crlf = plain(parse(write_fixture(crlf_directory, name, "crlf", VARIANTS["plain"][0])))
+            if name == "oswtop":
+                # The load consumer keeps the file path.
+                lf[0][0] = crlf[0][0]
+            self.assertEqual(lf, crlf, name)
+
+    def test_window_spans(self):
+        # Boundary files are parsed from a byte span on both paths.
+        window = script.TimeWindow(script.parse_time_arg("2024-01-15 10:00:30"),
+                                   script.parse_time_arg("2024-01-15 10:00:40"))
+        for name in ("oswmeminfo", "oswvmstat", "oswmpstat", "oswps", "oswnetstat"):
+            directory = os.path.join(self.directory, name)
+            fast, text = self.both(lambda: list(script.map_osw_files(script.OSW_SOURCES[name].parse, directory,
+                                                                       window=window)))
+            self.assertEqual(fast, text, name)
+        directory = os.path.join(self.directory, "oswtop")
+        for consumer_types in OSWTOP_CONSUMER_SETS:
+            reports = []
+            for enabled in (False, True):
+                consumers = [consumer_type(2, 1.5) if consumer_type is script.OswtopLoadConsumer
+                             else consumer_type() for consumer_type in consumer_types]
+                buffer = io.StringIO()
+                with text_parser(enabled), contextlib.redirect_stdout(buffer):
+                    script.scan_oswtop(directory, consumers, window=window)
+                    for consumer in consumers:
+                        consumer.report()
+                reports.append(buffer.getvalue())
+            self.assertEqual(reports[0], reports[1], consumer_types)
+
+    def test_oswtop_reports(self):
+        directory = os.path.join(self.directory, "oswtop")
+        reports = []
+        for enabled in (False, True):
+            buffer = io.StringIO()
+            with text_parser(enabled), contextlib.redirect_stdout(buffer):
+                script.process_oswtop_files(directory, 2, 1.5)
+                script.analyze_oswtop_data(directory)
+            reports.append(buffer.getvalue())
+        self.assertEqual(reports[0], reports[1])
+        self.assertIn("D-state", reports[0])
+
+if __name__ == "__main__":
+    unittest.main()
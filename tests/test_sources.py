@@ -0,0 +1,187 @@
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import script
+
+MPSTAT_HEADER = ("10:00:05 AM  CPU    %usr   %nice    %sys %iowait    %irq   %soft  %steal  %guest  %gnice   %idle\n")
+
+def mpstat_row(cpu, usr=0, sys=0, iowait=0, irq=0, soft=0, steal=0, idle=0):
+    return (f"10:00:06 AM  {cpu:>3} {usr:7.2f} {0:7.2f} {sys:7.2f} {iowait:7.2f} {irq:7.2f} {soft:7.2f} "
+            f"{steal:7.2f} {0:7.2f} {0:7.2f} {idle:7.2f}\n")
+
+def zzz(when):
+    return f"zzz ***Mon Jan 15 {when} UTC 2024\n"
+
+def epoch(when):
+    return script.parse_osw_timestamp(f"Mon Jan 15 {when} UTC 2024")
+
+class RecordingSink:
+    # Stands in for ResultSink: keeps the result tables in memory.
+    text = True
+
+    def __init__(self):
+        self.tables = {}
+
+    def write(self, table, columns):
+        recorded = self.tables.setdefault(table, {})
+        for name, values in columns.items():
+            recorded.setdefault(name, []).extend(values)
+
+class SourceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, *blocks):
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write("Linux OSWbb v8.1.2 host1\n" + "".join(blocks))
+        return os.path.join(self.directory, name)
+
+    def analyze(self, analyze):
+        results = RecordingSink()
+        with contextlib.redirect_stdout(io.StringIO()):
+            findings = analyze(self.directory, 1, None, results)
+        return findings, results.tables
+
+class MpstatTest(SourceTest):
+    def test_offline_cpus(self):
+        # CPU 0 prints all zeros while offline; a CPU at 100% iowait, steal
+        # or irq has %idle 0 too but is online.
+        path = self.write("host1_mpstat_24.01.15.1000.dat", zzz("10:00:05"),
+                          MPSTAT_HEADER, mpstat_row("all", usr=40, idle=60), mpstat_row(0),
+                          mpstat_row(1, iowait=100), mpstat_row(2, steal=100), mpstat_row(3, irq=100),
+                          mpstat_row(4, usr=95, idle=5), mpstat_row(5, usr=1, idle=99), "\n",
+                          MPSTAT_HEADER, mpstat_row(0, usr=20, sys=10, idle=70), mpstat_row(1, idle=100),
+                          mpstat_row(2, idle=100), mpstat_row(3, idle=100), mpstat_row(4, idle=100),
+                          mpstat_row(5, idle=100))
+        stats = script.MpstatStats()
+        rows = stats.add(script.OSW_SOURCES["oswmpstat"].parse(path))
+        when = epoch("10:00:05")
+        self.assertEqual(rows, [
+            (when, 5, 59.2, 100.0, 2, 0.0, 3, False),
+            (when, 6, 5.0, 30.0, 0, 10.0, 0, False),
+        ])
+        self.assertEqual(list(stats.cpu_intervals), [1, 2, 2, 2, 2, 2])
+        self.assertEqual(list(stats.cpu_hot), [0, 0, 1, 1, 1, 0])
+
+    def test_offline_without_optional_columns(self):
+        # Older sysstat has no %steal, %irq or %soft; the missing columns do
+        # not make an all-zero row look online.
+        path = self.write("host1_mpstat_24.01.15.1000.dat", zzz("10:00:05"),
+                          "10:00:05 AM  CPU   %user   %nice %system %iowait   %idle\n",
+                          "10:00:06 AM    0   95.00    0.00    5.00    0.00    0.00\n",
+                          "10:00:06 AM    1    0.00    0.00    0.00    0.00    0.00\n",
+                          "10:00:06 AM    2    0.00    0.00    0.00  100.00    0.00\n",
+                          "10:00:06 AM    3    2.00    0.00    0.00    0.00   98.00\n")
+        rows = script.MpstatStats().add(script.OSW_SOURCES["oswmpstat"].parse(path))
+        self.assertEqual(rows, [(epoch("10:00:05"), 3, 34.0, 100.0, 0, 5.0, 1, True)])
+
+    def test_report(self):
+        self.write("host1_mpstat_24.01.15.1000.dat", zzz("10:00:05"), MPSTAT_HEADER,
+                   mpstat_row(0), mpstat_row(1, usr=92, idle=8), mpstat_row(2, idle=100), mpstat_row(3, idle=100))
+        self.write("host1_mpstat_24.01.15.1100.dat", zzz("11:00:05"), MPSTAT_HEADER,
+                   mpstat_row(0, usr=50, idle=50), mpstat_row(1, usr=50, idle=50), mpstat_row(2, idle=100),
+                   mpstat_row(3, idle=100))
+        findings, tables = self.analyze(script.analyze_mpstat_files)
+        self.assertEqual(findings, 1)
+        self.assertEqual(tables["mpstat_intervals"]["cpus"], [3, 4])
+        self.assertEqual(tables["mpstat_intervals"]["imbalanced"], [True, False])
+        self.assertEqual(tables["mpstat_cpus"]["cpu"], [0, 1, 2, 3])
+        self.assertEqual(tables["mpstat_cpus"]["intervals"], [1, 2, 2, 2])
+        self.assertEqual(tables["mpstat_cpus"]["avg_busy"], [50.0, 71.0, 0.0, 0.0])
+
+PS_HEADER = "USER       PID  PPID PRI %CPU %MEM    VSZ   RSS WCHAN  S  STARTED     TIME COMMAND\n"
+
+def ps_row(pid, vsz, rss, cmd, started="00:00:05"):
+    return f"oracle {pid:>8}     1  19  4.4  0.1 {vsz:>8} {rss:>8} -      S {started:>8} 00:01:00 {cmd} -p 0\n"
+
+class PsTest(SourceTest):
+    def test_rss_growth(self):
+        # PID 1000 grows by 200 MB over two files and peaks in between; PID
+        # 1002 is reused by another program, which starts over.
+        self.write("host1_ps_24.01.15.1000.dat",
+                   zzz("10:00:05"), PS_HEADER, ps_row(1000, 151200, 51200, "ora_pmon_ORCL"),
+                   ps_row(1001, 153195, 51065, "ora_dbw0_ORCL", "Jan 10"), ps_row(1002, 1000, 1000, "sleep"),
+                   zzz("10:30:05"), PS_HEADER, ps_row(1000, 451200, 307200, "ora_pmon_ORCL"),
+                   ps_row(1001, 153195, 51065, "ora_dbw0_ORCL", "Jan 10"))
+        self.write("host1_ps_24.01.15.1100.dat",
+                   zzz("11:00:05"), PS_HEADER, ps_row(1000, 351200, 256000, "ora_pmon_ORCL"),
+                   ps_row(1001, 153195, 50000, "ora_dbw0_ORCL", "Jan 10"), ps_row(1002, 9000, 9000, "java"))
+        findings, tables = self.analyze(script.analyze_ps_files)
+        self.assertEqual(findings, 1)
+        growth = tables["ps_growth"]
+        processes = {(pid, cmd): i for i, (pid, cmd) in enumerate(zip(growth["pid"], growth["cmd"]))}
+        self.assertEqual(sorted(processes), [(1000, "ora_pmon_ORCL"), (1001, "ora_dbw0_ORCL"), (1002, "java"),
+                                             (1002, "sleep")])
+        pmon = processes[1000, "ora_pmon_ORCL"]
+        self.assertEqual(growth["samples"][pmon], 3)
+        self.assertEqual(growth["first_epoch"][pmon], epoch("10:00:05"))
+        self.assertEqual(growth["last_epoch"][pmon], epoch("11:00:05"))
+        self.assertEqual((growth["first_rss_kb"][pmon], growth["last_rss_kb"][pmon], growth["peak_rss_kb"][pmon]),
+                         (51200, 256000, 307200))
+        self.assertEqual((growth["first_vsz_kb"][pmon], growth["last_vsz_kb"][pmon]), (151200, 351200))
+        dbw = processes[1001, "ora_dbw0_ORCL"]
+        self.assertEqual((growth["first_rss_kb"][dbw], growth["last_rss_kb"][dbw]), (51065, 50000))
+        self.assertEqual(growth["samples"][processes[1002, "java"]], 1)
+
+        total = tables["ps_total_rss"]
+        self.assertEqual(list(total["epoch"]), [epoch("10:00:05"), epoch("10:30:05"), epoch("11:00:05")])
+        self.assertEqual(list(total["rss_kb"]), [103265, 358265, 315000])
+        self.assertEqual(list(total["processes"]), [3, 2, 3])
+
+class NetstatTest(SourceTest):
+    def block(self, when, received, sent, retransmitted, old=False):
+        sent_label, retransmitted_label = ("send out", "retransmited") if old else ("sent out", "retransmitted")
+        return (zzz(when) + "Tcp:\n    12345 active connection openings\n"
+                f"    {received} segments received\n    {sent} segments {sent_label}\n"
+                f"    {retransmitted} segments {retransmitted_label}\n")
+
+    def test_interval_deltas(self):
+        # A block counts once the next zzz header is written, so every file
+        # ends with a bare one.
+        self.write("host1_netstat_24.01.15.1000.dat",
+                   self.block("10:00:05", 38721, 35722, 18), self.block("10:00:35", 77328, 73104, 66),
+                   self.block("10:01:05", 87328, 83104, 266, old=True), zzz("10:01:35"))
+        # Rebooted between the files: the counters start over. The block
+        # without a retransmit counter is skipped.
+        self.write("host1_netstat_24.01.15.1100.dat",
+                   self.block("11:00:05", 600, 500, 1), self.block("11:00:35", 2600, 2500, 31),
+                   self.block("11:00:50", 2650, 2550, 35)[:-len("    35 segments retransmitted\n")],
+                   self.block("11:01:05", 2700, 2600, 41), zzz("11:01:35"))
+        findings, tables = self.analyze(script.analyze_netstat_files)
+        self.assertEqual(findings, 2)
+        intervals = tables["netstat_intervals"]
+        self.assertEqual(intervals["start_epoch"], [epoch("10:00:05"), epoch("10:00:35"), epoch("11:00:05"),
+                                                    epoch("11:00:35")])
+        self.assertEqual(intervals["end_epoch"], [epoch("10:00:35"), epoch("10:01:05"), epoch("11:00:35"),
+                                                  epoch("11:01:05")])
+        self.assertEqual(intervals["segments_sent"], [37382, 10000, 2000, 100])
+        self.assertEqual(intervals["segments_retransmitted"], [48, 200, 30, 10])
+        self.assertEqual(intervals["retrans_pct"], [48 / 37382 * 100, 2.0, 1.5, 10.0])
+        self.assertEqual(intervals["retrans_per_s"], [1.6, 200 / 30, 1.0, 1 / 3])
+        # 10% of 100 segments is below NETSTAT_MIN_SEGMENTS and not flagged.
+        self.assertEqual(intervals["high"], [False, True, True, False])
+
+    def test_report(self):
+        self.write("host1_netstat_24.01.15.1000.dat",
+                   self.block("10:00:05", 38721, 35722, 18), self.block("10:00:35", 77328, 73104, 66),
+                   self.block("10:01:05", 87328, 83104, 266), self.block("10:01:35", 600, 500, 1),
+                   zzz("10:02:05"))
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            script.analyze_netstat_files(self.directory)
+        report = buffer.getvalue()
+        self.assertIn("2.00% (200 of 10000 segments, 6.7/s)", report)
+        self.assertIn("2 intervals: 248 of 47382 segments retransmitted (0.523%)", report)
+        self.assertIn("Counters went backwards 1 times", report)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import random
+import unittest
+from array import array
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import script
+
+# The per-sample loops of detect_increasing_load_patterns and
+# detect_decreasing_load_patterns before the trend engine, returning indexes
+# instead of printing samples. The memory detectors used the same loops.
+
+def old_rising_runs(values, threshold, min_consecutive):
+    patterns = []
+    pattern = []
+    tracking = False
+    for i in range(1, len(values)):
+        if values[i] > threshold:
+            if not tracking and values[i - 1] > threshold:
+                tracking = True
+                pattern = [i - 1]
+            if values[i] > values[i - 1]:
+                pattern.append(i)
+            else:
+                if len(pattern) >= min_consecutive:
+                    patterns.append(pattern)
+                pattern = []
+                tracking = False
+        else:
+            tracking = False
+            pattern = []
+    if len(pattern) >= min_consecutive:
+        patterns.append(pattern)
+    return patterns
+
+def old_falling_runs(values, threshold, min_consecutive):
+    patterns = []
+    pattern = []
+    tracking = False
+    for i in range(len(values) - 1):
+        if not tracking:
+            if values[i] > threshold:
+                tracking = True
+                pattern = [i]
+        else:
+            if values[i + 1] < values[i]:
+                pattern.append(i + 1)
+            else:
+                if len(pattern) >= min_consecutive:
+                    patterns.append(pattern)
+                pattern = []
+                tracking = False
+    if len(pattern) >= min_consecutive:
+        patterns.append(pattern)
+    return patterns
+
+def random_series(rng):
+    n = rng.randint(0, 60)
+    if rng.random() < 0.5:
+        # Few distinct values, so ties and threshold hits are common.
+        return [float(rng.randint(0, 10)) for _ in range(n)], float(rng.randint(0, 10))
+    return [rng.uniform(0, 100) for _ in range(n)], rng.uniform(0, 100)
+
+def as_lists(runs):
+    return [list(run) for run in runs]
+
+class TrendEquivalenceTest(unittest.TestCase):
+    CASES = 5000
+
+    def check(self, find, old, min_runs, use_numpy):
+        rng = random.Random(6)
+        for _ in range(self.CASES):
+            values, threshold = random_series(rng)
+            min_run = rng.choice(min_runs)
+            expected = old(values, threshold, min_run)
+            with mock.patch.object(script, "np", script.np if use_numpy else None):
+                for series in (values, array("d", values)):
+                    self.assertEqual(as_lists(find(series, threshold, min_run)), expected,
+                                     (values, threshold, min_run))
+
+    def test_rising_python(self):
+        self.check(script.find_rising_runs, old_rising_runs, range(2, 8), False)
+
+    def test_falling_python(self):
+        self.check(script.find_falling_runs, old_falling_runs, range(1, 8), False)
+
+    @unittest.skipIf(script.np is None, "numpy not installed")
+    def test_rising_numpy(self):
+        self.check(script.find_rising_runs, old_rising_runs, range(2, 8), True)
+
+    @unittest.skipIf(script.np is None, "numpy not installed")
+    def test_falling_numpy(self):
+        self.check(script.find_falling_runs, old_falling_runs, range(1, 8), True)
+
+    def test_rising_min_run(self):
+        # A rising run needs two samples; the old loops reported single
+        # samples for min_consecutive=1.
+        with self.assertRaises(ValueError):
+            script.find_rising_runs([1.0, 2.0], 0, 1)
+
+if __name__ == "__main__":
+    unittest.main()